@@ -0,0 +1,245 @@
+# Runs every recognized command as one cancellable unit: the spoken reply
+# (respond -> speak) and the action (classify -> dispatch) are asyncio tasks on a
+# dedicated event loop. A new wake word or a "stop" command cancels them, which
+# aborts in-flight LLM requests, speech synthesis and pygame playback.
+#
+#   pipeline = CommandPipeline(respond=generate_response_async, speak=speak_text,
+#                              classify=cached_process_query_async, dispatch=determine_function)
+#   assistant = VoiceAssistant(on_recognized=pipeline.submit, on_wake=pipeline.barge_in)
+#
+# With `combined`, one call yields both the intent and the reply, which are then
+# spoken and dispatched concurrently (see app.models.combined_query). Compound
+# commands classify to steps of intents (app.models.multi_intent): the intents
+# of a step are dispatched together, the steps one after another. With
+# `stream`, commands it accepts (general questions) are answered by speaking a
+# streamed reply sentence by sentence instead.
+#
+# Every command carries a priority (app.scheduler): commands from the shared
+# todo queue are submitted as BACKGROUND, so their blocking calls and handlers
+# queue behind anything the user says.
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.scheduler import BACKGROUND, INTERACTIVE, PRIORITY_NAMES, PriorityScheduler, current_priority
+
+logger = logging.getLogger("assistant")
+
+# Command latencies kept per priority
+RECENT_COMMANDS = 200
+
+STOP_PHRASES = {"stop", "cancel", "never mind", "nevermind", "shut up", "be quiet", "that's enough", "enough"}
+
+
+def is_stop_phrase(text, stop_phrases=STOP_PHRASES):
+    normalized = " ".join(text.strip().lower().strip(".!?,").split())
+    for prefix in ("vision ", "please "):
+        if normalized.startswith(prefix):
+            normalized = normalized[len(prefix):]
+    return normalized in stop_phrases
+
+
+class CommandHandle:
+    """One recognized command and the tasks working on it."""
+
+    def __init__(self, text, command_id=None, priority=INTERACTIVE):
+        self.id = command_id or uuid.uuid4().hex[:8]
+        self.text = text
+        self.priority = priority
+        self.submitted_at = time.monotonic()
+        self.tasks = []
+        self.cancelled = False
+        self.done = threading.Event()
+
+    def __repr__(self):
+        return f"CommandHandle({self.id}, {self.text!r})"
+
+
+class CommandPipeline:
+    """
+    :param respond: Text -> spoken reply. Coroutine functions are awaited on the
+                    pipeline loop (and so can be cancelled); plain functions run in `executor`.
+    :param speak: Reply -> None, plays the reply. Same sync/async rules.
+    :param classify: Text -> intent (QueryProcessor), or steps of intents (list of lists).
+    :param dispatch: Intent -> None, executes the action. Runs in `executor`; once
+                     started it runs to completion, cancellation only prevents the start.
+                     May return a concurrent Future (HandlerRegistry.dispatch), which is
+                     awaited without holding an executor thread.
+    :param executor: Pool for blocking calls; by default a 4-worker PriorityScheduler
+                     with one worker kept for interactive commands.
+    :param stop_phrases: Commands that cancel in-flight work instead of being executed.
+    :param combined: Optional text -> (intent or steps of intents or None, reply). When given it replaces
+                     `respond` and `classify`, so each command costs one LLM call.
+    :param stream: Optional text -> coroutine that answers and speaks the command itself,
+                   or None to handle it the usual way.
+    """
+
+    def __init__(self, respond, speak, classify, dispatch, executor=None, stop_phrases=STOP_PHRASES,
+                 combined=None, stream=None):
+        self.respond = respond
+        self.speak = speak
+        self.classify = classify
+        self.dispatch = dispatch
+        self.executor = executor or PriorityScheduler(max_workers=4, reserved=1, name="command")
+        self.stop_phrases = stop_phrases
+        self.combined = combined
+        self.stream = stream
+        self._active = {}
+        self._lock = threading.Lock()
+        self.latencies = {priority: collections.deque(maxlen=RECENT_COMMANDS) for priority in PRIORITY_NAMES}
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="command-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, text, command_id=None, priority=INTERACTIVE):
+        """
+        Start working on a recognized command (thread-safe).
+
+        :param command_id: Id assigned at wake time (VoiceAssistant.command_id), so
+                           logs and the audio journal share it. Generated if omitted.
+        :param priority: INTERACTIVE for the user, BACKGROUND for queued jobs.
+        :return: The CommandHandle, or None for empty input and stop phrases.
+        """
+        if not text or not text.strip():
+            logger.info("Nothing recognized.")
+            return None
+
+        if is_stop_phrase(text, self.stop_phrases):
+            logger.info(f"Stop requested: {text}")
+            self.cancel_all()
+            return None
+
+        handle = CommandHandle(text, command_id, priority)
+        with self._lock:
+            self._active[handle.id] = handle
+        logger.info(f"[{handle.id}] Recognized: {text}")
+        asyncio.run_coroutine_threadsafe(self._run(handle), self.loop)
+        return handle
+
+    def barge_in(self):
+        """Hotword callback: the user started a new command, drop whatever they said before."""
+        with self._lock:
+            handles = [handle for handle in self._active.values() if handle.priority != BACKGROUND]
+        for handle in handles:
+            self.cancel(handle)
+
+    def cancel_all(self):
+        with self._lock:
+            handles = list(self._active.values())
+        for handle in handles:
+            self.cancel(handle)
+
+    def cancel(self, handle):
+        """Cancel one command (thread-safe)."""
+        if handle.cancelled or handle.done.is_set():
+            return
+        handle.cancelled = True
+        logger.info(f"[{handle.id}] Cancelled: {handle.text}")
+        self.loop.call_soon_threadsafe(self._cancel_tasks, handle)
+
+    def active(self):
+        with self._lock:
+            return list(self._active.values())
+
+    def stats(self):
+        """Command latency (submit to done) per priority, and the executor's own stats if it keeps them."""
+        report = {}
+        for priority, name in PRIORITY_NAMES.items():
+            latencies = np.array(self.latencies[priority]) * 1000
+            report[name] = {
+                "commands": len(latencies),
+                "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else None,
+            }
+        if hasattr(self.executor, "stats"):
+            return {"commands": report, "executor": self.executor.stats()}
+        return {"commands": report}
+
+    def shutdown(self):
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
+        self.executor.shutdown(wait=False)
+
+    @staticmethod
+    def _cancel_tasks(handle):
+        for task in handle.tasks:
+            task.cancel()
+
+    async def _call(self, fn, *args):
+        if asyncio.iscoroutinefunction(fn):
+            return await fn(*args)
+        return await self.loop.run_in_executor(self.executor, fn, *args)
+
+    async def _reply(self, handle):
+        reply = await self._call(self.respond, handle.text)
+        if reply:
+            await self._call(self.speak, reply)
+
+    async def _dispatch(self, intent):
+        result = await self._call(self.dispatch, intent)
+        if isinstance(result, Future):
+            result = await asyncio.wrap_future(result)
+        return result
+
+    async def _dispatch_steps(self, intents):
+        if not isinstance(intents, list):
+            return await self._dispatch(intents)
+        for step in intents:
+            results = await asyncio.gather(*(self._dispatch(intent) for intent in step), return_exceptions=True)
+            # Later steps may depend on this one ("clone portfolio and set it up")
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+    async def _execute(self, handle):
+        intent = await self._call(self.classify, handle.text)
+        if handle.cancelled:
+            return
+        await self._dispatch_steps(intent)
+
+    async def _answer(self, handle):
+        intent, reply = await self._call(self.combined, handle.text)
+        if handle.cancelled:
+            return
+        work = []
+        if reply:
+            work.append(self._call(self.speak, reply))
+        if intent is not None:
+            work.append(self._dispatch_steps(intent))
+        await asyncio.gather(*work)
+
+    async def _run(self, handle):
+        # Inherited by the tasks below, the executor jobs and the handlers they queue
+        current_priority.set(handle.priority)
+        try:
+            if handle.cancelled:
+                return
+            streamed = self.stream(handle.text) if self.stream else None
+            if streamed is not None:
+                handle.tasks = [asyncio.create_task(streamed, name=f"{handle.id}-stream")]
+            elif self.combined:
+                handle.tasks = [asyncio.create_task(self._answer(handle), name=f"{handle.id}-answer")]
+            else:
+                handle.tasks = [
+                    asyncio.create_task(self._reply(handle), name=f"{handle.id}-reply"),
+                    asyncio.create_task(self._execute(handle), name=f"{handle.id}-execute"),
+                ]
+            results = await asyncio.gather(*handle.tasks, return_exceptions=True)
+            for task, result in zip(handle.tasks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"[{handle.id}] {task.get_name()} failed: {result}")
+        finally:
+            with self._lock:
+                self._active.pop(handle.id, None)
+            if not handle.cancelled:
+                self.latencies[handle.priority].append(time.monotonic() - handle.submitted_at)
+            handle.done.set()
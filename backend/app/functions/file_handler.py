@@ -3,8 +3,13 @@ import shutil
 import platform
 import difflib
 import subprocess
+import time
 # Global cache for indexed files
 indexed_files_cache = {}
+# normalized path -> (searched path, time it was indexed), for refresh_stale_indexes
+indexed_paths = {}
+# Indexes older than this are rebuilt by the wake-word warm-up
+INDEX_MAX_AGE = 300
 # from logger import logger
 def is_wsl():
     return 'microsoft' in platform.uname().release.lower()
@@ -40,8 +45,29 @@ def index_files_in_path(search_path):
 
     # Store cache by normalized path
     indexed_files_cache[normalize_filename(search_path)] = indexed_files
+    indexed_paths[normalize_filename(search_path)] = (search_path, time.time())
     return indexed_files
 
+def refresh_stale_indexes(search_paths=(), max_age=INDEX_MAX_AGE):
+    """
+    Rebuild indexes older than max_age, and build missing ones for search_paths,
+    so fuzzy_search_file does not have to walk the disk while a command waits.
+
+    :param search_paths: Paths that should be indexed even if no search used them yet.
+    :param max_age: Seconds after which an index is rebuilt.
+    :return: Paths that were (re)indexed.
+    """
+    now = time.time()
+    stale = [path for path, indexed_at in list(indexed_paths.values()) if now - indexed_at > max_age]
+    for path in search_paths:
+        converted = convert_to_wsl_path(path) if is_wsl() else path
+        if normalize_filename(converted) not in indexed_files_cache:
+            stale.append(path)
+
+    for path in stale:
+        index_files_in_path(path)
+    return stale
+
 def fuzzy_search_file(stt_filename, search_path):
     """
     Fuzzy search for a file using STT input to tolerate typos or phonetically similar names.
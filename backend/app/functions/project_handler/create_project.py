@@ -6,13 +6,7 @@ import time
 import queue
 
 from app.functions.logger import logger
-
-PROJECT_TYPE_ALIASES = {
-    "react": ["react", "react.js", "reactjs"],
-    "next": ["next", "next.js", "nextjs", "nextjs app"],
-    "flask": ["flask"],
-    "django": ["django", "jango"]
-}
+from app.functions.project_handler.project_types import PROJECT_TYPE_ALIASES, normalize_filename
 
 # Queue for communication between threads
 output_queue = queue.Queue()
@@ -30,11 +24,6 @@ def to_wsl_path(path):
         return path.replace('\\', '/')
     return path
 
-def normalize_filename(name):
-    """Normalize filename for comparison"""
-    # Removing special characters and converting to lowercase
-    return ''.join(e for e in name.lower() if e.isalnum()).strip()
-
 def normalize_project_type(project_type: str) -> str:
     """Normalize project type string to a standard format"""
     # Normalize and strip unnecessary spaces or special characters
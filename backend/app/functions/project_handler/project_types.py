@@ -0,0 +1,14 @@
+# Project types and name normalization, shared by the project handlers and the
+# intent rules without importing the handlers themselves.
+
+PROJECT_TYPE_ALIASES = {
+    "react": ["react", "react.js", "reactjs"],
+    "next": ["next", "next.js", "nextjs", "nextjs app"],
+    "flask": ["flask"],
+    "django": ["django", "jango"]
+}
+
+def normalize_filename(name):
+    """Normalize filename for comparison"""
+    # Removing special characters and converting to lowercase
+    return ''.join(e for e in name.lower() if e.isalnum()).strip()
@@ -4,10 +4,11 @@ import platform
 import subprocess
 import difflib
 
-from agno.models.groq import Groq
 from PyPDF2 import PdfReader
-from agno.agent import Agent, RunResponse
-from agno.utils.pprint import pprint_run_response
+
+# Also started as a script in its own terminal, so make the app package importable
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from app.models.llm_client import groq_client
 # from logger import logger
 indexed_files_cache = {}
 
@@ -57,17 +58,18 @@ def extract_text_from_pdf(path):
     reader = PdfReader(path)
     return "\n".join(page.extract_text() or "" for page in reader.pages)
 
-def get_agent() -> Agent:
-    return Agent(
-        model=Groq(id="llama-3.3-70b-versatile"),
-        description=(
-            "You are a PDF Summarizer that explains user queries from a given document. "
-            "Determine if the user query is brief/descriptive/small and answer aptly."
-        ),
-        markdown=True,
-    )
+SUMMARIZER_INSTRUCTIONS = (
+    "You are a PDF Summarizer that explains user queries from a given document. "
+    "Determine if the user query is brief/descriptive/small and answer aptly."
+)
 
-AGENT_MAIN = get_agent()
+def ask_document(doc_text, question):
+    messages = [
+        {"role": "system", "content": SUMMARIZER_INSTRUCTIONS},
+        {"role": "user", "content": f"Here is a document content:\n\n{doc_text}\n\nNow, {question}"},
+    ]
+    # Whole documents make for long prompts; allow more time than a command
+    return groq_client.chat_sync(messages, deadline=60.0)
 
 def summarizer(pdf_path):
     if is_wsl() and "\\" in pdf_path:
@@ -82,9 +84,7 @@ def summarizer(pdf_path):
         if question.lower() in ['exit', 'quit']:
             print("Exiting")
             break
-        full_prompt = f"Here is a document content:\n\n{pdf_text}\n\nNow, {question}"
-        response: RunResponse = AGENT_MAIN.run(full_prompt)
-        pprint_run_response(response, markdown=True)
+        print(ask_document(pdf_text, question))
 
 def fuzzy_search_file(stt_filename, search_path):
     """
@@ -0,0 +1,200 @@
+# Dispatches structured queries to handlers registered per (QueryType,
+# SubTaskType). Every handler has its own small thread pool, sized by its
+# concurrency class, so a two-minute project setup can never occupy the
+# workers that open apps and files.
+#
+#   registry = HandlerRegistry()
+#   registry.register(QueryType.APP_HANDLING, SubTaskType.OPEN_APP, lambda q: open_app(q.target), kind=INSTANT)
+#   future = registry.dispatch(structured_query)   # returns at once
+#
+# A deadline cannot stop a running thread; a handler that overruns it is
+# logged and counted, and a job still queued when its deadline passes is
+# dropped without running.
+#
+# Within a handler, jobs are ordered by the priority of the command that
+# queued them (app.scheduler): background jobs from the shared todo queue never
+# take the last worker of a handler, and instant handlers of interactive
+# commands go first.
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.scheduler import BACKGROUND, INSTANT as INSTANT_PRIORITY, INTERACTIVE, PriorityScheduler, current_priority
+
+logger = logging.getLogger("assistant")
+
+INSTANT = "instant"
+IO = "io"
+LONG = "long"
+
+# kind -> workers per handler, jobs allowed to wait, default deadline (seconds)
+KIND_DEFAULTS = {
+    INSTANT: {"max_workers": 2, "max_queue": 8, "deadline": 10.0},
+    IO: {"max_workers": 2, "max_queue": 8, "deadline": 60.0},
+    LONG: {"max_workers": 1, "max_queue": 2, "deadline": 600.0},
+}
+
+# Run times kept per handler for the percentiles
+RECENT_RUNS = 200
+
+
+class HandlerBusy(Exception):
+    """The handler's queue is full."""
+
+
+class Handler:
+    """
+    :param name: Used in logs and stats.
+    :param fn: Structured query -> anything.
+    :param kind: INSTANT, IO or LONG.
+    :param deadline: Seconds from dispatch until the job counts as overrun.
+    :param max_workers: Size of the handler's pool.
+    :param max_queue: Jobs allowed to wait for a worker, counted apart for background
+                      and other jobs; more are rejected.
+    """
+
+    def __init__(self, name, fn, kind=IO, deadline=None, max_workers=None, max_queue=None):
+        defaults = KIND_DEFAULTS[kind]
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.deadline = deadline or defaults["deadline"]
+        self.max_workers = max_workers or defaults["max_workers"]
+        self.max_queue = defaults["max_queue"] if max_queue is None else max_queue
+        # One worker is kept for interactive jobs when there are two or more
+        self.pool = PriorityScheduler(max_workers=self.max_workers, reserved=min(1, self.max_workers - 1),
+                                      name=f"handler-{name}")
+
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.queued_background = 0
+        self.running = 0
+        self.max_queued = 0
+        self.counters = collections.Counter()
+        self.run_times = collections.deque(maxlen=RECENT_RUNS)
+        self.wait_times = collections.deque(maxlen=RECENT_RUNS)
+
+    def submit(self, structured_query):
+        priority = current_priority.get()
+        if priority == INTERACTIVE and self.kind == INSTANT:
+            priority = INSTANT_PRIORITY
+        background = priority == BACKGROUND
+        with self._lock:
+            # Background jobs cannot fill the queue for interactive ones
+            waiting = self.queued_background if background else self.queued - self.queued_background
+            if waiting >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise HandlerBusy(f"{self.name}: {waiting} jobs already waiting")
+            self.queued += 1
+            self.queued_background += background
+            self.max_queued = max(self.max_queued, self.queued)
+            self.counters["submitted"] += 1
+
+        return self.pool.submit_at(priority, self._run, structured_query, time.monotonic(), background)
+
+    def _run(self, structured_query, submitted_at, background=False):
+        started = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.queued_background -= background
+            self.running += 1
+            self.wait_times.append(started - submitted_at)
+        remaining = self.deadline - (started - submitted_at)
+        if remaining <= 0:
+            with self._lock:
+                self.running -= 1
+                self.counters["expired"] += 1
+            logger.warning(f"[{self.name}] Dropped: waited {started - submitted_at:.1f}s, past its deadline")
+            return None
+
+        finished = threading.Event()
+        timer = threading.Timer(remaining, self._check_deadline, (finished,))
+        timer.daemon = True
+        timer.start()
+        try:
+            result = self.fn(structured_query)
+            self.counters["completed"] += 1
+            return result
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            finished.set()
+            timer.cancel()
+            with self._lock:
+                self.running -= 1
+                self.run_times.append(time.monotonic() - started)
+
+    def _check_deadline(self, finished):
+        if not finished.is_set():
+            self.counters["overran"] += 1
+            logger.warning(f"[{self.name}] Still running after its {self.deadline:g}s deadline")
+
+    def stats(self):
+        with self._lock:
+            run_times = np.array(self.run_times) * 1000
+            wait_times = np.array(self.wait_times) * 1000
+            return {
+                "kind": self.kind,
+                "deadline": self.deadline,
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "running": self.running,
+                **{key: self.counters[key] for key in
+                   ("submitted", "completed", "failed", "expired", "overran", "rejected")},
+                "p50_run_ms": float(np.percentile(run_times, 50)) if len(run_times) else None,
+                "p95_run_ms": float(np.percentile(run_times, 95)) if len(run_times) else None,
+                "p95_wait_ms": float(np.percentile(wait_times, 95)) if len(wait_times) else None,
+                "by_priority": self.pool.stats(),
+            }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class HandlerRegistry:
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, query_type, subtask, fn, kind=IO, deadline=None, max_workers=None, max_queue=None, name=None):
+        name = name or subtask.value.lower()
+        handler = Handler(name, fn, kind, deadline, max_workers, max_queue)
+        self._handlers[(query_type, subtask)] = handler
+        return handler
+
+    def handler_for(self, structured_query):
+        return self._handlers.get((structured_query.type, structured_query.subtask))
+
+    def dispatch(self, structured_query):
+        """
+        Queue the structured query on its handler's pool.
+
+        :return: Future of the handler's result; an already finished Future with None when
+                 nothing is registered (e.g. GENERAL_QUERY) or an exception when the handler is busy.
+        """
+        handler = self.handler_for(structured_query)
+        if handler is None:
+            future = Future()
+            future.set_result(None)
+            return future
+        try:
+            return handler.submit(structured_query)
+        except HandlerBusy as e:
+            logger.warning(str(e))
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def stats(self):
+        """Queue depth, counters and run/wait times per handler."""
+        return {handler.name: handler.stats() for handler in self._handlers.values()}
+
+    def shutdown(self):
+        for handler in self._handlers.values():
+            handler.shutdown()
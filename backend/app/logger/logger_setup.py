@@ -3,10 +3,11 @@ import sys
 import logging
 import os
 
-# Create a 'logs' directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
+from app.paths import REPO_ROOT
 
-LOG_FILE_PATH = "backend/ui/logs/assistant.log"
+# The UI tails this file; resolved from the repo, not the working directory
+LOG_FILE_PATH = os.path.join(REPO_ROOT, "backend", "ui", "logs", "assistant.log")
+os.makedirs(os.path.dirname(LOG_FILE_PATH), exist_ok=True)
 
 # Custom FileHandler that flushes immediately
 class FlushAfterWriteHandler(logging.FileHandler):
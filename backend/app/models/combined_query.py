@@ -0,0 +1,166 @@
+# Combined mode: one Groq call returns both the structured intent and the
+# butler's spoken reply, instead of a Groq call for the intent plus a Gemini
+# call for the acknowledgement. For GENERAL_QUERY the reply is the answer
+# itself, so the question is no longer answered twice.
+#
+# Both halves land in the existing caches (intent -> query cache, reply ->
+# response cache), so later hits need no call at all and the two modes can be
+# switched freely. The prompt follows QUERY_PROFILE, like the plain classifier,
+# since the intents are cached under the profile's version.
+#
+#   intent, reply = await cached_query_with_reply_async("open whatsapp")
+
+import json
+
+from pydantic import Field
+
+from app.models.query_types import QueryType
+from app.models.llm_client import groq_client
+from app.models.groq_preprocess import (
+    COMPACT_INSTRUCTIONS, QUERY_INSTRUCTIONS, QUERY_PROFILE, CompactQuery, QueryProcessor, boost_prompt,
+    learned_query, local_query, normalize_prompt, _cache_lookup, _cache_store, _with_path_hint, query_flight,
+)
+from app.tts.response_generator import (
+    PROMPT as BUTLER_PROMPT, EMPTY_REPLY, ERROR_REPLY, normalize, _cached_reply, _remember,
+)
+
+# Spoken when an intent comes from the rules, the classifier or the query cache and no reply was cached for it
+DEFAULT_REPLY = "Certainly, sir."
+
+
+SPOKEN_REPLY_DESCRIPTION = (
+    "What the assistant says out loud, in the butler persona.\n"
+    "- Commands: a short acknowledgement (e.g., 'At once, sir.').\n"
+    "- GENERAL_QUERY: the answer itself, in one or two spoken sentences."
+)
+
+
+class QueryWithReply(QueryProcessor):
+    spoken_reply: str = Field(..., description=SPOKEN_REPLY_DESCRIPTION)
+
+    def intent(self) -> QueryProcessor:
+        return QueryProcessor(**self.model_dump(exclude={"spoken_reply"}))
+
+
+class CompactQueryWithReply(CompactQuery):
+    spoken_reply: str
+
+
+COMBINED_SYSTEM_PROMPT = (
+    QUERY_INSTRUCTIONS
+    + "\nFor GENERAL_QUERY put a short answer in target and use GENERAL_QUERY as subtask.\n"
+    + "\nThe spoken_reply field is read aloud. Write it as this persona:\n"
+    + BUTLER_PROMPT
+    + "\n\nRespond only with a JSON object with the keys type, subtask, target, path and spoken_reply"
+    + " that follows this JSON schema:\n"
+    + json.dumps(QueryWithReply.model_json_schema())
+)
+
+COMPACT_COMBINED_SYSTEM_PROMPT = (
+    "Classify the voice command and reply to it. Respond only with JSON:"
+    " {\"type\": ..., \"subtask\": ..., \"target\": ..., \"spoken_reply\": ...}\n"
+    + COMPACT_INSTRUCTIONS
+    + "\nFor GENERAL_QUERY put a short answer in target.\n"
+    + "spoken_reply: " + SPOKEN_REPLY_DESCRIPTION
+    + "\nThe persona:\n"
+    + BUTLER_PROMPT
+)
+
+# QUERY_PROFILES counterpart: name -> (system prompt, response model)
+COMBINED_PROFILES = {
+    "full": (COMBINED_SYSTEM_PROMPT, QueryWithReply),
+    "compact": (COMPACT_COMBINED_SYSTEM_PROMPT, CompactQueryWithReply),
+}
+
+
+def _combined_messages(prompt: str, profile: str = None) -> list:
+    system_prompt, _ = COMBINED_PROFILES[profile or QUERY_PROFILE]
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": boost_prompt(prompt)},
+    ]
+
+
+def _from_response(prompt: str, response: dict, profile: str = None) -> QueryWithReply:
+    _, model = COMBINED_PROFILES[profile or QUERY_PROFILE]
+    parsed = model.model_validate(response)
+    result = parsed if isinstance(parsed, QueryWithReply) else QueryWithReply(**parsed.model_dump(), path="")
+    if result.type != QueryType.GENERAL_QUERY:
+        _with_path_hint(prompt, result)
+    else:
+        result.path = ""
+    return result
+
+
+def _fallback_reply(norm_text: str, intent: QueryProcessor) -> str:
+    cached = _cached_reply(norm_text)
+    if cached is not None:
+        return cached
+    return intent.target if intent.type == QueryType.GENERAL_QUERY else DEFAULT_REPLY
+
+
+def _store(normalized_prompt: str, norm_text: str, result: QueryWithReply):
+    intent = _cache_store(normalized_prompt, result.intent())
+    return intent, _remember(norm_text, result.spoken_reply.strip())
+
+
+def _query_with_reply_and_store(normalized_prompt: str, norm_text: str, prompt: str):
+    try:
+        result = _from_response(prompt, groq_client.chat_json_sync(_combined_messages(prompt)))
+    except Exception as e:
+        print(f"[ERROR] Combined query failed: {e}")
+        return None, ERROR_REPLY
+    return _store(normalized_prompt, norm_text, result)
+
+
+async def _query_with_reply_and_store_async(normalized_prompt: str, norm_text: str, prompt: str):
+    try:
+        result = _from_response(prompt, await groq_client.chat_json(_combined_messages(prompt)))
+    except Exception as e:
+        print(f"[ERROR] Combined query failed: {e}")
+        return None, ERROR_REPLY
+    return _store(normalized_prompt, norm_text, result)
+
+
+def _known(prompt: str):
+    """(intent, reply) without an LLM call, or None."""
+    intent = local_query(prompt)
+    normalized_prompt = normalize_prompt(prompt)
+    if intent is None:
+        intent = _cache_lookup(normalized_prompt)
+    if intent is None:
+        intent = learned_query(prompt)
+    if intent is None:
+        return None
+    return intent, _fallback_reply(normalize(prompt), intent)
+
+
+def cached_query_with_reply(prompt: str):
+    """
+    :return: (QueryProcessor or None on failure, spoken reply)
+    """
+    if not prompt.strip():
+        return None, EMPTY_REPLY
+
+    known = _known(prompt)
+    if known is not None:
+        return known
+
+    normalized_prompt = normalize_prompt(prompt)
+    # Keyed apart from plain queries, whose results carry no reply
+    return query_flight.do(f"reply:{normalized_prompt}", _query_with_reply_and_store,
+                           normalized_prompt, normalize(prompt), prompt)
+
+
+async def cached_query_with_reply_async(prompt: str):
+    """Same as cached_query_with_reply; cancelling the awaiting task aborts the Groq request."""
+    if not prompt.strip():
+        return None, EMPTY_REPLY
+
+    known = _known(prompt)
+    if known is not None:
+        return known
+
+    normalized_prompt = normalize_prompt(prompt)
+    return await query_flight.do_async(f"reply:{normalized_prompt}", _query_with_reply_and_store_async,
+                                       normalized_prompt, normalize(prompt), prompt)
@@ -0,0 +1,147 @@
+# Near-duplicate lookup for the query cache. STT hands us variants of the same
+# command ("please open whatsapp", "can you open whatsapp", "jarvis open
+# whatsapp"); this index finds the cached prompt such a variant matches so the
+# stored QueryProcessor can be served instead of calling Groq again.
+#
+# A candidate is only accepted when
+#   - the character trigram similarity of both prompts (filler words removed)
+#     is at least `threshold`,
+#   - every content word on either side has a close match on the other side
+#     ("summarise" ~ "summarize", but "close" !~ "open"), and
+#   - the cached target is still in the new prompt as whole words, so
+#     "clone portfolio2" never gets the result of "clone portfolio".
+
+import collections
+import difflib
+import re
+import threading
+
+FILLER_WORDS = {
+    "please", "kindly", "can", "could", "would", "will", "you", "hey", "ok", "okay",
+    "jarvis", "vision", "the", "a", "an", "my", "me", "for", "just", "now",
+    # Location words only shape the path hint, which is recomputed for every hit
+    "from", "in", "documents", "document", "downloads", "download", "drive", "c", "d",
+}
+# Parts of a target the user does not have to say ("Next.js" is "next")
+OPTIONAL_TARGET_WORDS = {"js", "pdf", "txt", "doc", "docx", "ppt", "pptx", "xls", "xlsx", "csv", "md"}
+
+DEFAULT_THRESHOLD = 0.8
+WORD_MATCH_RATIO = 0.75
+
+
+def content_words(text):
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in FILLER_WORDS]
+
+
+def trigrams(words):
+    joined = f" {' '.join(words)} "
+    return {joined[i:i + 3] for i in range(len(joined) - 2)}
+
+
+def trigram_similarity(a, b):
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _close_match(word, candidates):
+    if word in candidates:
+        return True
+    return any(difflib.SequenceMatcher(None, word, other).ratio() >= WORD_MATCH_RATIO for other in candidates)
+
+
+def words_align(words, other_words):
+    return all(_close_match(word, other_words) for word in words) and \
+        all(_close_match(word, words) for word in other_words)
+
+
+def target_intact(target, words):
+    """True if the target's words appear in `words`, contiguously (spoken together or apart)."""
+    target_words = [w for w in re.findall(r"[a-z0-9]+", target.lower()) if w not in OPTIONAL_TARGET_WORDS]
+    if not target_words:
+        return True
+    wanted = "".join(target_words)
+    for start in range(len(words)):
+        joined = ""
+        for word in words[start:]:
+            joined += word
+            if joined == wanted:
+                return True
+            if not wanted.startswith(joined):
+                break
+    return False
+
+
+class FuzzyIndex:
+    """
+    In-memory index over cached prompts.
+
+    :param threshold: Minimum trigram similarity for a candidate.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._entries = {}
+        self._by_word = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def add(self, prompt, target):
+        """
+        :param prompt: Normalized cached prompt (the cache key).
+        :param target: Target slot of the cached result.
+        """
+        words = content_words(prompt)
+        with self._lock:
+            self._entries[prompt] = (words, trigrams(words), target)
+            for word in words:
+                self._by_word[word].add(prompt)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _candidates(self, words):
+        # Prompts sharing at least one content word; misheard words still share the others
+        found = set()
+        for word in words:
+            found |= self._by_word.get(word, set())
+        return found
+
+    def find(self, prompt):
+        """
+        :return: (cached_prompt, similarity) for the best accepted match, or None.
+        """
+        words = content_words(prompt)
+        grams = trigrams(words)
+        best = None
+        rejected = False
+        with self._lock:
+            for key in self._candidates(words):
+                cached_words, cached_grams, target = self._entries[key]
+                score = trigram_similarity(grams, cached_grams)
+                if score < self.threshold or (best and score <= best[1]):
+                    continue
+                if not words_align(words, cached_words) or not target_intact(target, words):
+                    rejected = True
+                    continue
+                best = (key, score)
+
+        self.counters["lookups"] += 1
+        if best:
+            self.counters["hits"] += 1
+        elif rejected:
+            self.counters["rejected"] += 1
+        return best
+
+    def stats(self):
+        lookups = self.counters["lookups"]
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hits": self.counters["hits"],
+            # candidates above the threshold that failed the word/target checks
+            "rejected": self.counters["rejected"],
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
@@ -2,19 +2,33 @@
 # query_type, sub_query, path, target
 
 from enum import Enum
-from typing import Iterator
 from pydantic import BaseModel, Field
-from agno.agent import Agent, RunResponse
-from agno.models.groq import Groq
 from pathlib import Path
 import platform
 import os
 import getpass
-import diskcache
 import re
+import json
+import threading
+import collections
+import time
 # from query_types import QueryType, SubTaskType
 from app.models.query_types import QueryType,SubTaskType
-cache = diskcache.Cache(".query_cache")
+from app.models.intent_rules import match_intent
+from app.models import intent_classifier
+from app.models.fuzzy_cache import FuzzyIndex
+from app.models.query_cache import QueryCache, schema_fingerprint
+from app.paths import REPO_ROOT
+from app.single_flight import SingleFlight
+from app.models.llm_client import groq_client
+
+# Near-duplicate prompts ("please open whatsapp") are served from the cache too
+FUZZY_THRESHOLD = float(os.getenv("QUERY_CACHE_FUZZY_THRESHOLD", "0.8"))
+_fuzzy_index = None
+_fuzzy_index_lock = threading.Lock()
+cache_counters = collections.Counter()
+# Concurrent misses for the same prompt (voice + shared queue) share one Groq call
+query_flight = SingleFlight("query")
 
 
 class QueryProcessor(BaseModel):
@@ -78,6 +92,14 @@ class QueryProcessor(BaseModel):
         )
     )
 
+# Bump when the agent prompt changes; QueryProcessor/QueryType changes are picked up by the fingerprint
+PROMPT_VERSION = 2
+# Classifier prompt in use (see QUERY_PROFILES); QUERY_PROFILE=full restores the long prompt
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "compact")
+# Each profile caches under its own version, so switching profiles never serves the other prompt's results
+cache = QueryCache(os.path.join(REPO_ROOT, ".query_cache"), QueryProcessor,
+                   version=f"{PROMPT_VERSION}.{QUERY_PROFILE}.{schema_fingerprint(QueryProcessor)}")
+
 def boost_prompt(prompt: str) -> str:
     summarizer_keywords = [
         "summarize", "answer from", "explain from", "read from", "understand from", 
@@ -119,22 +141,22 @@ def boost_prompt(prompt: str) -> str:
     
     return prompt
 
+DOCUMENTS_PATH = "C:\\Users\\km866\\OneDrive\\Documents\\Documents"
+DOWNLOADS_PATH = "C:\\Users\\km866\\Downloads"
+
 def extract_path_hint(prompt: str, query_type: QueryType, subtask: SubTaskType) -> str:
     prompt_lower = prompt.lower()
     username = getpass.getuser()
-    
-    documents_path = f"C:\\Users\\km866\\OneDrive\\Documents\\Documents"
-    downloads_path = f"C:\\Users\\km866\\Downloads"
 
     # Rule 1: If "downloads" or "documents" is mentioned
     if "downloads" in prompt_lower:
-        return downloads_path
+        return DOWNLOADS_PATH
     if "documents" in prompt_lower:
-        return documents_path
+        return DOCUMENTS_PATH
 
     # Rule 2: Based on query type
     if query_type == QueryType.FILE_HANDLING:
-        return documents_path
+        return DOCUMENTS_PATH
 
     if query_type in [QueryType.GITHUB_ACTIONS, QueryType.CREATE_PROJECT]:
         drive = "D:\\" if "d drive" in prompt_lower else "C:\\"
@@ -152,68 +174,321 @@ def extract_path_hint(prompt: str, query_type: QueryType, subtask: SubTaskType)
     return "C:\\"  
 
 
-def get_agent() -> Agent:
-    return Agent(
-        model=Groq(id="llama-3.3-70b-versatile"),
-        description=(
-            "You are a smart query processor. Translate natural language queries into structured fields: type, subtask, target, and path.\n"
-            "- Default to C:\\Users\\km866\\OneDrive\\Documents\\Documents\\ for FILE_HANDLING.\n"
-            "- Downloads path is mentioned C:\\Users\\km866\\Downloads"
-            "- Use D:\\ (fallback C:\\) for GITHUB_ACTIONS/PROJECT_SETUP.\n"
-            "- Use 'new_folder' or extracted name if creating something new.\n"
-            "- Use proper Windows-style absolute paths with capital drive letters.\n"
-            "- Extract and preserve file extensions (.pdf, .txt, etc.).\n"
-            "- Be accurate with subtask classification.\n"
-            "- If user asks to Setup a project return SETUP_PROJECT as subtask type"
-            "- IF user asks to Create a project return CREATE_PROJECT as substask type"
-            "Mapping of query types and subtasks:"
-                "- FILE_HANDLING: (SEARCH_FILE, OPEN_FILE, CLOSE_FILE).\n"
-                "- GITHUB_ACTIONS: (LIST_REPOS, CLONE_REPO, PUSH_REPO)\n"
-                "- CREATE_PROJECT: (CREATE_PROJECT)\n"
-                "- SETUP_PROJECT: (SETUP_PROJECT)\n"
-                "- APP_HANDLING:(OPEN_APP, CLOSE_APP)\n"
-                "- SUMMARIZER : (SUMMARIZE)\n"
-                "- GENERAL_QUERY :(GENERAL_QUERY)\n"
-        ),
-        markdown=True,
-        response_model=QueryProcessor,
+QUERY_INSTRUCTIONS = (
+    "You are a smart query processor. Translate natural language queries into structured fields: type, subtask, target, and path.\n"
+    "- Default to C:\\Users\\km866\\OneDrive\\Documents\\Documents\\ for FILE_HANDLING.\n"
+    "- Downloads path is mentioned C:\\Users\\km866\\Downloads"
+    "- Use D:\\ (fallback C:\\) for GITHUB_ACTIONS/PROJECT_SETUP.\n"
+    "- Use 'new_folder' or extracted name if creating something new.\n"
+    "- Use proper Windows-style absolute paths with capital drive letters.\n"
+    "- Extract and preserve file extensions (.pdf, .txt, etc.).\n"
+    "- Be accurate with subtask classification.\n"
+    "- If user asks to Setup a project return SETUP_PROJECT as subtask type"
+    "- IF user asks to Create a project return CREATE_PROJECT as substask type"
+    "Mapping of query types and subtasks:"
+        "- FILE_HANDLING: (SEARCH_FILE, OPEN_FILE, CLOSE_FILE).\n"
+        "- GITHUB_ACTIONS: (LIST_REPOS, CLONE_REPO, PUSH_REPO)\n"
+        "- CREATE_PROJECT: (CREATE_PROJECT)\n"
+        "- SETUP_PROJECT: (SETUP_PROJECT)\n"
+        "- APP_HANDLING:(OPEN_APP, CLOSE_APP)\n"
+        "- SUMMARIZER : (SUMMARIZE)\n"
+        "- GENERAL_QUERY :(GENERAL_QUERY)\n"
+)
+
+# Groq JSON mode only guarantees valid JSON, so the schema goes into the system prompt
+QUERY_SYSTEM_PROMPT = (
+    QUERY_INSTRUCTIONS
+    + "\nRespond only with a JSON object with the keys type, subtask, target and path that follows this JSON schema:\n"
+    + json.dumps(QueryProcessor.model_json_schema())
+)
+
+# Compact profile: no path (extract_path_hint overwrites it anyway) and no field
+# descriptions, which cuts the prompt to a fraction of the full one
+class CompactQuery(BaseModel):
+    type: QueryType
+    subtask: SubTaskType
+    target: str
+
+# Types, subtasks and target rules, shared with the combined mode's compact prompt
+COMPACT_INSTRUCTIONS = (
+    "type: subtasks\n"
+    "GITHUB_ACTIONS: LIST_REPOS, CLONE_REPO, PUSH_REPO\n"
+    "SETUP_PROJECT: SETUP_PROJECT (existing project)\n"
+    "CREATE_PROJECT: CREATE_PROJECT (new project)\n"
+    "FILE_HANDLING: SEARCH_FILE, OPEN_FILE, CLOSE_FILE\n"
+    "APP_HANDLING: OPEN_APP, CLOSE_APP\n"
+    "SUMMARIZER: SUMMARIZE (summarize or answer from a document)\n"
+    "GENERAL_QUERY: GENERAL_QUERY\n"
+    "target: file name with extension, app name, repo name, or project type/name; \"\" if none."
+)
+
+COMPACT_SYSTEM_PROMPT = (
+    "Classify the voice command. Respond only with JSON: {\"type\": ..., \"subtask\": ..., \"target\": ...}\n"
+    + COMPACT_INSTRUCTIONS
+)
+
+# name -> (system prompt, response model)
+QUERY_PROFILES = {
+    "full": (QUERY_SYSTEM_PROMPT, QueryProcessor),
+    "compact": (COMPACT_SYSTEM_PROMPT, CompactQuery),
+}
+profile_counters = {name: collections.Counter() for name in QUERY_PROFILES}
+
+def _query_messages(boosted_prompt: str, profile: str = None) -> list:
+    system_prompt, _ = QUERY_PROFILES[profile or QUERY_PROFILE]
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": boosted_prompt},
+    ]
+
+def _parse_query(response: dict, profile: str) -> QueryProcessor:
+    _, model = QUERY_PROFILES[profile]
+    parsed = model.model_validate(response)
+    if isinstance(parsed, QueryProcessor):
+        return parsed
+    return QueryProcessor(**parsed.model_dump(), path="")
+
+def _record_profile(profile: str, usage: dict, started: float):
+    counters = profile_counters[profile]
+    counters["calls"] += 1
+    counters["prompt_tokens"] += usage.get("prompt_tokens", 0)
+    counters["completion_tokens"] += usage.get("completion_tokens", 0)
+    counters["latency_ms"] += (time.perf_counter() - started) * 1000
+
+def query_profile_report() -> dict:
+    """Prompt size, and average tokens and latency of the classifier calls made so far, per profile."""
+    report = {}
+    for name, (system_prompt, _) in QUERY_PROFILES.items():
+        counters = profile_counters[name]
+        calls = counters["calls"]
+        report[name] = {
+            "active": name == QUERY_PROFILE,
+            "system_prompt_chars": len(system_prompt),
+            "calls": calls,
+            "avg_prompt_tokens": counters["prompt_tokens"] / calls if calls else None,
+            "avg_completion_tokens": counters["completion_tokens"] / calls if calls else None,
+            "avg_latency_ms": counters["latency_ms"] / calls if calls else None,
+        }
+    return report
+
+def _general_messages(boosted_prompt: str) -> list:
+    return [{"role": "user", "content": boosted_prompt.replace("[TASK:GENERAL_QUERY] ", "")}]
+
+def is_general_query(prompt: str) -> bool:
+    """True if the prompt is routed to the general answer (decided locally, no LLM call)."""
+    return "[TASK:GENERAL_QUERY]" in boost_prompt(prompt)
+
+def _general_query_result(answer: str) -> QueryProcessor:
+    return QueryProcessor(
+        type=QueryType.GENERAL_QUERY,
+        subtask=SubTaskType.GENERAL_QUERY,
+        target=answer.strip(),
+        path=""
     )
 
-    
-# Move this outside for reuse
-AGENT_MAIN = get_agent()
-AGENT_GENERAL = Agent(model=Groq(id="llama-3.3-70b-versatile"))
+def _with_path_hint(prompt: str, query_obj: QueryProcessor) -> QueryProcessor:
+    query_obj.path = extract_path_hint(prompt, query_obj.type, query_obj.subtask)
+    return query_obj
+
+# Formulaic commands are resolved locally in microseconds; returns None if the LLM is needed
+def local_query(prompt: str):
+    intent = match_intent(prompt)
+    if intent is None:
+        return None
+    query_obj = QueryProcessor(type=intent.type, subtask=intent.subtask, target=intent.target, path="")
+    return _with_path_hint(prompt, query_obj)
+
+# Phrasings the rules miss but the classifier trained on the cache knows; not cached
+# (the cache is its training data, and should only hold LLM labels)
+def learned_query(prompt: str):
+    intent = intent_classifier.learned_intent(prompt)
+    if intent is None:
+        return None
+    query_obj = QueryProcessor(type=intent.type, subtask=intent.subtask, target=intent.target, path="")
+    return _with_path_hint(prompt, query_obj)
+
+def refresh_intent_model(force: bool = False):
+    """Retrain the learned classifier on the cache if it is stale (see intent_classifier.retrain_if_stale)."""
+    return intent_classifier.retrain_if_stale(lambda: list(cache.items()), force)
+
+# The classifier is retrained when the cache changes, never on the wake path: every
+# MIN_NEW_EXAMPLES new LLM labels, a background thread checks whether it is stale
+_labels_since_check = 0
+_labels_lock = threading.Lock()
+_retraining = threading.Lock()
+
+def _note_new_label():
+    global _labels_since_check
+    with _labels_lock:
+        _labels_since_check += 1
+        if _labels_since_check < intent_classifier.MIN_NEW_EXAMPLES:
+            return
+        _labels_since_check = 0
+    if _retraining.acquire(blocking=False):
+        threading.Thread(target=_retrain_in_background, name="intent-retrain", daemon=True).start()
+
+def _retrain_in_background():
+    try:
+        refresh_intent_model()
+    except Exception as e:
+        print(f"[INTENT MODEL] Retrain failed: {e}")
+    finally:
+        _retraining.release()
 
 def process_query(prompt: str) -> QueryProcessor:
+    return local_query(prompt) or learned_query(prompt) or _llm_query(prompt)
+
+async def process_query_async(prompt: str) -> QueryProcessor:
+    """Same as process_query, but cancelling the awaiting task aborts the Groq request."""
+    return local_query(prompt) or learned_query(prompt) or await _llm_query_async(prompt)
+
+def _llm_query(prompt: str, profile: str = None) -> QueryProcessor:
     boosted_prompt = boost_prompt(prompt)
 
     if "[TASK:GENERAL_QUERY]" in boosted_prompt:
-        general_response = AGENT_GENERAL.run(boosted_prompt.replace("[TASK:GENERAL_QUERY] ", ""), stream=False)
-        return QueryProcessor(
-            type=QueryType.GENERAL_QUERY,
-            subtask=SubTaskType.GENERAL_QUERY,
-            target=general_response.content.strip(),
-            path=""
-        )
-    
-    response = AGENT_MAIN.run(boosted_prompt, stream=False)
-    query_obj = response.content
-    path_hint = extract_path_hint(prompt, query_obj.type, query_obj.subtask)
-    query_obj.path = path_hint
-    return query_obj
-    # return response.content
+        return _general_query_result(groq_client.chat_sync(_general_messages(boosted_prompt)))
 
-def cached_process_query(prompt: str) -> QueryProcessor:
-    normalized_prompt = " ".join(prompt.strip().lower().split())
+    profile = profile or QUERY_PROFILE
+    usage = {}
+    started = time.perf_counter()
+    response = groq_client.chat_json_sync(_query_messages(boosted_prompt, profile), usage=usage)
+    _record_profile(profile, usage, started)
+    return _with_path_hint(prompt, _parse_query(response, profile))
+
+async def _llm_query_async(prompt: str, profile: str = None) -> QueryProcessor:
+    boosted_prompt = boost_prompt(prompt)
+
+    if "[TASK:GENERAL_QUERY]" in boosted_prompt:
+        return _general_query_result(await groq_client.chat(_general_messages(boosted_prompt)))
+
+    profile = profile or QUERY_PROFILE
+    usage = {}
+    started = time.perf_counter()
+    response = await groq_client.chat_json(_query_messages(boosted_prompt, profile), usage=usage)
+    _record_profile(profile, usage, started)
+    return _with_path_hint(prompt, _parse_query(response, profile))
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.strip().lower().split())
+
+def use_query_cache(directory: str) -> QueryCache:
+    """Switch to another cache directory (replays and benchmarks use a scratch one)."""
+    global cache, _fuzzy_index
+    with _fuzzy_index_lock:
+        cache = QueryCache(directory, QueryProcessor, version=cache.version)
+        _fuzzy_index = None
+    return cache
 
-    if normalized_prompt in cache:
+def get_fuzzy_index() -> FuzzyIndex:
+    """Index over the cached prompts, built from the cache keys on first use."""
+    global _fuzzy_index
+    with _fuzzy_index_lock:
+        if _fuzzy_index is None:
+            index = FuzzyIndex(FUZZY_THRESHOLD)
+            for prompt, result in cache.items():
+                # General answers are not commands; a similar question is a different question
+                if result.type != QueryType.GENERAL_QUERY:
+                    index.add(prompt, result.target)
+            _fuzzy_index = index
+    return _fuzzy_index
+
+def _cache_lookup(normalized_prompt: str):
+    cached = cache.get(normalized_prompt)
+    if cached is not None:
+        cache_counters["exact_hits"] += 1
         print("[CACHE HIT]")
-        print(cache[normalized_prompt])
-        return cache[normalized_prompt]
-    else:
-        print("[CACHE MISS]")
+        print(cached)
+        return cached
+
+    match = get_fuzzy_index().find(normalized_prompt)
+    if match is not None:
+        cached = cache.get(match[0])
+        if cached is not None:
+            cache_counters["fuzzy_hits"] += 1
+            print(f"[CACHE FUZZY HIT] '{match[0]}' ({match[1]:.2f})")
+            # Same intent and target, but the path hint comes from what was said now
+            return _with_path_hint(normalized_prompt, cached.model_copy())
+
+    cache_counters["misses"] += 1
+    print("[CACHE MISS]")
+    return None
 
-    result = process_query(prompt)
-    cache[normalized_prompt] = result
+def _cache_store(normalized_prompt: str, result: QueryProcessor) -> QueryProcessor:
+    stored = cache.set(normalized_prompt, result)
+    if stored and result.type != QueryType.GENERAL_QUERY:
+        get_fuzzy_index().add(normalized_prompt, result.target)
+        _note_new_label()
     print(result)
     return result
+
+def _query_and_store(normalized_prompt: str, prompt: str) -> QueryProcessor:
+    return _cache_store(normalized_prompt, _llm_query(prompt))
+
+async def _query_and_store_async(normalized_prompt: str, prompt: str) -> QueryProcessor:
+    return _cache_store(normalized_prompt, await _llm_query_async(prompt))
+
+async def stream_general_answer(prompt: str):
+    """
+    Yield the answer to a general question as Groq generates it, so speech can start
+    with the first sentence. The complete answer is cached like a process_query result.
+    """
+    normalized_prompt = normalize_prompt(prompt)
+    cached = _cache_lookup(normalized_prompt)
+    if cached is not None:
+        yield cached.target
+        return
+
+    parts = []
+    async for chunk in groq_client.stream_chat(_general_messages(boost_prompt(prompt))):
+        parts.append(chunk)
+        yield chunk
+    _cache_store(normalized_prompt, _general_query_result("".join(parts)))
+
+def query_cache_stats() -> dict:
+    """Exact/fuzzy hit counters, plus entries, size and policy of every cache shard."""
+    lookups = sum(cache_counters[k] for k in ("exact_hits", "fuzzy_hits", "misses"))
+    return {
+        "lookups": lookups,
+        "exact_hits": cache_counters["exact_hits"],
+        "fuzzy_hits": cache_counters["fuzzy_hits"],
+        "misses": cache_counters["misses"],
+        "hit_rate": (cache_counters["exact_hits"] + cache_counters["fuzzy_hits"]) / lookups if lookups else 0.0,
+        "fuzzy": get_fuzzy_index().stats(),
+        "store": cache.stats(),
+        "single_flight": query_flight.stats(),
+        "profiles": query_profile_report(),
+        "learned": intent_classifier.learned_stats(),
+    }
+
+# Local rules come first, so only LLM answers are cached
+def cached_process_query(prompt: str) -> QueryProcessor:
+    local = local_query(prompt)
+    if local is not None:
+        return local
+
+    normalized_prompt = normalize_prompt(prompt)
+    cached = _cache_lookup(normalized_prompt)
+    if cached is not None:
+        return cached
+
+    learned = learned_query(prompt)
+    if learned is not None:
+        return learned
+
+    return query_flight.do(normalized_prompt, _query_and_store, normalized_prompt, prompt)
+
+async def cached_process_query_async(prompt: str) -> QueryProcessor:
+    local = local_query(prompt)
+    if local is not None:
+        return local
+
+    normalized_prompt = normalize_prompt(prompt)
+    cached = _cache_lookup(normalized_prompt)
+    if cached is not None:
+        return cached
+
+    learned = learned_query(prompt)
+    if learned is not None:
+        return learned
+
+    return await query_flight.do_async(normalized_prompt, _query_and_store_async, normalized_prompt, prompt)
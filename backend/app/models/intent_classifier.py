@@ -0,0 +1,345 @@
+# Learned local intent classifier, trained on the query cache: every cached
+# (prompt -> QueryProcessor) pair is an example labelled by the LLM. It covers
+# the phrasings the rules in intent_rules.py do not, in well under a
+# millisecond, and only answers when it is confident; everything else still
+# goes to Groq.
+#
+# Features are hashed character n-grams with TF-IDF weights; the model is a
+# softmax regression over "TYPE/SUBTASK" labels, trained with NumPy. The target
+# is the part of the prompt that is not a carrier word ("open", "the", "from",
+# ...) for the predicted label, as learned from the training targets.
+#
+# Usage (from backend/):
+#   python -m app.models.intent_classifier              # train on the query cache, save the artifact
+#   python -m app.models.intent_classifier --eval       # hold-out accuracy and coverage first
+#   python -m app.models.intent_classifier --corpus fixtures/query_corpus.jsonl --eval
+
+import argparse
+import collections
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from app.models.fuzzy_cache import FILLER_WORDS
+from app.models.intent_rules import FILE_TYPES, LocalIntent
+from app.models.query_types import QueryType, SubTaskType
+from app.paths import REPO_ROOT
+
+MODEL_PATH = os.getenv("INTENT_MODEL_PATH", os.path.join(REPO_ROOT, ".query_cache", "intent_model.npz"))
+DIM = 2 ** 13
+NGRAMS = (2, 3, 4)
+# Predictions below this probability go to the LLM
+MIN_CONFIDENCE = 0.9
+MIN_EXAMPLES = 20
+# Retrain when the model is older than this and the cache grew by MIN_NEW_EXAMPLES
+RETRAIN_INTERVAL = 24 * 3600
+MIN_NEW_EXAMPLES = 25
+
+FILE_TYPE_WORDS = set(FILE_TYPES.replace("?", "").split("|")) | {"doc", "ppt", "xls"}
+TARGET_TYPES = (QueryType.FILE_HANDLING.value, QueryType.SUMMARIZER.value)
+# Never part of a target, whatever the label
+NON_TARGET_WORDS = FILLER_WORDS | {"named", "called", "of", "on", "to", "with"}
+
+
+def words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def ngram_indices(prompt):
+    text = f" {' '.join(words(prompt))} "
+    grams = [text[i:i + n] for n in NGRAMS for i in range(len(text) - n + 1)]
+    return np.array([zlib.crc32(gram.encode("utf-8")) % DIM for gram in grams], dtype=np.int64)
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentModel:
+    """
+    :param weights: (DIM, classes) float32.
+    :param bias: (classes,) float32.
+    :param idf: (DIM,) float32 inverse document frequencies.
+    :param classes: "TYPE/SUBTASK" label per column.
+    :param carriers: label -> words that are not part of the target.
+    :param trained_on: Number of training examples.
+    :param trained_at: Unix time of training.
+    """
+
+    def __init__(self, weights, bias, idf, classes, carriers, trained_on=0, trained_at=0.0):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.classes = list(classes)
+        self.carriers = {label: set(found) for label, found in carriers.items()}
+        self.trained_on = trained_on
+        self.trained_at = trained_at
+
+    # === Features === #
+
+    def _sparse_features(self, prompt):
+        indices, counts = np.unique(ngram_indices(prompt), return_counts=True)
+        values = np.log1p(counts).astype(np.float32) * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+
+    # === Inference === #
+
+    def predict(self, prompt):
+        """:return: (label, probability)"""
+        indices, values = self._sparse_features(prompt)
+        probabilities = _softmax(values @ self.weights[indices] + self.bias)
+        best = int(probabilities.argmax())
+        return self.classes[best], float(probabilities[best])
+
+    def extract_target(self, prompt, label):
+        carriers = self.carriers.get(label, set()) | NON_TARGET_WORDS
+        prompt_words = words(prompt)
+        target = " ".join(w for w in prompt_words if w not in carriers and w not in FILE_TYPE_WORDS)
+        if label.split("/")[0] in TARGET_TYPES:
+            extension = next((w for w in prompt_words if w in FILE_TYPE_WORDS), None)
+            if target and extension:
+                target = f"{target}.{extension}"
+        return target
+
+    def classify(self, prompt, min_confidence=MIN_CONFIDENCE):
+        """:return: LocalIntent, or None when unsure or when the LLM has to answer (GENERAL_QUERY)."""
+        label, probability = self.predict(prompt)
+        if probability < min_confidence:
+            return None
+        query_type, subtask = label.split("/")
+        if query_type == QueryType.GENERAL_QUERY.value:
+            return None
+        target = self.extract_target(prompt, label)
+        if not target and subtask != SubTaskType.LIST_REPOS.value:
+            return None
+        return LocalIntent("learned", QueryType(query_type), SubTaskType(subtask), target, probability)
+
+    # === Training === #
+
+    @classmethod
+    def train(cls, pairs, epochs=300, learning_rate=4.0, l2=1e-4):
+        """
+        :param pairs: (prompt, result) with result.type, result.subtask and result.target (QueryProcessor).
+        """
+        prompts, labels, targets = [], [], []
+        for prompt, result in pairs:
+            prompts.append(prompt)
+            labels.append(f"{result.type.value}/{result.subtask.value}")
+            targets.append(result.target)
+
+        classes = sorted(set(labels))
+        y = np.array([classes.index(label) for label in labels])
+        counts = np.zeros((len(prompts), DIM), dtype=np.float32)
+        for row, prompt in enumerate(prompts):
+            np.add.at(counts[row], ngram_indices(prompt), 1)
+
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = (np.log((1 + len(prompts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        features = np.log1p(counts) * idf
+        features /= np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+
+        one_hot = np.eye(len(classes), dtype=np.float32)[y]
+        weights = np.zeros((DIM, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            error = _softmax(features @ weights + bias) - one_hot
+            weights -= learning_rate * (features.T @ error / len(prompts) + l2 * weights)
+            bias -= learning_rate * error.mean(axis=0)
+
+        return cls(weights, bias, idf, classes, cls._learn_carriers(prompts, labels, targets),
+                   trained_on=len(prompts), trained_at=time.time())
+
+    @staticmethod
+    def _learn_carriers(prompts, labels, targets):
+        # A word is a carrier for a label if it is mostly outside the target
+        seen = collections.defaultdict(collections.Counter)
+        outside = collections.defaultdict(collections.Counter)
+        for prompt, label, target in zip(prompts, labels, targets):
+            target_words = set(words(target))
+            for word in set(words(prompt)):
+                seen[label][word] += 1
+                if word not in target_words:
+                    outside[label][word] += 1
+        return {
+            label: sorted(word for word, count in counts.items() if outside[label][word] / count > 0.5)
+            for label, counts in seen.items()
+        }
+
+    # === Artifact === #
+
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {
+            "classes": self.classes,
+            "carriers": {label: sorted(found) for label, found in self.carriers.items()},
+            "trained_on": self.trained_on,
+            "trained_at": self.trained_at,
+            "dim": DIM,
+            "ngrams": NGRAMS,
+        }
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, weights=self.weights, bias=self.bias, idf=self.idf, meta=json.dumps(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["dim"] != DIM or tuple(meta["ngrams"]) != NGRAMS:
+                raise ValueError("artifact was trained with other features")
+            return cls(data["weights"], data["bias"], data["idf"], meta["classes"], meta["carriers"],
+                       meta["trained_on"], meta["trained_at"])
+
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+_counters = collections.Counter()
+
+
+def get_model():
+    """The artifact at MODEL_PATH, loaded once; None if there is none (yet)."""
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            try:
+                _model = IntentModel.load(MODEL_PATH)
+            except FileNotFoundError:
+                _model = None
+            except Exception as e:
+                print(f"[INTENT MODEL] Ignoring {MODEL_PATH}: {e}")
+                _model = None
+    return _model
+
+
+def learned_intent(prompt, min_confidence=MIN_CONFIDENCE):
+    """:return: LocalIntent from the learned model, or None."""
+    model = get_model()
+    if model is None:
+        return None
+    intent = model.classify(prompt, min_confidence)
+    _counters["total"] += 1
+    if intent is not None:
+        _counters["handled"] += 1
+        print(f"[LEARNED] {intent.type.value}/{intent.subtask.value} ({intent.confidence:.2f})")
+    return intent
+
+
+def retrain_if_stale(load_pairs, force=False):
+    """
+    Retrain and save the model when it is older than RETRAIN_INTERVAL and the
+    cache gained MIN_NEW_EXAMPLES since (or when there is no model yet).
+
+    :param load_pairs: Callable returning the (prompt, result) training pairs.
+    :return: The new model, or None if nothing was retrained.
+    """
+    global _model, _model_loaded
+    model = get_model()
+    if not force and model is not None and time.time() - model.trained_at < RETRAIN_INTERVAL:
+        return None
+    pairs = list(load_pairs())
+    if len(pairs) < MIN_EXAMPLES:
+        return None
+    if not force and model is not None and len(pairs) - model.trained_on < MIN_NEW_EXAMPLES:
+        return None
+
+    new_model = IntentModel.train(pairs)
+    new_model.save(MODEL_PATH)
+    with _model_lock:
+        _model, _model_loaded = new_model, True
+    print(f"[INTENT MODEL] Retrained on {len(pairs)} examples")
+    return new_model
+
+
+def learned_stats():
+    model = get_model()
+    total = _counters["total"]
+    return {
+        "model": None if model is None else {"examples": model.trained_on, "classes": len(model.classes),
+                                             "trained_at": model.trained_at},
+        "total": total,
+        "handled": _counters["handled"],
+        "coverage": _counters["handled"] / total if total else 0.0,
+    }
+
+
+# === Evaluation === #
+
+def _same(intent, result):
+    return intent.type == result.type and intent.subtask == result.subtask and \
+        "".join(words(intent.target.split(".")[0])) == "".join(words(result.target.split(".")[0]))
+
+
+def evaluate(pairs, min_confidence=MIN_CONFIDENCE, holdout=0.2, seed=0):
+    """Train on part of the pairs and measure the rest."""
+    pairs = list(pairs)
+    order = np.random.default_rng(seed).permutation(len(pairs))
+    split = max(1, int(len(pairs) * holdout))
+    test = [pairs[i] for i in order[:split]]
+    model = IntentModel.train([pairs[i] for i in order[split:]])
+
+    label_hits, answered, correct, seconds = 0, 0, 0, []
+    for prompt, result in test:
+        started = time.perf_counter()
+        label, _ = model.predict(prompt)
+        intent = model.classify(prompt, min_confidence)
+        seconds.append(time.perf_counter() - started)
+        label_hits += label == f"{result.type.value}/{result.subtask.value}"
+        if intent is not None:
+            answered += 1
+            correct += _same(intent, result)
+    return {
+        "train": len(pairs) - len(test),
+        "test": len(test),
+        "label_accuracy": label_hits / len(test),
+        "coverage": answered / len(test),
+        "precision": correct / answered if answered else None,
+        "p95_us": float(np.percentile(np.array(seconds) * 1e6, 95)),
+    }
+
+
+def _corpus_pairs(path):
+    from app.models.groq_preprocess import QueryProcessor
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [(r["prompt"], QueryProcessor(**r["intent"], path="")) for r in records if r.get("intent")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier on cached LLM results.")
+    parser.add_argument("--corpus", help="train on a replay corpus (JSONL with intents) instead of the query cache")
+    parser.add_argument("--eval", action="store_true", help="report hold-out accuracy and coverage first")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    parser.add_argument("--no-save", action="store_true", help="do not write the artifact")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pairs = _corpus_pairs(args.corpus)
+    else:
+        from app.models.groq_preprocess import cache
+        pairs = list(cache.items())
+    if len(pairs) < MIN_EXAMPLES:
+        parser.error(f"only {len(pairs)} examples; need at least {MIN_EXAMPLES}")
+
+    if args.eval:
+        print(json.dumps(evaluate(pairs, args.min_confidence), indent=2))
+
+    model = IntentModel.train(pairs)
+    if not args.no_save:
+        model.save(MODEL_PATH)
+        print(f"Saved {MODEL_PATH}: {len(pairs)} examples, {len(model.classes)} classes, "
+              f"{os.path.getsize(MODEL_PATH) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
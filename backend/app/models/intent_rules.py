@@ -0,0 +1,236 @@
+# Local fast path for the query processor: formulaic commands ("open whatsapp",
+# "list my repos", "clone the repo portfolio", "create a new react project") are
+# resolved with compiled patterns and the app/repo/project tables, without a
+# Groq round trip. Anything ambiguous returns None and goes to the LLM.
+#
+#   intent = match_intent("open whatsapp")   # LocalIntent or None
+#   print(fast_path_stats())                 # share of traffic handled locally
+
+import collections
+import os
+import re
+import threading
+
+from app.functions.app_handling import desktop_apps, uwp_apps
+from app.functions.github_handler import load_repo_list, to_wsl_path
+from app.functions.project_handler.project_types import PROJECT_TYPE_ALIASES, normalize_filename
+from app.models.query_types import QueryType, SubTaskType
+
+LocalIntent = collections.namedtuple("LocalIntent", "rule type subtask target confidence")
+
+# Results below this confidence are left to the LLM
+MIN_CONFIDENCE = 0.85
+
+# Where query_processor creates, sets up and pushes projects
+PROJECTS_DIR = "D://va_projects"
+
+# Spoken names that differ from the keys of the app tables
+APP_ALIASES = {
+    "vs code": "code",
+    "vscode": "code",
+    "visual studio code": "code",
+    "file explorer": "explorer",
+    "files": "explorer",
+    "microsoft edge": "edge",
+    "google chrome": "chrome",
+    "docker desktop": "docker",
+    "power point": "powerpoint",
+    "windows terminal": "terminal",
+    "whats app": "whatsapp",
+}
+
+FILE_TYPES = r"pdf|txt|docx?|pptx?|xlsx?|csv|md"
+LOCATION = r"(?: (?:from|in) (?:my |the )?(?:documents?|downloads?)(?: folder)?)?"
+
+LIST_REPOS = re.compile(
+    r"^(?:list|show|get|fetch)(?: me)?(?: all)?(?: of)?(?: my| the)?(?: github| git hub)? repo(?:s|sitories)(?: on github)?$"
+)
+CLONE_REPO = re.compile(r"^clone(?: the| my)?(?: github)?(?: repo(?:sitory)?)? (?P<target>[\w.\- ]+?)(?: repo(?:sitory)?)?$")
+PUSH_REPO = re.compile(
+    r"^push(?: the| my)?(?: project| folder| repo(?:sitory)?)? (?P<target>[\w.\- ]+?) to (?:github|git hub)$"
+)
+APP = re.compile(
+    r"^(?P<verb>open|launch|start|run|close|quit|exit|kill)(?: the| my)? (?P<target>[\w.\- ]+?)(?: app(?:lication)?)?$"
+)
+OPEN_FILE = re.compile(
+    rf"^open(?: the| my)?(?: (?P<type_before>{FILE_TYPES})(?: file)?)? (?P<target>[\w\-/\\]+)"
+    rf"(?:\.(?P<ext>{FILE_TYPES})| (?P<type_after>{FILE_TYPES})(?: file)?)?{LOCATION}$"
+)
+SUMMARIZE = re.compile(
+    rf"^(?:from (?:my |the )?(?:documents?|downloads?) )?"
+    rf"summari[sz]e(?: the| my)?(?: (?P<type_before>{FILE_TYPES})(?: file)?)? (?P<target>[\w\- ]+?)"
+    rf"(?:\.(?P<ext>{FILE_TYPES})| (?P<type_after>{FILE_TYPES})(?: file)?)?{LOCATION}$"
+)
+CREATE_PROJECT = re.compile(r"^(?:create|start|generate|build|make)(?: me)?(?: a| an)?(?: new)? (?P<target>[\w.\- ]+?) (?:project|app)$")
+SETUP_PROJECT = re.compile(r"^(?:set ?up|configure|initialize)(?: the| my)?(?: project)? (?P<target>[\w.\-]+)$")
+# Setup and push targets that name no project ("set up the project", "push my folder to github")
+GENERIC_TARGETS = {"project", "folder", "repo", "repository", "it", "this", "that"}
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.handled = 0
+        self.by_rule = collections.Counter()
+
+    def record(self, rule):
+        with self.lock:
+            self.total += 1
+            if rule is not None:
+                self.handled += 1
+                self.by_rule[rule] += 1
+
+
+_stats = _Stats()
+_known_repos = None
+_known_projects = None
+
+
+def _key(name):
+    return normalize_filename(name)
+
+
+def known_repos():
+    """Normalized repo name -> repo name, from github_repos.json (loaded once)."""
+    global _known_repos
+    if _known_repos is None:
+        repos = load_repo_list()
+        _known_repos = {_key(repo["name"]): repo["name"] for repo in repos} if isinstance(repos, list) else {}
+    return _known_repos
+
+
+def known_projects():
+    """Normalized folder name -> folder name, for the folders in PROJECTS_DIR (listed once)."""
+    global _known_projects
+    if _known_projects is None:
+        try:
+            entries = os.scandir(to_wsl_path(PROJECTS_DIR))
+        except OSError:
+            entries = []
+        _known_projects = {_key(entry.name): entry.name for entry in entries if entry.is_dir()}
+    return _known_projects
+
+
+def refresh_known_targets():
+    """
+    Re-read github_repos.json and PROJECTS_DIR on the next lookup (e.g. after
+    list_github_repos rewrote the file or a project was created).
+    """
+    global _known_repos, _known_projects
+    _known_repos = None
+    _known_projects = None
+
+
+def _app_name(spoken):
+    spoken = APP_ALIASES.get(spoken, spoken)
+    if spoken in uwp_apps or spoken in desktop_apps:
+        return spoken
+    compact = spoken.replace(" ", "")
+    if compact in uwp_apps or compact in desktop_apps:
+        return compact
+    return None
+
+
+def _project_type(spoken):
+    spoken = _key(spoken)
+    for standard, aliases in PROJECT_TYPE_ALIASES.items():
+        if spoken in (_key(alias) for alias in aliases):
+            return standard
+    return None
+
+
+def _file_name(match):
+    target = match.group("target").strip()
+    ext = match.group("ext") or match.group("type_after") or match.group("type_before")
+    return f"{target}.{ext}" if ext else target
+
+
+def _file_confidence(name):
+    """
+    A bare name ("open spotify", "summarize linux paper") is as likely a website, an
+    app missing from the tables or a free-form request; only an extension or a path
+    makes it a file.
+    """
+    return 0.9 if "." in name or "/" in name or "\\" in name else 0.5
+
+
+def _match(text):
+    """
+    :return: LocalIntent fields as a tuple, or None.
+    """
+    if LIST_REPOS.match(text):
+        return "list_repos", QueryType.GITHUB_ACTIONS, SubTaskType.LIST_REPOS, "", 1.0
+
+    m = PUSH_REPO.match(text)
+    if m:
+        # Pushing creates a public repo from a fuzzy-matched folder, so only a folder
+        # that exists is safe; misheard or generic names go to the LLM
+        target = m.group("target")
+        project = None if target in GENERIC_TARGETS else known_projects().get(_key(target))
+        return "push_repo", QueryType.GITHUB_ACTIONS, SubTaskType.PUSH_REPO, project or target, 0.95 if project else 0.5
+
+    m = CLONE_REPO.match(text)
+    if m:
+        repo = known_repos().get(_key(m.group("target")))
+        # Unknown names may be misheard; the LLM (and fuzzy search) get those
+        return "clone_repo", QueryType.GITHUB_ACTIONS, SubTaskType.CLONE_REPO, repo or m.group("target"), 1.0 if repo else 0.6
+
+    m = APP.match(text)
+    if m:
+        app = _app_name(m.group("target"))
+        if app:
+            closing = m.group("verb") in ("close", "quit", "exit", "kill")
+            subtask = SubTaskType.CLOSE_APP if closing else SubTaskType.OPEN_APP
+            return "app", QueryType.APP_HANDLING, subtask, app, 1.0
+
+    m = SUMMARIZE.match(text)
+    if m:
+        name = _file_name(m)
+        return "summarize", QueryType.SUMMARIZER, SubTaskType.SUMMARIZE, name, _file_confidence(name)
+
+    m = OPEN_FILE.match(text)
+    if m and not _app_name(m.group("target")):
+        name = _file_name(m)
+        return "open_file", QueryType.FILE_HANDLING, SubTaskType.OPEN_FILE, name, _file_confidence(name)
+
+    m = CREATE_PROJECT.match(text)
+    if m:
+        project_type = _project_type(m.group("target"))
+        if project_type:
+            return "create_project", QueryType.CREATE_PROJECT, SubTaskType.CREATE_PROJECT, project_type, 1.0
+
+    m = SETUP_PROJECT.match(text)
+    if m and m.group("target") not in GENERIC_TARGETS and not _project_type(m.group("target")):
+        return "setup_project", QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT, m.group("target"), 0.9
+
+    return None
+
+
+def match_intent(prompt: str, min_confidence: float = MIN_CONFIDENCE):
+    """
+    Resolve a command without the LLM. Every call counts towards fast_path_stats.
+
+    :return: LocalIntent, or None when no rule is confident enough.
+    """
+    text = " ".join(prompt.strip().lower().strip(".!?").split())
+    result = _match(text)
+    if result is None or result[4] < min_confidence:
+        _stats.record(None)
+        return None
+
+    intent = LocalIntent(*result)
+    _stats.record(intent.rule)
+    print(f"[FAST PATH] {intent.rule} ({intent.confidence:.2f})")
+    return intent
+
+
+def fast_path_stats():
+    """How much of the traffic the local rules resolved."""
+    with _stats.lock:
+        return {
+            "total": _stats.total,
+            "handled": _stats.handled,
+            "coverage": _stats.handled / _stats.total if _stats.total else 0.0,
+            "by_rule": dict(_stats.by_rule),
+        }
@@ -0,0 +1,318 @@
+# Async HTTP clients for the LLM providers (Groq's OpenAI-compatible API and
+# the Gemini REST API).
+#
+# All requests run on one background event loop that owns pooled keep-alive
+# connections (httpx.AsyncClient), so every caller reuses warm TLS sessions no
+# matter which thread or loop it comes from. Each call has a deadline that
+# covers all of its retries; 429/5xx responses and connection errors are retried
+# with exponential backoff and full jitter.
+#
+#   text = await groq_client.chat(messages)                 # from a coroutine (cancellable)
+#   text = groq_client.chat_sync(messages)                  # from a thread
+#   data = groq_client.chat_json_sync(messages)             # JSON mode, parsed
+#   async for chunk in groq_client.stream_chat(messages):   # tokens as they are generated
+#   text = gemini_client.generate_sync(prompt, system=PROMPT)
+#
+# GROQ_BASE_URL / GEMINI_BASE_URL point the clients elsewhere, e.g. at a local
+# fake server in tests.
+
+import asyncio
+import json
+import os
+import random
+import threading
+from concurrent.futures import wait
+
+import httpx
+
+DEFAULT_DEADLINE = 15.0
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMTimeout(LLMError):
+    pass
+
+
+class _BackgroundLoop:
+    """An event loop on a daemon thread, started on first use."""
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True).start()
+            return self._loop
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_background = _BackgroundLoop()
+
+
+def run_sync(coro):
+    """Run a coroutine on the client loop and block for its result (for thread callers)."""
+    return _background.submit(coro).result()
+
+
+async def run_on_client_loop(coro):
+    """Await a coroutine on the client loop from any other loop; cancelling the caller cancels the request."""
+    if asyncio.get_running_loop() is _background.loop:
+        return await coro
+    return await asyncio.wrap_future(_background.submit(coro))
+
+
+async def stream_on_client_loop(agen):
+    """Iterate an async generator on the client loop from any other loop; closing or cancelling the caller stops it."""
+    loop = asyncio.get_running_loop()
+    if loop is _background.loop:
+        async for item in agen:
+            yield item
+        return
+
+    queue = asyncio.Queue()
+
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            pass  # the consuming loop is gone
+
+    async def pump():
+        try:
+            async for item in agen:
+                put(item)
+        except Exception as e:
+            put(None, e)
+        else:
+            put(None, StopAsyncIteration())
+
+    future = _background.submit(pump())
+    try:
+        while True:
+            item, error = await queue.get()
+            if isinstance(error, StopAsyncIteration):
+                return
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        future.cancel()
+
+
+class AsyncLLMClient:
+    """
+    Shared plumbing: pooled connections, deadlines and retries.
+
+    :param base_url: API root.
+    :param max_connections: Connection pool size.
+    :param keepalive_expiry: Seconds an idle connection is kept open.
+    :param deadline: Default seconds per call, retries included.
+    :param max_attempts: Attempts per call.
+    :param backoff: Base backoff in seconds (doubled per attempt, full jitter).
+    :param transport: httpx transport to send requests through (e.g. httpx.MockTransport in tests).
+    """
+
+    def __init__(self, base_url, max_connections=10, keepalive_expiry=60.0,
+                 deadline=DEFAULT_DEADLINE, max_attempts=3, backoff=0.25, transport=None):
+        self.base_url = base_url
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.transport = transport
+        self._client = None
+
+    def _http(self):
+        # Created lazily on the client loop, which then owns its connections
+        # (and after the entry point has loaded the .env files with the keys)
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, headers=self._auth_headers(), limits=self.limits,
+                                             timeout=httpx.Timeout(self.deadline, connect=5.0),
+                                             transport=self.transport)
+        return self._client
+
+    def _auth_headers(self):
+        return {}
+
+    async def _request(self, path, payload, deadline=None, stream=False):
+        """POST with retries. With `stream` the deadline covers the response headers only and the
+        caller must close the returned response."""
+        deadline = deadline or self.deadline
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        last_error = None
+
+        for attempt in range(self.max_attempts):
+            remaining = give_up_at - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self._http().build_request("POST", path, json=payload)
+                response = await asyncio.wait_for(self._http().send(request, stream=stream), remaining)
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                last_error = LLMTimeout(f"{self.base_url}{path} timed out after {deadline:.1f}s")
+                break
+            except httpx.TransportError as e:
+                last_error = LLMError(f"{self.base_url}{path}: {e}")
+            else:
+                if response.status_code < 400:
+                    return response
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+                last_error = LLMError(f"{self.base_url}{path}: HTTP {response.status_code} {response.text[:200]}")
+                if response.status_code not in RETRY_STATUSES:
+                    break
+
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if loop.time() + delay >= give_up_at:
+                break
+            await asyncio.sleep(delay)
+
+        raise last_error or LLMTimeout(f"{self.base_url}{path} timed out after {deadline:.1f}s")
+
+    async def _post_json(self, path, payload, deadline=None):
+        return (await self._request(path, payload, deadline)).json()
+
+    async def warm_up(self):
+        """Open a pooled connection ahead of the first real request."""
+        try:
+            await self._http().head("/", timeout=5.0)
+        except httpx.HTTPError:
+            pass
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def use_base_url(self, base_url):
+        """Send further requests to another API root (e.g. a fake server); drops the pooled connections."""
+        run_sync(self.aclose())
+        self.base_url = base_url
+
+
+class GroqClient(AsyncLLMClient):
+    """Groq chat completions (OpenAI-compatible)."""
+
+    def __init__(self, model="llama-3.3-70b-versatile", base_url=None, api_key=None, **kwargs):
+        super().__init__(base_url or os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"), **kwargs)
+        self.model = model
+        self.api_key = api_key
+
+    def _auth_headers(self):
+        api_key = self.api_key or os.getenv("GROQ_API_KEY")
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    async def _chat(self, messages, model=None, deadline=None, json_mode=False, usage=None, **options):
+        """:param usage: Optional dict that receives the token counts Groq reports."""
+        payload = {"model": model or self.model, "messages": messages, **options}
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        data = await self._post_json("/chat/completions", payload, deadline)
+        if usage is not None:
+            usage.update(data.get("usage") or {})
+        try:
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"Unexpected Groq response: {str(data)[:200]}")
+
+    async def _stream_chat(self, messages, model=None, deadline=None, **options):
+        payload = {"model": model or self.model, "messages": messages, "stream": True, **options}
+        response = await self._request("/chat/completions", payload, deadline, stream=True)
+        try:
+            # Server-sent events: "data: {chunk}" lines, then "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(data)["choices"][0]["delta"].get("content")
+                except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                    raise LLMError(f"Unexpected Groq stream chunk: {data[:200]}")
+                if delta:
+                    yield delta
+        except httpx.TimeoutException:
+            raise LLMTimeout(f"{self.base_url}/chat/completions stream stalled")
+        except httpx.TransportError as e:
+            raise LLMError(f"{self.base_url}/chat/completions stream: {e}")
+        finally:
+            await response.aclose()
+
+    async def _chat_json(self, messages, **kwargs):
+        content = await self._chat(messages, json_mode=True, **kwargs)
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            raise LLMError(f"Groq returned invalid JSON: {content[:200]}")
+
+    async def chat(self, messages, **kwargs):
+        return await run_on_client_loop(self._chat(messages, **kwargs))
+
+    async def chat_json(self, messages, **kwargs):
+        return await run_on_client_loop(self._chat_json(messages, **kwargs))
+
+    async def stream_chat(self, messages, **kwargs):
+        """Yield the reply in pieces as Groq generates it."""
+        async for chunk in stream_on_client_loop(self._stream_chat(messages, **kwargs)):
+            yield chunk
+
+    def chat_sync(self, messages, **kwargs):
+        return run_sync(self._chat(messages, **kwargs))
+
+    def chat_json_sync(self, messages, **kwargs):
+        return run_sync(self._chat_json(messages, **kwargs))
+
+
+class GeminiClient(AsyncLLMClient):
+    """Gemini generateContent over REST."""
+
+    def __init__(self, model="gemini-2.0-flash", base_url=None, api_key=None, **kwargs):
+        super().__init__(base_url or os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+                         **kwargs)
+        self.model = model
+        self.api_key = api_key
+
+    def _auth_headers(self):
+        api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+        return {"x-goog-api-key": api_key} if api_key else {}
+
+    async def _generate(self, prompt, system=None, model=None, deadline=None):
+        payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        data = await self._post_json(f"/models/{model or self.model}:generateContent", payload, deadline)
+        try:
+            return "".join(part.get("text", "") for part in data["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"Unexpected Gemini response: {str(data)[:200]}")
+
+    async def generate(self, prompt, **kwargs):
+        return await run_on_client_loop(self._generate(prompt, **kwargs))
+
+    def generate_sync(self, prompt, **kwargs):
+        return run_sync(self._generate(prompt, **kwargs))
+
+
+# Shared instances; import these rather than creating new pools
+groq_client = GroqClient()
+gemini_client = GeminiClient()
+
+
+def warm_up_connections(timeout=5.0):
+    """Open a pooled connection to every provider, concurrently; blocks for at most `timeout`."""
+    futures = [_background.submit(client.warm_up()) for client in (groq_client, gemini_client)]
+    wait(futures, timeout=timeout)
@@ -0,0 +1,259 @@
+# Compound commands: "open chrome and whatsapp and clone my portfolio repo" is
+# split into one clause per command, every clause is classified through the
+# usual chain (rules -> cache -> learned -> Groq) concurrently, and the intents
+# come back as steps:
+#
+#   steps = await cached_process_queries_async("open chrome and whatsapp then clone portfolio")
+#   # [[open_app chrome, open_app whatsapp], [clone_repo portfolio]]
+#
+# Intents within a step are independent and dispatched together; a step starts
+# once the previous one finished. "then"/"after that" and clauses referring
+# back ("and set it up") begin a new step. Prompts that are not clearly a list
+# of commands stay one clause, so a single command behaves exactly as before.
+
+import asyncio
+import collections
+import re
+
+from app.models.query_types import QueryType, SubTaskType
+from app.models.intent_rules import _app_name, _key, known_repos
+from app.models.groq_preprocess import cached_process_query_async, is_general_query
+from app.models.combined_query import cached_query_with_reply_async
+from app.models.llm_client import run_sync
+from app.tts.response_generator import EMPTY_REPLY, ERROR_REPLY, normalize, _cached_reply
+
+# First words that start a new command
+COMMAND_VERBS = {
+    "open", "launch", "start", "run", "close", "quit", "exit", "kill",
+    "clone", "push", "list", "show", "fetch",
+    "summarize", "summarise", "create", "generate", "build", "make",
+    "set", "setup", "configure", "initialize", "search", "find",
+}
+# Verbs carried over to a bare name: "open chrome and whatsapp"
+APP_VERBS = {"open", "launch", "start", "run", "close", "quit", "exit", "kill"}
+FILE_NAME = re.compile(r"^[\w\-]+\.\w{2,4}$")
+# Words that make a clause depend on the one before it
+BACK_REFERENCES = {"it", "them", "that", "this", "there"}
+
+# Separator, and whether it orders the clauses ("then", "after that")
+SEPARATOR = re.compile(r"\s*(?:,|;|\band\b|\bthen\b|\bafter that\b|\balso\b)(?:\s*(?:,|\band\b|\bthen\b|\bafter that\b|\balso\b))*\s*")
+SEQUENCE_WORDS = re.compile(r"\bthen\b|\bafter that\b")
+
+split_counters = collections.Counter()
+
+
+class Clause:
+    def __init__(self, text, new_step):
+        self.text = text
+        self.new_step = new_step
+
+    def __repr__(self):
+        return f"Clause({self.text!r}, new_step={self.new_step})"
+
+
+def _carries(verb, text):
+    """True if a bare name after `verb` is a second object of it (a known app, file or repo)."""
+    if len(text.split()) > 3:
+        return False
+    if verb in APP_VERBS:
+        return bool(_app_name(text) or FILE_NAME.match(text))
+    if verb == "clone":
+        return _key(text) in known_repos()
+    return False
+
+
+def _clauses(text):
+    parts = SEPARATOR.split(text)
+    separators = SEPARATOR.findall(text)
+    clauses = []
+    verb = None
+    for part, separator in zip(parts, [""] + separators):
+        if not part:
+            continue
+        words = part.split()
+        ordered = bool(SEQUENCE_WORDS.search(separator))
+        if words[0] in COMMAND_VERBS:
+            verb = words[0]
+            refers_back = bool(BACK_REFERENCES.intersection(words[1:]))
+            clauses.append(Clause(part, new_step=ordered or refers_back))
+        elif clauses and _carries(verb, part):
+            clauses.append(Clause(f"{verb} {part}", new_step=ordered))
+        elif clauses:
+            # Not a command of its own ("create a flask and react project")
+            clauses[-1].text += separator if separator.strip() in (",", ";") else f" {separator.strip()} "
+            clauses[-1].text += part
+        else:
+            return None
+    return clauses
+
+
+def split_commands(prompt: str) -> list:
+    """
+    :return: Steps of clauses, e.g. [["open chrome", "open whatsapp"], ["clone portfolio"]];
+             [[prompt]] when the prompt is a single command or a question.
+    """
+    split_counters["commands"] += 1
+    text = " ".join(prompt.strip().lower().strip(".!?").split())
+    if not text or is_general_query(prompt):
+        return [[prompt]]
+
+    clauses = _clauses(text)
+    if not clauses or len(clauses) < 2:
+        return [[prompt]]
+
+    split_counters["compound"] += 1
+    split_counters["clauses"] += len(clauses)
+    steps = []
+    for clause in clauses:
+        if clause.new_step or not steps:
+            steps.append([])
+        steps[-1].append(clause.text)
+    print(f"[MULTI INTENT] {steps}")
+    return steps
+
+
+def _resolve_back_references(steps):
+    """
+    A clause like "set it up" acts on the target of the command before it.
+
+    :param steps: Steps of (clause, intent) pairs.
+    :return: Steps of intents. Only a target that is a back-reference word the clause
+             actually said is replaced; an empty target (LIST_REPOS) stays empty.
+    """
+    resolved = []
+    previous = None
+    for step in steps:
+        intents = []
+        for clause, intent in step:
+            target = intent.target.strip().lower()
+            if previous is not None and target in BACK_REFERENCES and target in clause.lower().split():
+                # Copied, the intent may be the cached one
+                intent = intent.model_copy(update={"target": previous.target})
+            intents.append(intent)
+        previous = intents[-1]
+        resolved.append(intents)
+    return resolved
+
+
+async def _classify_clauses(steps):
+    clauses = [clause for step in steps for clause in step]
+    results = await asyncio.gather(*(cached_process_query_async(clause) for clause in clauses),
+                                   return_exceptions=True)
+    intents = iter(results)
+    classified = []
+    for step in steps:
+        step_intents = []
+        for clause in step:
+            result = next(intents)
+            if isinstance(result, Exception):
+                print(f"[ERROR] Could not classify '{clause}': {result}")
+                continue
+            step_intents.append((clause, result))
+        if step_intents:
+            classified.append(step_intents)
+    if not classified:
+        raise next(result for result in results if isinstance(result, Exception))
+    return _resolve_back_references(classified)
+
+
+async def cached_process_queries_async(prompt: str) -> list:
+    """
+    Classify every command in the prompt; clauses that need Groq are sent concurrently,
+    so a compound command costs about one round trip.
+
+    :return: Steps of QueryProcessor results (see split_commands).
+    """
+    steps = split_commands(prompt)
+    if len(steps) == 1 and len(steps[0]) == 1:
+        return [[await cached_process_query_async(steps[0][0])]]
+    return await _classify_clauses(steps)
+
+
+def cached_process_queries(prompt: str) -> list:
+    """Same as cached_process_queries_async, for thread callers."""
+    return run_sync(cached_process_queries_async(prompt))
+
+
+# subtask -> what the acknowledgement says it is doing
+ACTIONS = {
+    SubTaskType.OPEN_APP: "opening {}",
+    SubTaskType.CLOSE_APP: "closing {}",
+    SubTaskType.OPEN_FILE: "opening {}",
+    SubTaskType.SEARCH_FILE: "searching for {}",
+    SubTaskType.CLOSE_FILE: "closing {}",
+    SubTaskType.CLONE_REPO: "cloning {}",
+    SubTaskType.PUSH_REPO: "pushing {} to GitHub",
+    SubTaskType.LIST_REPOS: "listing your repositories",
+    SubTaskType.CREATE_PROJECT: "creating a new {} project",
+    SubTaskType.SETUP_PROJECT: "setting up {}",
+    SubTaskType.SUMMARIZE: "summarizing {}",
+}
+
+
+def _join(items):
+    if len(items) < 2:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+def acknowledge(steps) -> str:
+    """
+    One spoken reply for all the intents, built locally:
+    "Very well, sir. Opening chrome and whatsapp, then cloning portfolio."
+    """
+    phrases, answers = [], []
+    for step in steps:
+        # Consecutive intents with the same action share the verb
+        groups = []
+        for intent in step:
+            if intent.type == QueryType.GENERAL_QUERY:
+                answers.append(intent.target)
+            elif groups and groups[-1][0] == intent.subtask:
+                if intent.target not in groups[-1][1]:
+                    groups[-1][1].append(intent.target)
+            else:
+                groups.append((intent.subtask, [intent.target]))
+        actions = [ACTIONS.get(subtask, "{}").format(_join(targets)) for subtask, targets in groups]
+        if actions:
+            phrases.append(_join(actions))
+
+    reply = "Very well, sir."
+    if phrases:
+        said = ", then ".join(phrases)
+        reply += f" {said[0].upper()}{said[1:]}."
+    if answers:
+        reply += " " + " ".join(answers)
+    return reply
+
+
+async def cached_queries_with_reply_async(prompt: str):
+    """
+    Combined mode for compound commands: the clauses are classified concurrently and
+    acknowledged in one reply, without a separate reply call.
+
+    :return: (steps of QueryProcessor results or None on failure, spoken reply)
+    """
+    if not prompt.strip():
+        return None, EMPTY_REPLY
+
+    steps = split_commands(prompt)
+    if len(steps) == 1 and len(steps[0]) == 1:
+        intent, reply = await cached_query_with_reply_async(prompt)
+        return ([[intent]] if intent is not None else None), reply
+
+    try:
+        intents = await _classify_clauses(steps)
+    except Exception as e:
+        print(f"[ERROR] Compound query failed: {e}")
+        return None, ERROR_REPLY
+    return intents, _cached_reply(normalize(prompt)) or acknowledge(intents)
+
+
+def multi_intent_stats() -> dict:
+    """How many commands were split, and into how many clauses."""
+    compound = split_counters["compound"]
+    return {
+        "commands": split_counters["commands"],
+        "compound": compound,
+        "avg_clauses": split_counters["clauses"] / compound if compound else None,
+    }
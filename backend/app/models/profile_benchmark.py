@@ -0,0 +1,117 @@
+# Compares the classifier prompt profiles (full vs compact) on real Groq calls:
+# prompt/completion tokens, latency, and how often each profile agrees with the
+# full one on type, subtask and target.
+#
+# Usage (from backend/):
+#   python -m app.models.profile_benchmark "open whatsapp" "clone the repo portfolio"
+#   python -m app.models.profile_benchmark --from-cache 30
+#
+# --from-cache takes command prompts from the query cache (general questions
+# are skipped; they never reach the classifier).
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.models.groq_preprocess import (
+    QUERY_PROFILES, boost_prompt, cache, is_general_query, _parse_query, _query_messages,
+)
+from app.models.llm_client import groq_client
+from app.models.query_types import QueryType
+
+
+def cached_prompts(limit):
+    prompts = []
+    for prompt, result in cache.items():
+        if result.type != QueryType.GENERAL_QUERY and not is_general_query(prompt):
+            prompts.append(prompt)
+        if len(prompts) >= limit:
+            break
+    return prompts
+
+
+def run_profile(profile, prompts):
+    """:return: per prompt (result or None, usage, seconds)"""
+    runs = []
+    for prompt in prompts:
+        usage = {}
+        started = time.perf_counter()
+        try:
+            response = groq_client.chat_json_sync(_query_messages(boost_prompt(prompt), profile), usage=usage)
+            result = _parse_query(response, profile)
+        except Exception as e:
+            print(f"[{profile}] {prompt!r} failed: {e}")
+            result = None
+        runs.append((result, usage, time.perf_counter() - started))
+    return runs
+
+
+def _same_intent(a, b):
+    return a is not None and b is not None and \
+        (a.type, a.subtask, a.target.lower()) == (b.type, b.subtask, b.target.lower())
+
+
+def benchmark(prompts, profiles=None):
+    profiles = profiles or list(QUERY_PROFILES)
+    runs = {profile: run_profile(profile, prompts) for profile in profiles}
+    reference = runs.get("full")
+
+    report = {}
+    for profile, profile_runs in runs.items():
+        latencies = [seconds for result, _, seconds in profile_runs if result is not None]
+        prompt_tokens = [usage.get("prompt_tokens", 0) for _, usage, _ in profile_runs]
+        completion_tokens = [usage.get("completion_tokens", 0) for _, usage, _ in profile_runs]
+        agreement = None
+        if reference is not None:
+            agreement = sum(_same_intent(run[0], ref[0]) for run, ref in zip(profile_runs, reference)) / len(prompts)
+        report[profile] = {
+            "prompts": len(prompts),
+            "failures": len(prompts) - len(latencies),
+            "system_prompt_chars": len(QUERY_PROFILES[profile][0]),
+            "mean_prompt_tokens": float(np.mean(prompt_tokens)),
+            "mean_completion_tokens": float(np.mean(completion_tokens)),
+            "p50_latency_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+            "p95_latency_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+            "agreement_with_full": agreement,
+        }
+    return report
+
+
+def print_report(report):
+    def fmt(value):
+        return "-" if value is None else f"{value:8.1f}"
+
+    print(f"{'profile':<10}{'chars':>8}{'in tok':>9}{'out tok':>9}{'p50 ms':>10}{'p95 ms':>10}{'agree':>8}{'failed':>8}")
+    for name, row in report.items():
+        agreement = "-" if row["agreement_with_full"] is None else f"{row['agreement_with_full']:.0%}"
+        print(f"{name:<10}{row['system_prompt_chars']:>8}{row['mean_prompt_tokens']:>9.0f}"
+              f"{row['mean_completion_tokens']:>9.0f}{fmt(row['p50_latency_ms']):>10}"
+              f"{fmt(row['p95_latency_ms']):>10}{agreement:>8}{row['failures']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare token use and latency of the classifier prompt profiles.")
+    parser.add_argument("prompts", nargs="*", help="commands to classify")
+    parser.add_argument("--from-cache", type=int, default=0, help="also use N command prompts from the query cache")
+    parser.add_argument("--profile", action="append", choices=list(QUERY_PROFILES),
+                        help="profiles to run (default: all)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    prompts = list(args.prompts)
+    if args.from_cache:
+        prompts.extend(cached_prompts(args.from_cache))
+    if not prompts:
+        parser.error("no prompts given; pass commands or --from-cache N")
+
+    report = benchmark(prompts, args.profile)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Persistent cache of query processor results, with a policy per QueryType.
+#
+# Each QueryType gets its own diskcache shard (`.query_cache/<TYPE>/`) with a
+# TTL, a size limit and an eviction policy, so stale GENERAL_QUERY answers
+# expire within minutes while "open whatsapp" stays cached for weeks. A small
+# index shard maps a prompt to the shard holding its result.
+#
+# Keys carry a version (`v<version>:<prompt>`): when the prompt or the
+# QueryProcessor/QueryType schema changes, old entries simply stop matching
+# and age out. Values are compact JSON instead of pickles, and a value that no
+# longer validates against the model is dropped instead of raising.
+
+import collections
+import hashlib
+import json
+import os
+import re
+import threading
+
+import diskcache
+
+MB = 1024 * 1024
+DAY = 24 * 3600
+
+# ttl: seconds (None = no expiry, 0 = never stored); size_limit: bytes on disk
+DEFAULT_POLICIES = {
+    "GENERAL_QUERY": {"ttl": 15 * 60, "size_limit": 2 * MB, "eviction_policy": "least-recently-stored"},
+    "GITHUB_ACTIONS": {"ttl": 7 * DAY, "size_limit": 2 * MB, "eviction_policy": "least-recently-used"},
+    "APP_HANDLING": {"ttl": 30 * DAY, "size_limit": 1 * MB, "eviction_policy": "least-recently-used"},
+    "FILE_HANDLING": {"ttl": 30 * DAY, "size_limit": 2 * MB, "eviction_policy": "least-recently-used"},
+    "SUMMARIZER": {"ttl": 30 * DAY, "size_limit": 2 * MB, "eviction_policy": "least-recently-used"},
+    "CREATE_PROJECT": {"ttl": 30 * DAY, "size_limit": 1 * MB, "eviction_policy": "least-recently-used"},
+    "SETUP_PROJECT": {"ttl": 30 * DAY, "size_limit": 1 * MB, "eviction_policy": "least-recently-used"},
+}
+DEFAULT_POLICY = {"ttl": 7 * DAY, "size_limit": 1 * MB, "eviction_policy": "least-recently-used"}
+
+# Answers to these are out of date as soon as they are given
+VOLATILE_PATTERN = re.compile(r"\b(weather|current|currently|today|tonight|now|latest|news|time in|score)\b")
+
+INDEX_SHARD = "_index"
+INDEX_POLICY = {"size_limit": 4 * MB, "eviction_policy": "least-recently-stored"}
+
+
+def schema_fingerprint(model):
+    """Short hash of a pydantic model's JSON schema (field names, enum values, descriptions)."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha1(schema.encode("utf-8")).hexdigest()[:8]
+
+
+class QueryCache:
+    """
+    :param directory: Cache root; shards live in sub-directories.
+    :param model: Pydantic model stored in the cache (QueryProcessor).
+    :param version: Key version; entries written under another version are ignored.
+    :param policies: QueryType value -> {"ttl", "size_limit", "eviction_policy"}.
+    """
+
+    def __init__(self, directory, model, version, policies=None):
+        self.directory = directory
+        self.model = model
+        self.version = version
+        self.prefix = f"v{version}:"
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        self._shards = {}
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.hits_by_type = collections.Counter()
+        self.stores_by_type = collections.Counter()
+
+    @property
+    def _index(self):
+        # Opened on first use, so importing a module that owns a cache creates nothing on disk
+        return self.shard(INDEX_SHARD)
+
+    def _open(self, name, policy):
+        return diskcache.Cache(
+            os.path.join(self.directory, name),
+            size_limit=policy["size_limit"],
+            eviction_policy=policy["eviction_policy"],
+        )
+
+    def policy(self, query_type):
+        if query_type == INDEX_SHARD:
+            return INDEX_POLICY
+        return self.policies.get(query_type, DEFAULT_POLICY)
+
+    def shard(self, query_type):
+        with self._lock:
+            if query_type not in self._shards:
+                self._shards[query_type] = self._open(query_type, self.policy(query_type))
+            return self._shards[query_type]
+
+    def _key(self, prompt):
+        return self.prefix + prompt
+
+    def _encode(self, result):
+        return json.dumps(result.model_dump(mode="json"), separators=(",", ":"))
+
+    def _decode(self, raw):
+        try:
+            return self.model.model_validate_json(raw)
+        except Exception:
+            return None
+
+    def get(self, prompt):
+        """Cached result for a normalized prompt, or None."""
+        key = self._key(prompt)
+        query_type = self._index.get(key)
+        if query_type is None:
+            self.counters["misses"] += 1
+            return None
+
+        raw = self.shard(query_type).get(key)
+        if raw is None:
+            # evicted or expired in its shard
+            self._index.delete(key)
+            self.counters["misses"] += 1
+            return None
+
+        result = self._decode(raw)
+        if result is None:
+            # written by an incompatible model; drop it
+            self.delete(prompt)
+            self.counters["invalid"] += 1
+            return None
+        self.counters["hits"] += 1
+        self.hits_by_type[query_type] += 1
+        return result
+
+    def __contains__(self, prompt):
+        return self._key(prompt) in self._index
+
+    def set(self, prompt, result):
+        """Store a result under its type's policy. Returns False if the policy says not to."""
+        query_type = result.type.value
+        ttl = self.policy(query_type)["ttl"]
+        if ttl == 0 or (query_type == "GENERAL_QUERY" and VOLATILE_PATTERN.search(prompt)):
+            self.counters["not_stored"] += 1
+            return False
+
+        key = self._key(prompt)
+        self.shard(query_type).set(key, self._encode(result), expire=ttl)
+        self._index.set(key, query_type, expire=ttl)
+        self.counters["stores"] += 1
+        self.stores_by_type[query_type] += 1
+        return True
+
+    def delete(self, prompt):
+        key = self._key(prompt)
+        query_type = self._index.pop(key, None)
+        if query_type is not None:
+            self.shard(query_type).delete(key)
+
+    def items(self):
+        """(prompt, result) for every live entry of the current version."""
+        for key in list(self._index.iterkeys()):
+            if not key.startswith(self.prefix):
+                continue
+            query_type = self._index.get(key)
+            raw = self.shard(query_type).get(key) if query_type else None
+            result = self._decode(raw) if raw is not None else None
+            if result is not None:
+                yield key[len(self.prefix):], result
+
+    def purge_stale(self):
+        """Delete expired entries, entries written under other versions, and the legacy cache."""
+        removed = self._drop_legacy()
+        for shard in [self._index] + [self.shard(t) for t in self.policies]:
+            removed += shard.expire()
+            for key in list(shard.iterkeys()):
+                if isinstance(key, str) and not key.startswith(self.prefix):
+                    shard.delete(key)
+                    removed += 1
+        return removed
+
+    def _drop_legacy(self):
+        # Before the shards existed, results of the old full-prompt classifier were
+        # pickled into a single cache at the root of the directory, keyed by the bare
+        # prompt. They belong to no version, so they are never served, only deleted.
+        if not os.path.exists(os.path.join(self.directory, "cache.db")):
+            return 0
+        legacy = diskcache.Cache(self.directory)
+        try:
+            removed = len(legacy)
+            legacy.clear()
+        finally:
+            legacy.close()
+        return removed
+
+    def stats(self):
+        """Entries, disk usage and hit counters per shard, plus overall counters."""
+        shards = {}
+        for query_type in self.policies:
+            shard = self.shard(query_type)
+            shards[query_type] = {
+                "entries": len(shard),
+                "bytes": shard.volume(),
+                "hits": self.hits_by_type[query_type],
+                "stores": self.stores_by_type[query_type],
+                **self.policy(query_type),
+            }
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["invalid"]
+        return {
+            "version": self.version,
+            "lookups": lookups,
+            "hits": self.counters["hits"],
+            "misses": self.counters["misses"],
+            "invalid": self.counters["invalid"],
+            "stores": self.counters["stores"],
+            "not_stored": self.counters["not_stored"],
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            "shards": shards,
+        }
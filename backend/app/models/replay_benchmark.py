@@ -0,0 +1,372 @@
+# Offline replay of recorded prompts through the query processor. Reports
+# per-stage latency (boost_prompt, local fast path, fuzzy lookup, learned
+# classifier, extract_path_hint, end to end), cache hit rates on a cold and a
+# warm pass, fast-path coverage and agreement with the golden intents.
+#
+# Usage (from backend/):
+#   python -m app.models.replay_benchmark
+#   python -m app.models.replay_benchmark --llm-latency-ms 300 --min-agreement 0.9
+#   python -m app.models.replay_benchmark --seed    # rebuild the corpus
+#
+# The corpus (fixtures/query_corpus.jsonl) has one prompt per line:
+#   {"prompt": "clone portfolio", "intent": {"type": ..., "subtask": ..., "target": ...}, "reply": ...}
+# seeded from response_cache.json and response_cache.db (prompts and replies)
+# and .query_cache (golden intents). "intent" is null where no intent was recorded. Groq is
+# replaced by a local fake server that answers with the recorded intents, and
+# the query cache starts empty in a scratch directory, so nothing leaves the
+# machine and the real caches are not touched.
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import diskcache
+import numpy as np
+
+from app.models import groq_preprocess
+from app.models.fuzzy_cache import OPTIONAL_TARGET_WORDS
+from app.models.intent_classifier import get_model, learned_stats
+from app.models.groq_preprocess import QueryProcessor, boost_prompt, extract_path_hint, normalize_prompt
+from app.models.intent_rules import fast_path_stats, match_intent
+from app.models.llm_client import groq_client
+from app.models.query_types import QueryType
+from app.paths import REPO_ROOT
+
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "backend", "fixtures", "query_corpus.jsonl")
+TASK_TAG = re.compile(r"^\[TASK:(\w+)\] ")
+
+
+# === Corpus === #
+
+def _read_query_cache(directory):
+    """prompt -> QueryProcessor from a query cache directory (legacy pickles and JSON shards)."""
+    # Read a copy; opening a diskcache writes to it
+    scratch = tempfile.mkdtemp(prefix="query_cache_copy_")
+    try:
+        directory = shutil.copytree(directory, os.path.join(scratch, "cache"))
+        return _read_cache_files(directory)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _read_cache_files(directory):
+    intents = {}
+    if os.path.exists(os.path.join(directory, "cache.db")):
+        legacy = diskcache.Cache(directory)
+        try:
+            for key in legacy.iterkeys():
+                value = legacy.get(key)
+                if isinstance(key, str) and value is not None:
+                    intents[key] = QueryProcessor.model_validate(value.model_dump())
+        finally:
+            legacy.close()
+
+    for shard_db in glob.glob(os.path.join(directory, "*", "cache.db")):
+        shard = diskcache.Cache(os.path.dirname(shard_db))
+        try:
+            for key in shard.iterkeys():
+                value = shard.get(key)
+                if isinstance(key, str) and isinstance(value, str) and value.startswith("{"):
+                    intents[key.split(":", 1)[1]] = QueryProcessor.model_validate_json(value)
+        finally:
+            shard.close()
+    return intents
+
+
+def _read_response_store(path):
+    if not os.path.exists(path):
+        return {}
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return dict(conn.execute("SELECT text, reply FROM replies"))
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+
+
+def seed_corpus(response_cache_path, query_cache_dir, out_path, response_store_path=None):
+    replies = {}
+    if os.path.exists(response_cache_path):
+        with open(response_cache_path) as f:
+            replies = json.load(f)
+    if response_store_path:
+        replies.update(_read_response_store(response_store_path))
+    intents = _read_query_cache(query_cache_dir)
+
+    records = []
+    for prompt in sorted(set(replies) | set(intents)):
+        intent = intents.get(prompt)
+        records.append({
+            "prompt": prompt,
+            "intent": {"type": intent.type.value, "subtask": intent.subtask.value, "target": intent.target}
+            if intent else None,
+            "reply": replies.get(prompt),
+        })
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return records
+
+
+def load_corpus(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# === Fake Groq === #
+
+class FakeGroq:
+    """
+    OpenAI-compatible /chat/completions answering from the corpus: the recorded
+    intent in JSON mode, the recorded reply otherwise.
+
+    :param latency: Seconds to wait before every answer.
+    """
+
+    def __init__(self, records, latency=0.0):
+        self.by_prompt = {normalize_prompt(record["prompt"]): record for record in records}
+        self.latency = latency
+        self.calls = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                answer = json.dumps(fake.answer(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(answer)))
+                self.end_headers()
+                self.wfile.write(answer)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, body):
+        self.calls += 1
+        time.sleep(self.latency)
+        prompt = normalize_prompt(TASK_TAG.sub("", body["messages"][-1]["content"]))
+        record = self.by_prompt.get(prompt, {})
+        if body.get("response_format"):
+            intent = record.get("intent") or {"type": "GENERAL_QUERY", "subtask": "GENERAL_QUERY", "target": ""}
+            content = json.dumps(dict(intent, path=""))
+        else:
+            content = record.get("reply") or "I could not say, sir."
+        return {"choices": [{"message": {"content": content}}], "usage": {}}
+
+    def close(self):
+        self.server.shutdown()
+
+
+# === Replay === #
+
+def _target_key(target):
+    # "Next.js" == "next js" == "next", "hall ticket.pdf" == "hall ticket", "project portfolio" == "portfolio"
+    words = re.findall(r"[a-z0-9]+", target.lower())
+    return "".join(word for word in words if word not in OPTIONAL_TARGET_WORDS and word != "project")
+
+
+def agrees(result, golden):
+    if result is None or golden is None:
+        return False
+    if (result.type.value, result.subtask.value) != (golden["type"], golden["subtask"]):
+        return False
+    # General answers are free text; only the routing has to match
+    return golden["type"] == QueryType.GENERAL_QUERY.value or _target_key(result.target) == _target_key(golden["target"])
+
+
+def _outcome(before, after, local, learned):
+    if local:
+        return "fast_path"
+    if learned:
+        return "learned"
+    for counter in ("exact_hits", "fuzzy_hits"):
+        if after.get(counter, 0) > before.get(counter, 0):
+            return counter[:-len("_hits")]
+    return "llm"
+
+
+def replay_pass(records):
+    """Run every prompt through cached_process_query. :return: list of (record, result, outcome, seconds)"""
+    runs = []
+    for record in records:
+        prompt = record["prompt"]
+        before = dict(groq_preprocess.cache_counters)
+        handled = fast_path_stats()["handled"]
+        learned = learned_stats()["handled"]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = groq_preprocess.cached_process_query(prompt)
+        seconds = time.perf_counter() - started
+        local = fast_path_stats()["handled"] > handled
+        outcome = _outcome(before, groq_preprocess.cache_counters, local, learned_stats()["handled"] > learned)
+        runs.append((record, result, outcome, seconds))
+    return runs
+
+
+def _timings(seconds):
+    if not seconds:
+        return {"count": 0, "mean_us": None, "p50_us": None, "p95_us": None}
+    values = np.array(seconds) * 1e6
+    return {"count": len(values), "mean_us": float(values.mean()),
+            "p50_us": float(np.percentile(values, 50)), "p95_us": float(np.percentile(values, 95))}
+
+
+def _time_stage(fn, args_list):
+    seconds = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for args in args_list:
+            started = time.perf_counter()
+            fn(*args)
+            seconds.append(time.perf_counter() - started)
+    return _timings(seconds)
+
+
+def summarize_pass(runs):
+    by_outcome = {}
+    for outcome in ("fast_path", "exact", "fuzzy", "learned", "llm"):
+        matching = [run for run in runs if run[2] == outcome]
+        labelled = [run for run in matching if run[0]["intent"]]
+        by_outcome[outcome] = {
+            "share": len(matching) / len(runs) if runs else 0.0,
+            "latency": _timings([run[3] for run in matching]),
+            "labelled": len(labelled),
+            "agreement": sum(agrees(run[1], run[0]["intent"]) for run in labelled) / len(labelled) if labelled else None,
+        }
+
+    labelled = [run for run in runs if run[0]["intent"]]
+    lookups = sum(1 for run in runs if run[2] != "fast_path")
+    hits = sum(1 for run in runs if run[2] in ("exact", "fuzzy"))
+    return {
+        "prompts": len(runs),
+        "end_to_end": _timings([run[3] for run in runs]),
+        "fast_path_coverage": by_outcome["fast_path"]["share"],
+        "cache_hit_rate": hits / lookups if lookups else 0.0,
+        "agreement": sum(agrees(run[1], run[0]["intent"]) for run in labelled) / len(labelled) if labelled else None,
+        "by_outcome": by_outcome,
+    }
+
+
+def boost_precision(records):
+    """Share of prompts boost_prompt tags with a task whose tag matches the golden type."""
+    tagged = []
+    for record in records:
+        match = TASK_TAG.match(boost_prompt(record["prompt"]))
+        if match and record["intent"]:
+            tagged.append(match.group(1) == record["intent"]["type"])
+    return {"tagged": len(tagged), "precision": sum(tagged) / len(tagged) if tagged else None}
+
+
+def benchmark(records, llm_latency=0.0):
+    fake = FakeGroq(records, llm_latency)
+    original_url = groq_client.base_url
+    scratch = tempfile.mkdtemp(prefix="query_replay_")
+    groq_client.use_base_url(fake.url + "/openai/v1")
+    try:
+        groq_preprocess.use_query_cache(scratch)
+        groq_preprocess.cache_counters.clear()
+        cold = summarize_pass(replay_pass(records))
+        warm = summarize_pass(replay_pass(records))
+
+        prompts = [(record["prompt"],) for record in records]
+        results = [(record["prompt"], result.type, result.subtask) for record, result, _, _ in replay_pass(records)]
+        index = groq_preprocess.get_fuzzy_index()
+        stages = {
+            "boost_prompt": _time_stage(boost_prompt, prompts),
+            "fast_path": _time_stage(match_intent, prompts),
+            "fuzzy_lookup": _time_stage(index.find, [(normalize_prompt(p),) for p, in prompts]),
+            "extract_path_hint": _time_stage(extract_path_hint, results),
+        }
+        if get_model() is not None:
+            stages["learned"] = _time_stage(get_model().classify, prompts)
+        return {
+            "corpus": len(records),
+            "labelled": sum(1 for record in records if record["intent"]),
+            "llm_calls": fake.calls,
+            "cold": cold,
+            "warm": warm,
+            "stages": stages,
+            "boost": boost_precision(records),
+        }
+    finally:
+        groq_client.use_base_url(original_url)
+        fake.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def print_report(report):
+    def fmt(value, pattern="{:8.1f}"):
+        return "       -" if value is None else pattern.format(value)
+
+    print(f"corpus: {report['corpus']} prompts, {report['labelled']} with golden intents, "
+          f"{report['llm_calls']} fake LLM calls")
+    print(f"boost_prompt: {report['boost']['tagged']} tagged, precision {fmt(report['boost']['precision'], '{:.0%}')}")
+    print()
+    print(f"{'stage':<20}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}")
+    for name, row in report["stages"].items():
+        print(f"{name:<20}{fmt(row['mean_us']):>10}{fmt(row['p50_us']):>10}{fmt(row['p95_us']):>10}")
+
+    for name in ("cold", "warm"):
+        summary = report[name]
+        print()
+        print(f"{name} pass: fast path {summary['fast_path_coverage']:.0%}, cache hit rate {summary['cache_hit_rate']:.0%}, "
+              f"agreement {fmt(summary['agreement'], '{:.0%}').strip()}, "
+              f"p95 {fmt(summary['end_to_end']['p95_us']).strip()} us")
+        print(f"{'  outcome':<20}{'share':>8}{'p50 us':>10}{'p95 us':>10}{'agree':>8}")
+        for outcome, row in summary["by_outcome"].items():
+            print(f"{'  ' + outcome:<20}{row['share']:>8.0%}{fmt(row['latency']['p50_us']):>10}"
+                  f"{fmt(row['latency']['p95_us']):>10}{fmt(row['agreement'], '{:>7.0%}'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded prompts through the query processor offline.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL corpus")
+    parser.add_argument("--seed", action="store_true",
+                        help="rebuild the corpus from the response cache and .query_cache first")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="delay of every fake LLM answer")
+    parser.add_argument("--min-agreement", type=float, default=None,
+                        help="exit with status 1 if the cold-pass agreement is lower")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.seed:
+        records = seed_corpus(os.path.join(REPO_ROOT, "response_cache.json"),
+                              os.path.join(REPO_ROOT, ".query_cache"), args.corpus,
+                              os.path.join(REPO_ROOT, "response_cache.db"))
+        print(f"Wrote {len(records)} prompts to {args.corpus}")
+
+    report = benchmark(load_corpus(args.corpus), args.llm_latency_ms / 1000)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    agreement = report["cold"]["agreement"]
+    if args.min_agreement is not None and agreement is not None and agreement < args.min_agreement:
+        print(f"Agreement {agreement:.0%} is below {args.min_agreement:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
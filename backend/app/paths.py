@@ -0,0 +1,9 @@
+# Where the assistant keeps its data files: the repository root, whatever the
+# working directory is (the start script runs from the root, tests and tools
+# from backend/).
+#
+#   os.path.join(REPO_ROOT, ".query_cache")
+
+import os
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
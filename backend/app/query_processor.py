@@ -9,48 +9,41 @@ from app.functions.project_handler.setup_project import setup_existing_project
 from app.functions.project_handler.create_project import setup_project
 from app.functions.project_handler.create_runner import run_project_setup
 from app.models.query_types import QueryType, SubTaskType
+from app.handler_registry import HandlerRegistry, INSTANT, IO, LONG
+
+# Each (type, subtask) has its own pool: long project setups and clones can no
+# longer take the workers that open apps and files
+registry = HandlerRegistry()
+
+registry.register(QueryType.APP_HANDLING, SubTaskType.OPEN_APP, lambda q: open_app(q.target), kind=INSTANT)
+registry.register(QueryType.APP_HANDLING, SubTaskType.CLOSE_APP, lambda q: close_app(q.target), kind=INSTANT)
+
+registry.register(QueryType.FILE_HANDLING, SubTaskType.OPEN_FILE, lambda q: open_file(q.target, q.path),
+                  kind=IO, deadline=30)
+
+registry.register(QueryType.SUMMARIZER, SubTaskType.SUMMARIZE, lambda q: summarize_in_new_window(q.path, q.target),
+                  kind=IO, deadline=30)
+
+registry.register(QueryType.GITHUB_ACTIONS, SubTaskType.CLONE_REPO,
+                  lambda q: clone_github_repo(q.target, "D://va_projects"), kind=LONG, deadline=300)
+registry.register(QueryType.GITHUB_ACTIONS, SubTaskType.PUSH_REPO,
+                  lambda q: push_folder_to_github(q.target, "D://va_projects"), kind=LONG, deadline=300)
+registry.register(QueryType.GITHUB_ACTIONS, SubTaskType.LIST_REPOS, lambda q: list_github_repos(), kind=IO, deadline=30)
+
+registry.register(QueryType.CREATE_PROJECT, SubTaskType.CREATE_PROJECT,
+                  lambda q: run_project_setup(q.target, "D://va_projects"), kind=LONG, deadline=600)
+
+# try_running_project alone may take 120 s
+registry.register(QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT,
+                  lambda q: setup_existing_project(q.target, "D://va_projects"), kind=LONG, deadline=600)
 
 def determine_function(structured_query):
-    # print(structured_query)
-    # print(structured_query.subtask.value)
-    # print(structured_query.target)
-    # print(structured_query.path)
-
-    query_type = structured_query.type
-    subtask = structured_query.subtask
-    target = structured_query.target
-    path = structured_query.path
-
-    if query_type == QueryType.APP_HANDLING:
-        if subtask == SubTaskType.OPEN_APP:
-            open_app(target)
-        if subtask == SubTaskType.CLOSE_APP:
-            close_app(target)    
-
-    if query_type == QueryType.FILE_HANDLING:
-        if subtask == SubTaskType.OPEN_FILE:
-            open_file(target,path)
-            
-    if query_type == QueryType.SUMMARIZER:
-        if subtask == SubTaskType.SUMMARIZE:
-            summarize_in_new_window(path,target)
-    
-    if query_type == QueryType.GITHUB_ACTIONS:
-        if subtask == SubTaskType.CLONE_REPO:
-            clone_github_repo(target,"D://va_projects")
-        if subtask == SubTaskType.PUSH_REPO:
-            push_folder_to_github(target,"D://va_projects")    
-        if subtask == SubTaskType.LIST_REPOS:
-            list_github_repos()
-            
-    if query_type == QueryType.CREATE_PROJECT:
-        if subtask == SubTaskType.CREATE_PROJECT:
-            run_project_setup(target,"D://va_projects")
-   
-    
-    if query_type == QueryType.SETUP_PROJECT:
-        if subtask == SubTaskType.SETUP_PROJECT:
-            setup_existing_project(target,"D://va_projects")
+    """
+    Queue the handler for a structured query and return at once.
+
+    :return: Future of the handler's result (see HandlerRegistry.dispatch).
+    """
+    return registry.dispatch(structured_query)
 
 
     # if query_type == QueryType.GENERAL_QUERY:
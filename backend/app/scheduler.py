@@ -0,0 +1,242 @@
+# Priority scheduling for blocking work. Voice commands and the UI must not wait
+# behind jobs from the shared todo queue, so work is queued by priority instead
+# of FIFO:
+#
+#   INSTANT      instant handlers (open/close app) of interactive commands
+#   INTERACTIVE  everything else said to the assistant or sent by the UI
+#   BACKGROUND   commands from the shared todo queue
+#
+# Reserved workers only take INSTANT and INTERACTIVE jobs, so those always find
+# a free thread; BACKGROUND jobs are throttled to a few at a time.
+#
+# The priority travels with the work in a context variable: set it once for a
+# command and every job submitted from that context (including handlers queued
+# by those jobs) inherits it. PriorityScheduler is a concurrent.futures
+# Executor, so loop.run_in_executor works unchanged.
+#
+#   scheduler = PriorityScheduler(max_workers=4, reserved=1)
+#   current_priority.set(BACKGROUND)
+#   scheduler.submit(run_project_setup, "flask", "D://va_projects")
+#
+# Load test, FIFO pool vs scheduler (from backend/):
+#   python -m app.scheduler --background 24 --instant 40
+
+import argparse
+import collections
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+
+import numpy as np
+
+INSTANT = 0
+INTERACTIVE = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INSTANT: "instant", INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+current_priority = contextvars.ContextVar("current_priority", default=INTERACTIVE)
+
+# Wait/run times kept per priority for the percentiles
+RECENT_JOBS = 500
+
+
+def _percentile(values, q):
+    return float(np.percentile(np.array(values) * 1000, q)) if values else None
+
+
+class PriorityScheduler(Executor):
+    """
+    :param max_workers: Worker threads.
+    :param reserved: Workers that never take BACKGROUND jobs.
+    :param background_limit: BACKGROUND jobs allowed to run at once (default: the unreserved workers).
+    :param background_interval: Minimum seconds between starting two BACKGROUND jobs.
+    :param name: Thread name prefix.
+    """
+
+    def __init__(self, max_workers=4, reserved=1, background_limit=None, background_interval=0.0, name="scheduler"):
+        if not 0 <= reserved < max_workers:
+            raise ValueError("at least one worker must take background jobs")
+        self.max_workers = max_workers
+        self.reserved = reserved
+        self.background_limit = max_workers - reserved if background_limit is None else background_limit
+        self.background_interval = background_interval
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._shutdown = False
+        self._running_background = 0
+        self._next_background = 0.0
+
+        self.counters = {priority: collections.Counter() for priority in PRIORITY_NAMES}
+        self.wait_times = {priority: collections.deque(maxlen=RECENT_JOBS) for priority in PRIORITY_NAMES}
+        self.latencies = {priority: collections.deque(maxlen=RECENT_JOBS) for priority in PRIORITY_NAMES}
+
+        self._threads = [
+            threading.Thread(target=self._worker, args=(i < reserved,), name=f"{name}-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        """Queue fn at the priority of the calling context (current_priority)."""
+        return self.submit_at(current_priority.get(), fn, *args, **kwargs)
+
+    def submit_at(self, priority, fn, /, *args, **kwargs):
+        future = Future()
+        # fn runs in the caller's context, so whatever it submits keeps the priority
+        context = contextvars.copy_context()
+        context.run(current_priority.set, priority)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new jobs after shutdown")
+            heapq.heappush(self._heap, (priority, next(self._seq), time.monotonic(), future, context, fn, args, kwargs))
+            self.counters[priority]["submitted"] += 1
+            # Reserved workers decline BACKGROUND jobs, so waking just one could leave the job queued
+            self._cond.notify_all()
+        return future
+
+    def _take(self, reserved):
+        """:return: (job or None, seconds to wait or None)"""
+        if not self._heap:
+            return None, None
+        priority = self._heap[0][0]
+        if priority != BACKGROUND:
+            return heapq.heappop(self._heap), None
+        if reserved or self._running_background >= self.background_limit:
+            return None, None
+        delay = self._next_background - time.monotonic()
+        if delay > 0:
+            return None, delay
+        self._running_background += 1
+        self._next_background = time.monotonic() + self.background_interval
+        return heapq.heappop(self._heap), None
+
+    def _worker(self, reserved):
+        while True:
+            with self._cond:
+                while True:
+                    job, delay = self._take(reserved)
+                    if job is not None:
+                        break
+                    if self._shutdown and not self._heap:
+                        return
+                    self._cond.wait(delay)
+
+            priority, _, submitted_at, future, context, fn, args, kwargs = job
+            try:
+                if future.set_running_or_notify_cancel():
+                    started = time.monotonic()
+                    try:
+                        future.set_result(context.run(fn, *args, **kwargs))
+                        self.counters[priority]["completed"] += 1
+                    except BaseException as e:
+                        future.set_exception(e)
+                        self.counters[priority]["failed"] += 1
+                    finished = time.monotonic()
+                    self.wait_times[priority].append(started - submitted_at)
+                    self.latencies[priority].append(finished - submitted_at)
+                else:
+                    self.counters[priority]["cancelled"] += 1
+            finally:
+                if priority == BACKGROUND:
+                    with self._cond:
+                        self._running_background -= 1
+                        self._cond.notify_all()
+
+    def queued(self, priority=None):
+        with self._cond:
+            return sum(1 for job in self._heap if priority is None or job[0] == priority)
+
+    def stats(self):
+        """Queue depth, counters, and p50/p95 wait and end-to-end latency per priority."""
+        with self._cond:
+            queued = collections.Counter(job[0] for job in self._heap)
+        report = {}
+        for priority, name in PRIORITY_NAMES.items():
+            counters = self.counters[priority]
+            wait_times, latencies = list(self.wait_times[priority]), list(self.latencies[priority])
+            report[name] = {
+                "queued": queued[priority],
+                **{key: counters[key] for key in ("submitted", "completed", "failed", "cancelled")},
+                "p95_wait_ms": _percentile(wait_times, 95),
+                "p50_latency_ms": _percentile(latencies, 50),
+                "p95_latency_ms": _percentile(latencies, 95),
+            }
+        return report
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for job in self._heap:
+                    job[3].cancel()
+                self._heap.clear()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def load_test(executor, background, instant, background_seconds, instant_seconds, spacing):
+    """
+    Flood `executor` with background jobs, then submit instant jobs one by one.
+
+    :return: priority name -> latencies in seconds (submit to finish)
+    """
+    latencies = collections.defaultdict(list)
+
+    def job(seconds, submitted_at, name):
+        time.sleep(seconds)
+        latencies[name].append(time.monotonic() - submitted_at)
+
+    futures = []
+    for _ in range(background):
+        futures.append(contextvars.Context().run(_submit, executor, BACKGROUND, job, background_seconds))
+    for _ in range(instant):
+        futures.append(contextvars.Context().run(_submit, executor, INSTANT, job, instant_seconds))
+        time.sleep(spacing)
+    wait(futures)
+    return latencies
+
+
+def _submit(executor, priority, job, seconds):
+    current_priority.set(priority)
+    return executor.submit(job, seconds, time.monotonic(), PRIORITY_NAMES[priority])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instant-job latency under background load: FIFO pool vs PriorityScheduler.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--background", type=int, default=24, help="background jobs queued up front")
+    parser.add_argument("--instant", type=int, default=40, help="instant jobs, submitted one by one")
+    parser.add_argument("--background-seconds", type=float, default=0.5)
+    parser.add_argument("--instant-seconds", type=float, default=0.01)
+    parser.add_argument("--spacing", type=float, default=0.05, help="seconds between instant jobs")
+    args = parser.parse_args()
+
+    executors = {
+        "fifo": lambda: ThreadPoolExecutor(max_workers=args.workers),
+        "priority": lambda: PriorityScheduler(max_workers=args.workers, reserved=1),
+    }
+    print(f"{'executor':<10}{'load':<8}{'instant p50':>13}{'instant p95':>13}{'background p95':>16}")
+    for name, make_executor in executors.items():
+        for load in (0, args.background):
+            executor = make_executor()
+            latencies = load_test(executor, load, args.instant, args.background_seconds,
+                                  args.instant_seconds, args.spacing)
+            executor.shutdown()
+
+            def fmt(values, q):
+                return "-" if not values else f"{np.percentile(values, q) * 1000:.0f} ms"
+
+            print(f"{name:<10}{('busy' if load else 'idle'):<8}{fmt(latencies['instant'], 50):>13}"
+                  f"{fmt(latencies['instant'], 95):>13}{fmt(latencies['background'], 95):>16}")
+
+
+if __name__ == "__main__":
+    main()
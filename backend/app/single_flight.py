@@ -0,0 +1,92 @@
+# Coalesces identical in-flight calls: while a call for a key is running, other
+# callers with the same key (from any thread or event loop) wait for its result
+# instead of starting their own. Voice input and the shared todo queue can hand
+# us the same prompt at the same time; this keeps that to one Groq/Gemini call.
+#
+#   flight = SingleFlight("query")
+#   result = flight.do(key, fn, arg)                  # from a thread
+#   result = await flight.do_async(key, coro_fn, arg) # from a coroutine
+
+import asyncio
+import collections
+import threading
+from concurrent.futures import CancelledError, Future
+
+
+class SingleFlight:
+    def __init__(self, name=""):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def _join(self, key):
+        """:return: (future, is_leader)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.counters["calls"] += 1
+            return future, True
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key, fn, *args):
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except CancelledError:
+                    continue  # the leader was cancelled; run it ourselves
+
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                self._finish(key, future)
+
+    async def do_async(self, key, fn, *args):
+        """Like `do`, with `fn` a coroutine function. Cancelling a waiter never cancels the shared call."""
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    if future.cancelled():
+                        continue
+                    raise
+
+            try:
+                result = await fn(*args)
+            except asyncio.CancelledError:
+                # Followers retry on their own instead of inheriting our cancellation
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                self._finish(key, future)
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._calls)
+
+    def stats(self):
+        return {"name": self.name, "calls": self.counters["calls"], "coalesced": self.counters["coalesced"]}
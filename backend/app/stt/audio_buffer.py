@@ -0,0 +1,58 @@
+import collections
+import threading
+
+
+class AudioRingBuffer:
+    """
+    Bounded buffer of raw PCM frames shared by the hotword loop (writer) and the
+    command recorder (reader).
+
+    Frames are addressed by an absolute, ever-increasing position so a reader can
+    start a little in the past (pre-roll) and then follow the writer without
+    opening a stream of its own. When the reader falls behind the oldest frame
+    still held, it is moved forward to that frame.
+    """
+
+    def __init__(self, max_frames):
+        self._frames = collections.deque(maxlen=max_frames)
+        self._cond = threading.Condition()
+        self._next_position = 0  # absolute position of the next frame to be written
+
+    def push(self, frame):
+        with self._cond:
+            self._frames.append(frame)
+            self._next_position += 1
+            self._cond.notify_all()
+
+    def position(self):
+        """Absolute position the next pushed frame will get."""
+        with self._cond:
+            return self._next_position
+
+    def oldest_position(self):
+        with self._cond:
+            return self._next_position - len(self._frames)
+
+    def frames_between(self, start, end):
+        """Frames in [start, end) that are still held, without waiting for the writer."""
+        with self._cond:
+            oldest = self._next_position - len(self._frames)
+            start = max(start, oldest)
+            end = min(end, self._next_position)
+            return [self._frames[i - oldest] for i in range(start, end)]
+
+    def read(self, position, timeout=None):
+        """
+        Return (frame, next_position) for the frame at `position`, waiting for the
+        writer if it has not been captured yet.
+
+        :param position: Absolute frame position to read.
+        :param timeout: Seconds to wait for the frame; None waits forever.
+        :return: (frame, next_position), or (None, position) on timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: position < self._next_position, timeout=timeout):
+                return None, position
+            oldest = self._next_position - len(self._frames)
+            position = max(position, oldest)
+            return self._frames[position - oldest], position + 1
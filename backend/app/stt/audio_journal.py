@@ -0,0 +1,212 @@
+# Keeps the audio of recent commands for debugging without slowing commands down.
+#
+# Recordings are handed to a background writer and stored as gzip-compressed
+# WAVs (`<command_id>.wav.gz`). What is on disk is tracked in an in-memory
+# manifest (persisted as manifest.json and read once at startup), so eviction
+# by total size and age never rescans the directory. The manifest is rewritten at
+# most every `save_interval` seconds and on flush(), not once per command.
+#
+#   journal = AudioJournal("recordings", max_bytes=50 * 1024 * 1024, max_age_seconds=24 * 3600)
+#   journal.record(command_id, audio_data)           # returns immediately
+#   journal.annotate(command_id, transcript="open whatsapp")
+#   journal.get(command_id)                          # manifest entry
+#   journal.load(command_id)                         # sr.AudioData
+#   journal.export_wav(command_id, "debug.wav")
+
+import collections
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+import time
+import wave
+
+import speech_recognition as sr
+
+MANIFEST_NAME = "manifest.json"
+# Longest the on-disk manifest may lag behind the recordings
+SAVE_INTERVAL = 30.0
+
+
+class AudioJournal:
+    """
+    :param directory: Where compressed recordings and the manifest live.
+    :param max_bytes: Total compressed size kept on disk; oldest recordings go first.
+    :param max_age_seconds: Recordings older than this are dropped (None keeps them until size eviction).
+    :param compress_level: gzip level; 1-3 is plenty for speech and keeps the writer cheap.
+    :param save_interval: Seconds the writer may hold manifest changes before rewriting manifest.json.
+    """
+
+    def __init__(self, directory="recordings", max_bytes=50 * 1024 * 1024, max_age_seconds=24 * 3600,
+                 compress_level=3, save_interval=SAVE_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compress_level = compress_level
+        self.save_interval = save_interval
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        # command_id -> entry, oldest first
+        self._entries = collections.OrderedDict()
+        self._total_bytes = 0
+        # Writer-thread state: whether the manifest on disk is behind, and when it was last written
+        self._dirty = False
+        self._last_saved = time.monotonic()
+        self._load_manifest()
+        self._writer = threading.Thread(target=self._write_loop, name="audio-journal", daemon=True)
+        self._writer.start()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Could not read audio journal manifest: {e}")
+            return
+        for entry in sorted(entries, key=lambda e: e["created"]):
+            self._entries[entry["command_id"]] = entry
+            self._total_bytes += entry["bytes"]
+
+    def _save_manifest(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+        self._last_saved = time.monotonic()
+
+    def _path(self, entry):
+        return os.path.join(self.directory, entry["file"])
+
+    # --- hot path -------------------------------------------------------
+
+    def record(self, command_id, audio_data, **fields):
+        """Queue a recording for writing; never blocks on disk."""
+        self._queue.put(("record", command_id, audio_data, fields))
+
+    def annotate(self, command_id, **fields):
+        """Attach metadata (e.g. transcript) to a recording, queued behind its write."""
+        self._queue.put(("annotate", command_id, None, fields))
+
+    # --- writer thread --------------------------------------------------
+
+    def _write_loop(self):
+        while True:
+            timeout = None
+            if self._dirty:
+                timeout = max(0.0, self._last_saved + self.save_interval - time.monotonic())
+            try:
+                op, command_id, audio_data, fields = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._save_pending()
+                continue
+            try:
+                if op == "record":
+                    self._write(command_id, audio_data, fields)
+                    self._dirty = True
+                elif op == "annotate":
+                    with self._lock:
+                        if command_id in self._entries:
+                            self._entries[command_id].update(fields)
+                            self._dirty = True
+                if self._evict():
+                    self._dirty = True
+                if op == "save" or time.monotonic() - self._last_saved >= self.save_interval:
+                    self._save_pending()
+            except Exception as e:
+                print(f"Audio journal error for {command_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _save_pending(self):
+        if not self._dirty:
+            return
+        try:
+            self._save_manifest()
+        except Exception as e:
+            print(f"Could not write audio journal manifest: {e}")
+            # Retry after another interval rather than on every loop
+            self._last_saved = time.monotonic()
+
+    def _write(self, command_id, audio_data, fields):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{command_id}.wav.gz"
+        with gzip.open(os.path.join(self.directory, filename), "wb", compresslevel=self.compress_level) as f:
+            f.write(audio_data.get_wav_data())
+        entry = {
+            "command_id": command_id,
+            "file": filename,
+            "created": time.time(),
+            "bytes": os.path.getsize(os.path.join(self.directory, filename)),
+            "seconds": len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width),
+        }
+        entry.update(fields)
+        with self._lock:
+            previous = self._entries.pop(command_id, None)
+            if previous is not None:
+                self._total_bytes -= previous["bytes"]
+            self._entries[command_id] = entry
+            self._total_bytes += entry["bytes"]
+
+    def _evict(self):
+        now = time.time()
+        evicted = []
+        with self._lock:
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                too_old = self.max_age_seconds is not None and now - oldest["created"] > self.max_age_seconds
+                if not too_old and self._total_bytes <= self.max_bytes:
+                    break
+                self._entries.popitem(last=False)
+                self._total_bytes -= oldest["bytes"]
+                evicted.append(oldest)
+        for entry in evicted:
+            try:
+                os.remove(self._path(entry))
+            except FileNotFoundError:
+                pass
+        return bool(evicted)
+
+    # --- queries --------------------------------------------------------
+
+    def get(self, command_id):
+        """Manifest entry for a command, or None if it was never recorded or has been evicted."""
+        with self._lock:
+            entry = self._entries.get(command_id)
+            return dict(entry) if entry else None
+
+    def entries(self):
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes
+
+    def load(self, command_id):
+        """Decompress a recording back into sr.AudioData."""
+        entry = self.get(command_id)
+        if entry is None:
+            raise KeyError(command_id)
+        with gzip.open(self._path(entry), "rb") as f:
+            with wave.open(io.BytesIO(f.read()), "rb") as wf:
+                return sr.AudioData(wf.readframes(wf.getnframes()), wf.getframerate(), wf.getsampwidth())
+
+    def export_wav(self, command_id, path):
+        with open(path, "wb") as f:
+            f.write(self.load(command_id).get_wav_data())
+        return path
+
+    def flush(self):
+        """Block until every queued write, and the manifest, has reached disk."""
+        self._queue.put(("save", None, None, None))
+        self._queue.join()
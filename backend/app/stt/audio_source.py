@@ -0,0 +1,176 @@
+# Where the hotword loop gets its audio from. The live assistant reads the
+# microphone; tests, servers and benchmarks replay WAV files or generated PCM
+# at real-time or accelerated speed through the same interface.
+
+import time
+import wave
+
+
+class AudioSource:
+    """
+    Yields 16-bit mono PCM frames.
+
+    `read` returns exactly `frame_length` samples as bytes and raises EOFError
+    once a finite source is exhausted.
+    """
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+
+    def read(self, frame_length):
+        raise NotImplementedError
+
+    def restart(self):
+        """Recover after a read error. Live sources reopen their stream."""
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    def __init__(self, sample_rate=16000, frame_length=512, device_index=None, pa=None):
+        # Imported here so file and generated sources work without PyAudio installed
+        import pyaudio
+
+        super().__init__(sample_rate)
+        self.frame_length = frame_length
+        self.device_index = device_index
+        self.pa = pa or pyaudio.PyAudio()
+        self.sample_format = pyaudio.paInt16
+        self.stream = self._open()
+
+    def _open(self):
+        return self.pa.open(
+            rate=self.sample_rate,
+            channels=1,
+            format=self.sample_format,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.frame_length,
+        )
+
+    def read(self, frame_length):
+        return self.stream.read(frame_length, exception_on_overflow=False)
+
+    def restart(self):
+        print("Restarting audio stream...")
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = self._open()
+        except Exception as e:
+            print(f"Failed to restart stream: {e}")
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.pa.terminate()
+
+
+class PacedSource(AudioSource):
+    """
+    Base for finite sources that can be replayed faster than real time.
+
+    :param speed: 1.0 = real time, 4.0 = four times faster, 0 = as fast as possible.
+    """
+
+    def __init__(self, sample_rate=16000, speed=1.0):
+        super().__init__(sample_rate)
+        self.speed = speed
+        self.frames_read = 0
+        self.samples_read = 0
+        self._started = None
+
+    def _pace(self, frame_length):
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.samples_read += frame_length
+        self.frames_read += 1
+        if self.speed > 0:
+            due = self._started + self.samples_read / self.sample_rate / self.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    @property
+    def audio_seconds(self):
+        """Seconds of audio delivered so far (the replay clock)."""
+        return self.samples_read / self.sample_rate
+
+
+class WavFileSource(PacedSource):
+    """
+    Replays one or more 16 kHz mono 16-bit WAV files back to back.
+
+    :param tail_silence_seconds: Silence appended after the last file so the
+                                 endpointer can close a command that ends the clip.
+    """
+
+    def __init__(self, paths, speed=1.0, tail_silence_seconds=1.5, sample_rate=16000):
+        super().__init__(sample_rate, speed)
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        chunks = []
+        for path in self.paths:
+            with wave.open(path, "rb") as wf:
+                if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != sample_rate:
+                    raise ValueError(f"{path}: expected {sample_rate} Hz mono 16-bit PCM")
+                chunks.append(wf.readframes(wf.getnframes()))
+        chunks.append(b"\0\0" * int(tail_silence_seconds * sample_rate))
+        self._pcm = b"".join(chunks)
+        self._offset = 0
+
+    def read(self, frame_length):
+        size = frame_length * 2
+        if self._offset >= len(self._pcm):
+            raise EOFError
+        frame = self._pcm[self._offset:self._offset + size]
+        self._offset += size
+        self._pace(frame_length)
+        return frame.ljust(size, b"\0")
+
+
+class GeneratorSource(PacedSource):
+    """Replays PCM bytes from any iterable (chunks of any size are re-framed)."""
+
+    def __init__(self, chunks, speed=1.0, sample_rate=16000):
+        super().__init__(sample_rate, speed)
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read(self, frame_length):
+        size = frame_length * 2
+        while len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                if not self._pending:
+                    raise EOFError
+                break
+            self._pending += chunk
+        frame, self._pending = self._pending[:size], self._pending[size:]
+        self._pace(frame_length)
+        return frame.ljust(size, b"\0")
+
+
+class ScheduledWakeDetector:
+    """
+    Stand-in for Porcupine in headless runs: reports a detection when the
+    replay clock passes each scheduled time.
+
+    :param wake_at_seconds: Audio timestamps (seconds) at which the wake word "ends".
+    """
+
+    def __init__(self, wake_at_seconds, sample_rate=16000, frame_length=512):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self._pending = sorted(wake_at_seconds)
+        self._samples = 0
+
+    def process(self, pcm):
+        self._samples += len(pcm)
+        if self._pending and self._samples / self.sample_rate >= self._pending[0]:
+            self._pending.pop(0)
+            return 0
+        return -1
+
+    def delete(self):
+        pass
@@ -0,0 +1,179 @@
+# Measures how long each endpointer keeps recording after the user stops talking.
+#
+# Usage (from backend/):
+#   python -m app.stt.endpoint_benchmark recordings/*.wav
+#   python -m app.stt.endpoint_benchmark --synthetic 20
+#
+# Fixtures are 16 kHz mono 16-bit WAVs (e.g. recordings exported from the
+# audio journal with AudioJournal.export_wav). The true end of speech is read from a sidecar
+# `<name>.json` ({"speech_end": seconds}) when present, otherwise estimated
+# offline from the whole clip.
+
+import argparse
+import glob
+import json
+import os
+import time
+import wave
+
+import numpy as np
+
+from app.stt.endpointer import AdaptiveEndpointer, FixedThresholdEndpointer, frame_features, frames_to_array
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 512
+
+
+def load_fixture(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != SAMPLE_RATE:
+            raise ValueError("expected 16 kHz mono 16-bit PCM")
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+
+    sidecar = os.path.splitext(path)[0] + ".json"
+    speech_end = None
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            speech_end = json.load(f).get("speech_end")
+    if speech_end is None:
+        speech_end = reference_speech_end(samples)
+    return samples, speech_end
+
+
+def reference_speech_end(samples, hop=160):
+    """Offline estimate: end of the last 10 ms frame that is well above the clip's noise level."""
+    frames = frames_to_array(samples.tobytes(), hop)
+    rms, _ = frame_features(frames)
+    db = 20 * np.log10(np.maximum(rms, 1.0))
+    noise_db, peak_db = np.percentile(db, 10), np.percentile(db, 99)
+    voiced = np.nonzero(db > noise_db + 0.3 * (peak_db - noise_db))[0]
+    if len(voiced) == 0:
+        return None
+    return (voiced[-1] + 1) * hop / SAMPLE_RATE
+
+
+def synthetic_fixture(rng, noise_level=60.0):
+    """Background noise, a few syllables with short gaps, then trailing noise."""
+    lead = rng.uniform(0.2, 0.6)
+    parts = [rng.normal(0, noise_level, int(lead * SAMPLE_RATE))]
+    t = lead
+    for _ in range(rng.integers(3, 8)):
+        length = rng.uniform(0.12, 0.35)
+        n = int(length * SAMPLE_RATE)
+        tt = np.arange(n) / SAMPLE_RATE
+        envelope = np.sin(np.pi * np.arange(n) / n) * rng.uniform(1500, 6000)
+        if rng.random() < 0.25:
+            syllable = rng.normal(0, 1.0, n) * envelope * 0.3  # fricative
+        else:
+            f0 = rng.uniform(100, 220)
+            syllable = sum(np.sin(2 * np.pi * f0 * k * tt) / k for k in range(1, 5)) * envelope
+        gap = rng.uniform(0.05, 0.3)
+        parts.append(syllable + rng.normal(0, noise_level, n))
+        parts.append(rng.normal(0, noise_level, int(gap * SAMPLE_RATE)))
+        t += length + gap
+    speech_end = t - gap
+    parts.append(rng.normal(0, noise_level, int(2.5 * SAMPLE_RATE)))
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype("<i2")
+    return samples, speech_end
+
+
+def run_endpointer(endpointer, samples):
+    """Feed a clip frame by frame; return (endpoint time in seconds or None, seconds spent deciding)."""
+    frames = frames_to_array(samples.tobytes(), FRAME_LENGTH)
+    endpointer.reset()
+    started = time.perf_counter()
+    for i, frame in enumerate(frames):
+        if endpointer.process_batch(frame[np.newaxis, :]) >= 0:
+            return (i + 1) * FRAME_LENGTH / SAMPLE_RATE, time.perf_counter() - started
+    return None, time.perf_counter() - started
+
+
+def default_endpointers():
+    kwargs = dict(sample_rate=SAMPLE_RATE, frame_length=FRAME_LENGTH)
+    return {
+        "fixed-1.5s (legacy)": FixedThresholdEndpointer(**kwargs),
+        "adaptive-0.7s": AdaptiveEndpointer(trailing_silence=0.7, **kwargs),
+        "adaptive-0.5s": AdaptiveEndpointer(trailing_silence=0.5, **kwargs),
+    }
+
+
+def benchmark(fixtures, endpointers):
+    """
+    :param fixtures: List of (name, samples, speech_end) tuples.
+    :return: {endpointer name: summary dict}
+    """
+    report = {}
+    for name, endpointer in endpointers.items():
+        delays, early, missed, cpu, frames = [], 0, 0, 0.0, 0
+        for _, samples, speech_end in fixtures:
+            endpoint, spent = run_endpointer(endpointer, samples)
+            cpu += spent
+            frames += len(samples) // FRAME_LENGTH
+            if endpoint is None or speech_end is None or endpointer.end_reason != "silence":
+                missed += 1
+                continue
+            delay = endpoint - speech_end
+            if delay < 0:
+                early += 1
+            delays.append(delay)
+        report[name] = {
+            "fixtures": len(fixtures),
+            "mean_delay_ms": float(np.mean(delays) * 1000) if delays else None,
+            "p50_delay_ms": float(np.percentile(delays, 50) * 1000) if delays else None,
+            "p95_delay_ms": float(np.percentile(delays, 95) * 1000) if delays else None,
+            "early_cuts": early,
+            "not_endpointed": missed,
+            "us_per_frame": cpu / max(frames, 1) * 1e6,
+        }
+    return report
+
+
+def print_report(report):
+    def fmt(value):
+        return "-" if value is None else f"{value:8.1f}"
+
+    print(f"{'endpointer':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'early':>7}{'missed':>8}{'us/frame':>10}")
+    for name, row in report.items():
+        print(f"{name:<22}{fmt(row['mean_delay_ms']):>10}{fmt(row['p50_delay_ms']):>10}"
+              f"{fmt(row['p95_delay_ms']):>10}{row['early_cuts']:>7}{row['not_endpointed']:>8}"
+              f"{row['us_per_frame']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report endpointing delay on recorded fixtures.")
+    parser.add_argument("fixtures", nargs="*", help="WAV files or directories of WAV files")
+    parser.add_argument("--synthetic", type=int, default=0, help="also generate N synthetic fixtures")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    paths = []
+    for entry in args.fixtures:
+        paths.extend(sorted(glob.glob(os.path.join(entry, "*.wav"))) if os.path.isdir(entry) else [entry])
+
+    fixtures = []
+    for path in paths:
+        try:
+            samples, speech_end = load_fixture(path)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        fixtures.append((os.path.basename(path), samples, speech_end))
+
+    rng = np.random.default_rng(args.seed)
+    for i in range(args.synthetic):
+        samples, speech_end = synthetic_fixture(rng)
+        fixtures.append((f"synthetic_{i}", samples, speech_end))
+
+    if not fixtures:
+        parser.error("no fixtures given; pass WAV files or --synthetic N")
+
+    report = benchmark(fixtures, default_endpointers())
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
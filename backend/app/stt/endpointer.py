@@ -0,0 +1,188 @@
+# End-of-speech detection for the command recorder.
+# Endpointers consume 16-bit mono PCM frames (bytes or NumPy batches) and report
+# when the user has finished speaking.
+
+import numpy as np
+
+
+def frames_to_array(frames, frame_length):
+    """Turn raw int16 PCM bytes (one or more frames) into an (n_frames, frame_length) array."""
+    samples = np.frombuffer(frames, dtype="<i2")
+    usable = len(samples) - len(samples) % frame_length
+    return samples[:usable].reshape(-1, frame_length)
+
+
+def frame_features(frames):
+    """
+    Vectorized per-frame features for a batch of frames.
+
+    :param frames: (n_frames, frame_length) int16 array.
+    :return: (rms, zcr) arrays of shape (n_frames,). RMS is in int16 units,
+             ZCR is the fraction of adjacent sample pairs that change sign.
+    """
+    x = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x, axis=1))
+    signs = np.signbit(x)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(frames.shape[1] - 1, 1)
+    return rms, zcr
+
+
+class Endpointer:
+    """
+    Base class for end-of-speech detectors.
+
+    Subclasses implement `_step(rms, zcr)` for a single frame and return True once
+    the utterance is over; `end_reason` then says why ("silence", "no_speech" or
+    "max_duration").
+    """
+
+    def __init__(self, sample_rate=16000, frame_length=512, max_duration=10.0):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.max_duration = max_duration
+        self.reset()
+
+    def seconds_to_frames(self, seconds):
+        return max(int(round(seconds * self.sample_rate / self.frame_length)), 1)
+
+    def reset(self):
+        self.frames_seen = 0
+        self.speech_started = False
+        self.last_speech_frame = -1
+        self.end_reason = None
+
+    @property
+    def in_trailing_silence(self):
+        """True while speech has started but the most recent frame was not speech."""
+        return self.speech_started and self.last_speech_frame < self.frames_seen - 1
+
+    def prime(self, frames):
+        """Calibrate on audio captured before the command (e.g. pre-roll). No-op by default."""
+
+    def process(self, frame):
+        """Feed one raw PCM frame; return True when the endpoint is reached."""
+        return self.process_batch(frames_to_array(frame, self.frame_length)) >= 0
+
+    def process_batch(self, frames):
+        """
+        Feed a batch of frames.
+
+        :return: Index of the frame in the batch at which the endpoint was reached, or -1.
+        """
+        if self.end_reason is not None:
+            return 0
+        rms, zcr = frame_features(frames)
+        max_frames = self.seconds_to_frames(self.max_duration)
+        for i in range(len(rms)):
+            ended = self._step(float(rms[i]), float(zcr[i]))
+            self.frames_seen += 1
+            if not ended and self.frames_seen >= max_frames:
+                self.end_reason = "max_duration"
+                ended = True
+            if ended:
+                return i
+        return -1
+
+    def _step(self, rms, zcr):
+        raise NotImplementedError
+
+
+class FixedThresholdEndpointer(Endpointer):
+    """The original recorder logic: fixed RMS threshold and a fixed silence window."""
+
+    def __init__(self, threshold=100, trailing_silence=1.5, **kwargs):
+        self.threshold = threshold
+        self.trailing_silence = trailing_silence
+        super().__init__(**kwargs)
+
+    def reset(self):
+        super().reset()
+        self.silent_frames = 0
+
+    def _step(self, rms, zcr):
+        if rms > self.threshold:
+            self.silent_frames = 0
+            self.speech_started = True
+            self.last_speech_frame = self.frames_seen
+        elif self.speech_started:
+            self.silent_frames += 1
+
+        if self.silent_frames > self.seconds_to_frames(self.trailing_silence):
+            self.end_reason = "silence"
+            return True
+        return False
+
+
+class AdaptiveEndpointer(Endpointer):
+    """
+    Energy + zero-crossing endpointer with an adaptive noise floor.
+
+    A frame counts as speech when its energy is `speech_ratio` times above the
+    tracked noise floor, or `fricative_ratio` times above it with a high
+    zero-crossing rate (unvoiced sounds like "s"/"f" are quiet but noisy).
+    The floor follows quieter frames quickly and louder non-speech frames
+    slowly, so a fan or a TV raises it instead of keeping the recorder open.
+    The recording ends after `trailing_silence` seconds without speech.
+    """
+
+    def __init__(self, trailing_silence=0.7, speech_ratio=3.0, fricative_ratio=1.8, fricative_zcr=0.3,
+                 min_floor=30.0, onset_seconds=0.1, no_speech_timeout=5.0,
+                 floor_rise=0.02, floor_fall=0.3, **kwargs):
+        self.trailing_silence = trailing_silence
+        self.speech_ratio = speech_ratio
+        self.fricative_ratio = fricative_ratio
+        self.fricative_zcr = fricative_zcr
+        self.min_floor = min_floor
+        self.onset_seconds = onset_seconds
+        self.no_speech_timeout = no_speech_timeout
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.noise_floor = None
+        super().__init__(**kwargs)
+
+    def reset(self):
+        super().reset()
+        self.onset_run = 0
+        self.silence_run = 0
+        # Reseeded by prime() or the first frame; the last command's floor may be stale
+        self.noise_floor = None
+
+    def prime(self, frames):
+        """Seed the noise floor from the quieter part of already captured audio."""
+        if len(frames) == 0:
+            return
+        rms, _ = frame_features(frames)
+        self.noise_floor = max(float(np.percentile(rms, 20)), self.min_floor)
+
+    def is_speech(self, rms, zcr):
+        floor = self.noise_floor
+        return rms > floor * self.speech_ratio or (zcr >= self.fricative_zcr and rms > floor * self.fricative_ratio)
+
+    def _update_floor(self, rms):
+        rate = self.floor_fall if rms < self.noise_floor else self.floor_rise
+        self.noise_floor = max(self.noise_floor + rate * (rms - self.noise_floor), self.min_floor)
+
+    def _step(self, rms, zcr):
+        if self.noise_floor is None:
+            self.noise_floor = max(rms, self.min_floor)
+
+        if self.is_speech(rms, zcr):
+            self.silence_run = 0
+            self.onset_run += 1
+            if self.onset_run >= self.seconds_to_frames(self.onset_seconds):
+                self.speech_started = True
+            if self.speech_started:
+                self.last_speech_frame = self.frames_seen
+        else:
+            self.onset_run = 0
+            self.silence_run += 1
+            self._update_floor(rms)
+
+        if self.speech_started:
+            if self.silence_run >= self.seconds_to_frames(self.trailing_silence):
+                self.end_reason = "silence"
+                return True
+        elif self.frames_seen + 1 >= self.seconds_to_frames(self.no_speech_timeout):
+            self.end_reason = "no_speech"
+            return True
+        return False
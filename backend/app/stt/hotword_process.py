@@ -0,0 +1,211 @@
+# Runs microphone capture and Porcupine in a separate process so LLM calls,
+# PDF parsing and TTS in the main process (all fighting over the GIL) can never
+# delay frame reads or wake-word detection.
+#
+# The child writes every frame into a shared-memory ring (SharedFrameRing) and
+# sends the ring position of each detection over a queue. The main process
+# records commands straight from the ring, exactly like it does from the
+# in-process AudioRingBuffer.
+
+import multiprocessing as mp
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+
+class SharedFrameRing:
+    """
+    Fixed-size frames in a shared-memory block, with one writer process.
+
+    Layout: an int64 write position followed by `capacity` frame slots. The
+    writer copies a frame into its slot before publishing the new position, so
+    readers only ever see complete frames. Readers keep a safety margin from
+    the slot being overwritten, and check the write position again after
+    copying a frame in case the writer lapped them meanwhile.
+    """
+
+    HEADER_BYTES = 8
+
+    def __init__(self, capacity, frame_bytes, condition, name=None, create=False):
+        self.capacity = capacity
+        self.frame_bytes = frame_bytes
+        self.condition = condition
+        # The child attaches with the parent's resource tracker (fork and spawn both
+        # hand it down), which already tracks the block; the parent unlinks it.
+        options = {"track": False} if not create and sys.version_info >= (3, 13) else {}
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=self.HEADER_BYTES + capacity * frame_bytes, **options
+        )
+        self._position = self.shm.buf[:self.HEADER_BYTES].cast("q")
+        self._slots = self.shm.buf[self.HEADER_BYTES:]
+        if create:
+            self._position[0] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def push(self, frame):
+        position = self._position[0]
+        offset = (position % self.capacity) * self.frame_bytes
+        self._slots[offset:offset + self.frame_bytes] = frame
+        self._position[0] = position + 1
+        with self.condition:
+            self.condition.notify_all()
+
+    def position(self):
+        return self._position[0]
+
+    def oldest_position(self):
+        return max(self._position[0] - self.capacity + 2, 0)
+
+    def _frame(self, position):
+        """The frame at `position`, or None if the writer reused its slot during the copy."""
+        offset = (position % self.capacity) * self.frame_bytes
+        frame = bytes(self._slots[offset:offset + self.frame_bytes])
+        # The slot is rewritten for position + capacity, which starts once the
+        # write position gets there
+        if self._position[0] >= position + self.capacity:
+            return None
+        return frame
+
+    def frames_between(self, start, end):
+        start = max(start, self.oldest_position())
+        end = min(end, self.position())
+        frames = [self._frame(p) for p in range(start, end)]
+        return [frame for frame in frames if frame is not None]
+
+    def read(self, position, timeout=None):
+        """Same contract as AudioRingBuffer.read: (frame, next_position) or (None, position) on timeout."""
+        if position >= self.position():
+            with self.condition:
+                if not self.condition.wait_for(lambda: position < self.position(), timeout=timeout):
+                    return None, position
+        while True:
+            position = max(position, self.oldest_position())
+            frame = self._frame(position)
+            if frame is not None:
+                return frame, position + 1
+
+    def close(self, unlink=False):
+        self._position.release()
+        self._slots.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _capture_worker(access_key, keyword_path, buffer_seconds, condition, control, wake_events, stop_event):
+    import pvporcupine
+    import pyaudio
+
+    porcupine = pvporcupine.create(access_key=access_key, keyword_paths=[keyword_path])
+    frame_length = porcupine.frame_length
+    capacity = int(buffer_seconds * porcupine.sample_rate / frame_length)
+
+    # Tell the parent the audio format, then attach to the ring it creates.
+    control.send((porcupine.sample_rate, frame_length, capacity))
+    ring = SharedFrameRing(capacity, frame_length * SAMPLE_WIDTH, condition, name=control.recv())
+
+    pa = pyaudio.PyAudio()
+
+    def open_stream():
+        return pa.open(
+            rate=porcupine.sample_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            frames_per_buffer=frame_length,
+        )
+
+    stream = open_stream()
+    try:
+        while not stop_event.is_set():
+            try:
+                pcm = stream.read(frame_length, exception_on_overflow=False)
+                ring.push(pcm)
+                result = porcupine.process(memoryview(pcm).cast("h"))
+            except Exception:
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+                time.sleep(0.1)
+                stream = open_stream()
+                continue
+
+            if result >= 0:
+                wake_events.put(ring.position())
+    finally:
+        stream.close()
+        pa.terminate()
+        porcupine.delete()
+        ring.close()
+
+
+class HotwordProcess:
+    """
+    Owns the capture/hotword child process and the shared ring it fills.
+
+    The child is spawned, so it imports the entry script again: scripts that
+    use it must build the assistant under `if __name__ == "__main__":`.
+
+    :param access_key: Picovoice access key.
+    :param keyword_path: Porcupine .ppn keyword file.
+    :param buffer_seconds: Audio history kept in the ring.
+    """
+
+    def __init__(self, access_key, keyword_path, buffer_seconds=15):
+        self.access_key = access_key
+        self.keyword_path = keyword_path
+        self.buffer_seconds = buffer_seconds
+        self.process = None
+        self.ring = None
+        self.wake_events = None
+        self.sample_rate = None
+        self.frame_length = None
+
+    def start(self, timeout=15.0):
+        # spawn, not fork: the main process already runs threads (scheduler,
+        # executors, warm-up), and a forked child can inherit their locks held.
+        ctx = mp.get_context("spawn")
+        condition = ctx.Condition()
+        parent_conn, child_conn = ctx.Pipe()
+        self.wake_events = ctx.Queue()
+        self._stop_event = ctx.Event()
+        self.process = ctx.Process(
+            target=_capture_worker,
+            args=(self.access_key, self.keyword_path, self.buffer_seconds, condition,
+                  child_conn, self.wake_events, self._stop_event),
+            daemon=True,
+        )
+        self.process.start()
+
+        if not parent_conn.poll(timeout):
+            self.stop()
+            raise RuntimeError("Hotword process did not start.")
+        self.sample_rate, self.frame_length, capacity = parent_conn.recv()
+        self.ring = SharedFrameRing(capacity, self.frame_length * SAMPLE_WIDTH, condition, create=True)
+        parent_conn.send(self.ring.name)
+        return self
+
+    def next_wake(self, timeout=None):
+        """Ring position of the next detection, or None on timeout."""
+        try:
+            return self.wake_events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        if self.process is not None:
+            self._stop_event.set()
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+        if self.ring is not None:
+            self.ring.close(unlink=True)
+            self.ring = None
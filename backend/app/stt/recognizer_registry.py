@@ -0,0 +1,250 @@
+# Registry of speech recognizers and a hedged recognizer that races the same
+# audio on several of them: the first acceptable transcript from the best-ranked
+# backend, or from any backend sure enough of it, wins and the slower calls are
+# cancelled (or ignored once they are already on the wire).
+#
+#   registry = default_registry()
+#   hedged = HedgedRecognizer(registry, max_parallel=2)
+#   text = hedged.recognize(audio_data)
+#   print(registry.stats())
+
+import collections
+import importlib.util
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import speech_recognition as sr
+
+
+class BackendStats:
+    """Latency and outcome counters for one recognizer backend."""
+
+    def __init__(self, window=50, alpha=0.2):
+        self.alpha = alpha
+        self.recent = collections.deque(maxlen=window)
+        self.ewma_ms = None
+        self.calls = 0
+        self.wins = 0
+        self.failures = 0
+        self.cancelled = 0
+        # Calls of one backend finish on several executor threads at once
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms, ok):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self.recent.append(latency_ms)
+            self.ewma_ms = latency_ms if self.ewma_ms is None else self.ewma_ms + self.alpha * (latency_ms - self.ewma_ms)
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def record_cancelled(self):
+        with self._lock:
+            self.cancelled += 1
+
+    def percentile(self, pct):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    @property
+    def failure_rate(self):
+        return self.failures / self.calls if self.calls else 0.0
+
+    def expected_ms(self, failure_penalty_ms=2000.0):
+        """Score used for ranking: typical latency plus a penalty for how often the backend fails."""
+        if self.ewma_ms is None:
+            return 0.0  # untried backends get raced so they collect stats
+        return self.ewma_ms + failure_penalty_ms * self.failure_rate
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "wins": self.wins,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "ewma_ms": self.ewma_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+        }
+
+
+class RecognizerRegistry:
+    def __init__(self):
+        self._backends = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, recognize):
+        """
+        :param name: Backend name used in stats and logs.
+        :param recognize: Callable taking sr.AudioData and returning text, or
+                          (text, confidence) if the engine reports one; raises
+                          sr.UnknownValueError when nothing was understood.
+        """
+        with self._lock:
+            self._backends[name] = recognize
+            self._stats.setdefault(name, BackendStats())
+
+    def unregister(self, name):
+        with self._lock:
+            self._backends.pop(name, None)
+
+    def get(self, name):
+        return self._backends[name]
+
+    def names(self):
+        return list(self._backends)
+
+    def stats_for(self, name):
+        return self._stats[name]
+
+    def ranked(self):
+        """Backend names, fastest expected first."""
+        with self._lock:
+            return sorted(self._backends, key=lambda name: self._stats[name].expected_ms())
+
+    def stats(self):
+        with self._lock:
+            return {name: self._stats[name].as_dict() for name in self._backends}
+
+
+def _transcript(result):
+    """(text, confidence) from a backend result; confidence is None if not reported."""
+    if isinstance(result, tuple):
+        return result
+    return result, None
+
+
+class HedgedRecognizer:
+    """
+    Races one clip on the `max_parallel` best-ranked backends.
+
+    A transcript from the best-ranked backend wins as soon as it arrives. Others
+    only win with a reported confidence of at least `min_confidence`; an unsure
+    one is kept and returned only if no better backend comes up with a result.
+
+    :param hedge_after_ms: If set, only the best backend starts right away; the
+                           others join if it has not answered after this long.
+    :param accept: Predicate on a transcript; rejected results do not win.
+    :param min_confidence: Confidence a lower-ranked backend needs to win outright.
+    :param timeout: Seconds to wait for any acceptable result.
+    """
+
+    def __init__(self, registry, max_parallel=2, hedge_after_ms=None, accept=None, min_confidence=0.8, timeout=8.0):
+        self.registry = registry
+        self.max_parallel = max_parallel
+        self.hedge_after_ms = hedge_after_ms
+        self.accept = accept or (lambda text: bool(text and text.strip()))
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(4, max_parallel * 2), thread_name_prefix="stt-hedged")
+
+    def _call(self, name, audio):
+        stats = self.registry.stats_for(name)
+        started = time.perf_counter()
+        try:
+            text = self.registry.get(name)(audio)
+        except Exception:
+            stats.record((time.perf_counter() - started) * 1000, ok=False)
+            raise
+        stats.record((time.perf_counter() - started) * 1000, ok=True)
+        return text
+
+    def _win(self, name, text, started):
+        self.registry.stats_for(name).record_win()
+        print(f"[STT] {name} won in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return text
+
+    def recognize(self, audio):
+        candidates = self.registry.ranked()[:self.max_parallel]
+        if not candidates:
+            raise RuntimeError("No speech recognizers registered.")
+
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        pending = {}
+        waiting = list(candidates)
+
+        def launch(count):
+            for _ in range(count):
+                if waiting:
+                    name = waiting.pop(0)
+                    pending[self._executor.submit(self._call, name, audio)] = name
+
+        launch(1 if self.hedge_after_ms is not None else len(waiting))
+
+        last_error = None
+        # Best-ranked unsure result so far: (rank, name, text)
+        fallback = None
+        try:
+            while pending:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                wait_for = remaining
+                if waiting:
+                    hedge_at = started + self.hedge_after_ms / 1000
+                    wait_for = max(min(remaining, hedge_at - time.perf_counter()), 0)
+
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                if not done and waiting:
+                    launch(len(waiting))
+                    continue
+
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        text, confidence = _transcript(future.result())
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if not self.accept(text):
+                        continue
+                    rank = candidates.index(name)
+                    if rank == 0 or (confidence is not None and confidence >= self.min_confidence):
+                        return self._win(name, text, started)
+                    # Wait for the better-ranked backends before settling for this one
+                    if fallback is None or rank < fallback[0]:
+                        fallback = (rank, name, text)
+
+                if not pending and waiting:
+                    launch(len(waiting))
+        finally:
+            for future, name in pending.items():
+                future.cancel()
+                self.registry.stats_for(name).record_cancelled()
+
+        if fallback is not None:
+            return self._win(fallback[1], fallback[2], started)
+        if last_error is not None and not isinstance(last_error, sr.UnknownValueError):
+            raise last_error
+        raise sr.UnknownValueError()
+
+
+def google_with_confidence(recognizer):
+    """recognize_google returning (text, confidence) of its best alternative."""
+    def recognize(audio):
+        result = recognizer.recognize_google(audio, show_all=True)
+        if not isinstance(result, dict) or not result.get("alternative"):
+            raise sr.UnknownValueError()
+        best = result["alternative"][0]
+        return best["transcript"], best.get("confidence")
+    return recognize
+
+
+def default_registry(recognizer=None):
+    """Google Web Speech, plus CMU Sphinx as a local engine when pocketsphinx is installed."""
+    recognizer = recognizer or sr.Recognizer()
+    registry = RecognizerRegistry()
+    registry.register("google", google_with_confidence(recognizer))
+    if importlib.util.find_spec("pocketsphinx") is not None:
+        registry.register("sphinx", recognizer.recognize_sphinx)
+    return registry
+
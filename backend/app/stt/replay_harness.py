@@ -0,0 +1,179 @@
+# Headless end-to-end runs of the voice pipeline on recorded fixtures, reporting
+# wake -> endpoint -> transcript -> dispatch latency per command.
+#
+# Usage (from backend/):
+#   python -m app.stt.replay_harness fixtures/ --speed 4
+#   python -m app.stt.replay_harness fixtures/open_whatsapp.wav --recognizer google --dispatch classify
+#
+# Each fixture is a 16 kHz mono 16-bit WAV with an optional sidecar
+# `<name>.json`:
+#   {"wake_at": [0.8], "transcript": "open whatsapp"}
+# `wake_at` lists the audio times at which the wake word ends; without it
+# Porcupine (PICOVOICE_ACCESS_KEY) detects the wake word in the audio.
+# `transcript` feeds the offline recognizer and is compared with the result.
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from app.stt.audio_source import ScheduledWakeDetector, WavFileSource
+from app.stt.streaming_recognizer import GoogleStreamingBackend, ScriptedStreamingBackend, StreamingBackend
+from app.stt.voice_recognition import VoiceAssistant
+
+
+class TimedBackend(StreamingBackend):
+    """Wraps a backend to timestamp the moment recording closes (finish is called)."""
+
+    def __init__(self, inner, on_endpoint):
+        self.inner = inner
+        self.name = inner.name
+        self.on_endpoint = on_endpoint
+
+    def start(self, sample_rate, sample_width, on_partial=None):
+        session = self.inner.start(sample_rate, sample_width, on_partial)
+        finish = session.finish
+
+        def timed_finish(timeout=None):
+            self.on_endpoint()
+            return finish(timeout)
+
+        session.finish = timed_finish
+        return session
+
+
+def load_sidecar(path):
+    sidecar = os.path.splitext(path)[0] + ".json"
+    if not os.path.exists(sidecar):
+        return {}
+    with open(sidecar) as f:
+        return json.load(f)
+
+
+def make_dispatch(mode):
+    if mode == "none":
+        return lambda text: None
+    from app.models.groq_preprocess import cached_process_query
+    if mode == "classify":
+        return cached_process_query
+    from app.query_processor import determine_function
+    # determine_function only queues the handler; wait for it like a live command would
+    return lambda text: determine_function(cached_process_query(text)).result()
+
+
+def run_fixture(path, recognizer="scripted", dispatch=None, speed=1.0):
+    """
+    Replay one fixture through VoiceAssistant.
+
+    :return: List of per-command dicts with timestamps (perf_counter seconds) and results.
+    """
+    meta = load_sidecar(path)
+    dispatch = dispatch or (lambda text: None)
+    commands = []
+
+    def current():
+        return commands[-1] if commands else None
+
+    def on_wake():
+        commands.append({"fixture": os.path.basename(path), "wake": time.perf_counter()})
+
+    def on_endpoint():
+        if current() is not None:
+            current()["endpoint"] = time.perf_counter()
+
+    def on_recognized(text):
+        command = current()
+        if command is None:
+            return
+        command["transcript_at"] = time.perf_counter()
+        command["transcript"] = text
+        command["intent"] = dispatch(text)
+        command["dispatch"] = time.perf_counter()
+
+    if recognizer == "google":
+        backend = GoogleStreamingBackend()
+    else:
+        backend = ScriptedStreamingBackend(meta.get("transcript", ""))
+
+    detector = None
+    if meta.get("wake_at") is not None:
+        detector = ScheduledWakeDetector(meta["wake_at"])
+
+    assistant = VoiceAssistant(
+        cooldown_seconds=0,
+        on_recognized=on_recognized,
+        on_partial=lambda text: None,
+        on_wake=on_wake,
+        audio_source=WavFileSource(path, speed=speed),
+        hotword_detector=detector,
+        streaming_backend=TimedBackend(backend, on_endpoint),
+    )
+    assistant.start_hotword_listener()
+    assistant.wait_until_idle()
+
+    expected = meta.get("transcript")
+    for command in commands:
+        if expected is not None and command.get("transcript") is not None:
+            command["match"] = command["transcript"].strip().lower() == expected.strip().lower()
+    return commands
+
+
+def _ms(command, start, end):
+    if start in command and end in command:
+        return (command[end] - command[start]) * 1000
+    return None
+
+
+def summarize(command):
+    return {
+        "fixture": command["fixture"],
+        "transcript": command.get("transcript"),
+        "match": command.get("match"),
+        "wake_to_endpoint_ms": _ms(command, "wake", "endpoint"),
+        "endpoint_to_transcript_ms": _ms(command, "endpoint", "transcript_at"),
+        "transcript_to_dispatch_ms": _ms(command, "transcript_at", "dispatch"),
+        "wake_to_dispatch_ms": _ms(command, "wake", "dispatch"),
+    }
+
+
+def print_report(rows, speed):
+    def fmt(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    print(f"Replay speed: {speed}x (wake->endpoint scales with speed, the other stages do not)")
+    print(f"{'fixture':<28}{'wake>end':>10}{'end>text':>10}{'text>disp':>10}{'total':>8}  transcript")
+    for row in rows:
+        mark = "" if row["match"] is None else (" ok" if row["match"] else " MISMATCH")
+        print(f"{row['fixture']:<28}{fmt(row['wake_to_endpoint_ms']):>10}{fmt(row['endpoint_to_transcript_ms']):>10}"
+              f"{fmt(row['transcript_to_dispatch_ms']):>10}{fmt(row['wake_to_dispatch_ms']):>8}  "
+              f"{row['transcript'] or '(none)'}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay WAV fixtures through the voice pipeline.")
+    parser.add_argument("fixtures", nargs="+", help="WAV files or directories of WAV files")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1 = real time, 0 = unpaced)")
+    parser.add_argument("--recognizer", choices=["scripted", "google"], default="scripted")
+    parser.add_argument("--dispatch", choices=["none", "classify", "execute"], default="none",
+                        help="what to do with the transcript: nothing, classify it, or run the command")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    paths = []
+    for entry in args.fixtures:
+        paths.extend(sorted(glob.glob(os.path.join(entry, "*.wav"))) if os.path.isdir(entry) else [entry])
+
+    dispatch = make_dispatch(args.dispatch)
+    rows = []
+    for path in paths:
+        rows.extend(summarize(command) for command in run_fixture(path, args.recognizer, dispatch, args.speed))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_report(rows, args.speed)
+
+
+if __name__ == "__main__":
+    main()
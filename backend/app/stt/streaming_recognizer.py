@@ -0,0 +1,235 @@
+# Streaming speech recognition: the recorder pushes audio chunks while the user
+# is still speaking and gets partial transcripts back, so the final transcript
+# is (nearly) ready when the endpointer closes the recording.
+#
+# A backend creates one session per utterance:
+#
+#   session = backend.start(sample_rate, sample_width, on_partial=print)
+#   session.push(chunk)            # for every captured frame
+#   session.set_speaking(False)    # hint from the endpointer: speech just paused
+#   text = session.finish()        # final transcript, or None if nothing was understood
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+# Shared by all buffered sessions for their speculative recognitions.
+_speculative_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stt-speculative")
+# Seconds of captured audio a pause must last before it is worth a recognizer call;
+# shorter gaps are usually just between words.
+SPECULATIVE_MIN_PAUSE = 0.25
+
+
+class StreamingSession:
+    def __init__(self, sample_rate, sample_width, on_partial=None):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.on_partial = on_partial
+
+    def push(self, chunk):
+        raise NotImplementedError
+
+    def set_speaking(self, speaking):
+        """Endpointer hint: False when speech just paused, True when it resumed."""
+
+    def finish(self, timeout=None):
+        raise NotImplementedError
+
+    def cancel(self):
+        """Drop the utterance without producing a transcript."""
+
+    def _emit_partial(self, text):
+        if self.on_partial and text:
+            self.on_partial(text)
+
+
+class StreamingBackend:
+    name = "base"
+
+    def start(self, sample_rate, sample_width, on_partial=None):
+        raise NotImplementedError
+
+
+class BufferedSession(StreamingSession):
+    """
+    Session for batch recognizers (one call per clip).
+
+    Whenever speech pauses for `min_pause` seconds, the audio so far is sent to
+    the recognizer in the background. If the user does not speak again, that
+    result becomes the final transcript, so the network round trip overlaps the
+    endpointer's trailing silence instead of starting after it. A session has at
+    most one recognizer call in flight.
+    """
+
+    def __init__(self, recognize, sample_rate, sample_width, on_partial=None, min_pause=SPECULATIVE_MIN_PAUSE):
+        super().__init__(sample_rate, sample_width, on_partial)
+        self._recognize = recognize
+        self._chunks = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pause_bytes = int(min_pause * sample_rate) * sample_width
+        self._paused_at = None  # bytes captured when speech paused; None while speaking
+        self._speculative = None  # future for the audio up to the latest pause
+        self._in_flight = None  # the session's latest call, possibly superseded but still running
+        self._cancelled = False
+
+    def push(self, chunk):
+        with self._lock:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            if self._should_speculate():
+                audio = sr.AudioData(b''.join(self._chunks), self.sample_rate, self.sample_width)
+                self._speculative = self._in_flight = _speculative_executor.submit(self._run, audio)
+
+    def _should_speculate(self):
+        return (self._paused_at is not None and self._speculative is None and not self._cancelled
+                and self._size - self._paused_at >= self._pause_bytes
+                and (self._in_flight is None or self._in_flight.done()))
+
+    def _audio(self):
+        with self._lock:
+            return sr.AudioData(b''.join(self._chunks), self.sample_rate, self.sample_width)
+
+    def _run(self, audio):
+        text = self._recognize(audio)
+        if not self._cancelled:
+            self._emit_partial(text)
+        return text
+
+    def set_speaking(self, speaking):
+        with self._lock:
+            if speaking:
+                # More speech is coming; whatever is in flight is now only a partial.
+                self._paused_at = None
+                self._drop_speculative()
+            elif self._paused_at is None:
+                # Recognized once the pause has lasted min_pause (see push)
+                self._paused_at = self._size
+
+    def _drop_speculative(self):
+        if self._speculative is not None:
+            # Only stops the call if it has not started yet
+            self._speculative.cancel()
+            self._speculative = None
+
+    def finish(self, timeout=None):
+        speculative = self._speculative
+        if speculative is not None:
+            try:
+                return speculative.result(timeout=timeout)
+            except sr.UnknownValueError:
+                return None
+            except Exception:
+                pass  # fall back to recognizing the whole clip
+        try:
+            return self._recognize(self._audio())
+        except sr.UnknownValueError:
+            return None
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            self._drop_speculative()
+
+
+class BatchBackend(StreamingBackend):
+    """Wraps any `recognize(audio_data) -> text` callable as a streaming backend."""
+
+    def __init__(self, recognize, name="batch"):
+        self.recognize = recognize
+        self.name = name
+
+    def start(self, sample_rate, sample_width, on_partial=None):
+        return BufferedSession(self.recognize, sample_rate, sample_width, on_partial)
+
+
+class GoogleStreamingBackend(BatchBackend):
+    """The original recognize_google path, with speculative recognition at pauses."""
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+        super().__init__(self.recognizer.recognize_google, name="google")
+
+
+class ScriptedSession(StreamingSession):
+    def __init__(self, transcript, words_per_second, sample_rate, sample_width, on_partial=None):
+        super().__init__(sample_rate, sample_width, on_partial)
+        self._transcript = transcript
+        self._words_per_second = words_per_second
+        self._chunks = []
+        self._revealed = 0
+
+    def _final_text(self):
+        if callable(self._transcript):
+            return self._transcript(b''.join(self._chunks))
+        return self._transcript
+
+    def push(self, chunk):
+        self._chunks.append(chunk)
+        if callable(self._transcript):
+            return
+        seconds = sum(len(c) for c in self._chunks) / (self.sample_rate * self.sample_width)
+        words = self._transcript.split()
+        revealed = min(int(seconds * self._words_per_second), len(words))
+        if revealed > self._revealed:
+            self._revealed = revealed
+            self._emit_partial(" ".join(words[:revealed]))
+
+    def finish(self, timeout=None):
+        return self._final_text() or None
+
+
+class ScriptedStreamingBackend(StreamingBackend):
+    """
+    Offline stand-in for tests and replays: returns a known transcript.
+
+    :param transcript: Final text, or a callable taking the raw PCM bytes of the
+                       utterance and returning the text.
+    :param words_per_second: Pace at which partials reveal a string transcript.
+    """
+    name = "scripted"
+
+    def __init__(self, transcript, words_per_second=2.5):
+        self.transcript = transcript
+        self.words_per_second = words_per_second
+
+    def start(self, sample_rate, sample_width, on_partial=None):
+        return ScriptedSession(self.transcript, self.words_per_second, sample_rate, sample_width, on_partial)
+
+
+class VoskSession(StreamingSession):
+    def __init__(self, recognizer, sample_rate, sample_width, on_partial=None):
+        super().__init__(sample_rate, sample_width, on_partial)
+        self._recognizer = recognizer
+        self._segments = []
+
+    def push(self, chunk):
+        if self._recognizer.AcceptWaveform(chunk):
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            if text:
+                self._segments.append(text)
+                self._emit_partial(" ".join(self._segments))
+        else:
+            partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+            self._emit_partial(" ".join(self._segments + [partial]).strip())
+
+    def finish(self, timeout=None):
+        text = json.loads(self._recognizer.FinalResult()).get("text", "")
+        if text:
+            self._segments.append(text)
+        return " ".join(self._segments) or None
+
+
+class VoskStreamingBackend(StreamingBackend):
+    """Fully local streaming recognition with Vosk (optional dependency: pip install vosk)."""
+    name = "vosk"
+
+    def __init__(self, model_path):
+        from vosk import Model, KaldiRecognizer
+        self._model = Model(model_path)
+        self._recognizer_class = KaldiRecognizer
+
+    def start(self, sample_rate, sample_width, on_partial=None):
+        return VoskSession(self._recognizer_class(self._model, sample_rate), sample_rate, sample_width, on_partial)
@@ -2,16 +2,20 @@ import threading
 import datetime
 import os
 import time
-import pvporcupine
-import pyaudio
-import struct
-import wave
+import queue
+import uuid
 import speech_recognition as sr
 import logging
 import sys
-import audioop
 from dotenv import load_dotenv
 
+from app.stt.audio_buffer import AudioRingBuffer
+from app.stt.endpointer import AdaptiveEndpointer, frames_to_array
+from app.stt.streaming_recognizer import GoogleStreamingBackend
+from app.stt.hotword_process import SAMPLE_WIDTH, HotwordProcess
+from app.stt.audio_source import MicrophoneSource
+from app.stt.audio_journal import AudioJournal
+
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
@@ -25,6 +29,8 @@ load_dotenv(dotenv_path)
 class VoiceAssistant:
     @staticmethod
     def list_input_devices():
+        import pyaudio
+
         pa = pyaudio.PyAudio()
         for i in range(pa.get_device_count()):
             info = pa.get_device_info_by_index(i)
@@ -32,186 +38,273 @@ class VoiceAssistant:
                 print(f"ID {i}: {info['name']}")
         pa.terminate()
 
-    def cleanup_old_recordings(self, folder="recordings", max_age_minutes=1):
-        now = time.time()
-        max_age_seconds = max_age_minutes * 60
-        if not os.path.exists(folder):
-            return
-        for filename in os.listdir(folder):
-            filepath = os.path.join(folder, filename)
-            if filename.endswith(".wav"):
-                file_age = now - os.path.getmtime(filepath)
-                if file_age > max_age_seconds:
-                    try:
-                        os.remove(filepath)
-                        print(f"Deleted old recording: {filename}")
-                    except Exception as e:
-                        print(f"Could not delete {filename}: {e}")
-
-    def __init__(self, hotword="vision", record_duration=6, cooldown_seconds=2, on_recognized=None):
+    def __init__(self, hotword="vision", record_duration=6, cooldown_seconds=2, on_recognized=None,
+                 save_recordings=False, recordings_dir="recordings", preroll_seconds=0.3, buffer_seconds=15,
+                 endpointer=None, streaming_backend=None, on_partial=None, hotword_in_subprocess=False,
+                 keyword_path=None, audio_source=None, hotword_detector=None, on_wake=None, audio_journal=None):
         self.hotword = hotword
         self.record_duration = record_duration
         self.cooldown_seconds = cooldown_seconds
+        # Captured audio is handed to the recognizer in memory; keeping it is an
+        # opt-in debug journal (compressed, bounded) written off the command thread.
+        self.save_recordings = save_recordings or audio_journal is not None
+        self.recordings_dir = recordings_dir
+        self.audio_journal = audio_journal or (AudioJournal(recordings_dir) if save_recordings else None)
+        # Id of the command being recorded/recognized; journal entries are keyed by it.
+        self.command_id = None
+        self.preroll_seconds = preroll_seconds
         self.recognizer = sr.Recognizer()
         self.listening_lock = threading.Lock()
         self.on_recognized = on_recognized or self.default_command_handler
-
-        access_key = os.getenv("PICOVOICE_ACCESS_KEY")
-        if not access_key:
-            raise ValueError("Missing Picovoice access key. Set PICOVOICE_ACCESS_KEY in your .env file.")
-
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        # get the vision wake word
-        keyword_path = "/mnt/d/projects/MYPROJECTS/Dev-Assistant/vision_wake_word/vision_en_linux_v3_0_0.ppn"
-        # print(keyword_path)
-        if not os.path.exists(keyword_path):
-            raise FileNotFoundError(f"Keyword file not found at {keyword_path}")
-
-        self.porcupine = pvporcupine.create(
-            access_key=access_key,
-            keyword_paths=[keyword_path]
-        )
-
-        self.pa = pyaudio.PyAudio()
-        self.stream = self.pa.open(
-            rate=self.porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=self.porcupine.frame_length,
+        self.on_partial = on_partial or self.default_partial_handler
+        self.on_wake = on_wake
+        # Audio is streamed to the recognizer while it is being captured.
+        self.streaming_backend = streaming_backend or GoogleStreamingBackend(self.recognizer)
+
+        self._trigger_queue = queue.Queue()
+        self._command_worker = None
+        self._stop_event = threading.Event()
+
+        if hotword_in_subprocess and (audio_source or hotword_detector):
+            raise ValueError("hotword_in_subprocess always captures from the microphone with Porcupine.")
+
+        if hotword_in_subprocess or hotword_detector is None:
+            access_key = os.getenv("PICOVOICE_ACCESS_KEY")
+            if not access_key:
+                raise ValueError("Missing Picovoice access key. Set PICOVOICE_ACCESS_KEY in your .env file.")
+
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            # get the vision wake word
+            keyword_path = keyword_path or os.getenv("VISION_KEYWORD_PATH") or os.path.join(
+                project_root, "vision_wake_word", "vision_en_linux_v3_0_0.ppn"
+            )
+            if not os.path.exists(keyword_path):
+                raise FileNotFoundError(f"Keyword file not found at {keyword_path}")
+
+        if hotword_in_subprocess:
+            # Capture and Porcupine run in their own process and fill a shared-memory
+            # ring, so a busy main process cannot cause missed wake words or overflows.
+            self.hotword_process = HotwordProcess(access_key, keyword_path, buffer_seconds).start()
+            self.porcupine = None
+            self.audio_source = None
+            self.sample_rate = self.hotword_process.sample_rate
+            self.frame_length = self.hotword_process.frame_length
+            self.audio_buffer = self.hotword_process.ring
+        else:
+            self.hotword_process = None
+            # Anything with Porcupine's process/sample_rate/frame_length/delete
+            # interface can detect the wake word (e.g. ScheduledWakeDetector in replays).
+            if hotword_detector is None:
+                # Imported here so replays and tests run without Porcupine or PyAudio
+                import pvporcupine
+
+                hotword_detector = pvporcupine.create(
+                    access_key=access_key,
+                    keyword_paths=[keyword_path]
+                )
+            self.porcupine = hotword_detector
+            self.sample_rate = self.porcupine.sample_rate
+            self.frame_length = self.porcupine.frame_length
+            self.audio_source = audio_source or MicrophoneSource(self.sample_rate, self.frame_length)
+
+            # The hotword stream is the only capture stream: every frame it reads is
+            # kept here so the command recorder can start from before the wake word
+            # ended instead of opening a second stream.
+            frames_per_second = self.sample_rate / self.frame_length
+            self.audio_buffer = AudioRingBuffer(max_frames=int(buffer_seconds * frames_per_second))
+
+        # Decides when the command is over; any Endpointer can be plugged in.
+        self.endpointer = endpointer or AdaptiveEndpointer(
+            sample_rate=self.sample_rate,
+            frame_length=self.frame_length,
         )
 
     def _beep(self):
         print('\a', end='', flush=True)
 
-    def _record_audio_dynamic(self):
+    def _record_audio_dynamic(self, start_position, session=None, detected_position=None):
+        """
+        :param start_position: First frame to record (the pre-roll before the detection).
+        :param detected_position: Where the wake word was detected. Frames before it are
+                                  recorded but not endpointed: they hold the end of the wake
+                                  word, which must not count as the start of the command.
+        """
         print("Listening for command...")
-        os.makedirs("recordings", exist_ok=True)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"recordings/voice_{timestamp}.wav"
-
-        RATE = 16000
-        CHUNK = 1024
-        SILENCE_THRESHOLD = 100  # Adjust based on testing
-        MAX_SILENCE_CHUNKS = int(1.5 * RATE / CHUNK)  # 1.2 sec of silence
-        MAX_RECORD_SECONDS = 10
-
-        stream = self.pa.open(format=pyaudio.paInt16,
-                            channels=1,
-                            rate=RATE,
-                            input=True,
-                            frames_per_buffer=CHUNK)
+
+        RATE = self.sample_rate
+        CHUNK = self.frame_length
+        CALIBRATION_CHUNKS = int(1.0 * RATE / CHUNK)  # 1 sec of audio before the pre-roll
+
+        # Seed the noise floor from what the hotword stream heard before the command.
+        calibration_start = max(start_position - CALIBRATION_CHUNKS, self.audio_buffer.oldest_position())
+        history = self.audio_buffer.frames_between(calibration_start, start_position)
+        self.endpointer.reset()
+        self.endpointer.prime(frames_to_array(b''.join(history), CHUNK))
 
         print("Start speaking now...")
         frames = []
-        silent_chunks = 0
-        speaking_started = False
-        start_time = time.time()
+        position = start_position
+        listen_from = start_position if detected_position is None else detected_position
+        paused = False
 
         while True:
-            data = stream.read(CHUNK)
-            rms = audioop.rms(data, 2)  # Root mean square to detect volume
-            frames.append(data)
-
-            if rms > SILENCE_THRESHOLD:
-                silent_chunks = 0
-                speaking_started = True
-            else:
-                if speaking_started:
-                    silent_chunks += 1
-
-            if silent_chunks > MAX_SILENCE_CHUNKS:
-                print("Silence detected, stopping recording.")
+            frame_position = position
+            data, position = self.audio_buffer.read(position, timeout=1.0)
+            if data is None:
+                print("Audio stream stalled, stopping recording.")
                 break
-
-            if time.time() - start_time > MAX_RECORD_SECONDS:
-                print("Max recording time reached.")
+            frames.append(data)
+            if session:
+                session.push(data)
+            # Onset and trailing silence count from the detection on
+            if frame_position < listen_from:
+                continue
+
+            ended = self.endpointer.process(data)
+            if session:
+                if self.endpointer.in_trailing_silence != paused:
+                    paused = self.endpointer.in_trailing_silence
+                    session.set_speaking(not paused)
+
+            if ended:
+                if self.endpointer.end_reason == "silence":
+                    print("Silence detected, stopping recording.")
+                elif self.endpointer.end_reason == "no_speech":
+                    print("No speech detected, stopping recording.")
+                    return None
+                else:
+                    print("Max recording time reached.")
                 break
 
-        stream.stop_stream()
-        stream.close()
-
-        wf = wave.open(filename, 'wb')
-        wf.setnchannels(1)
-        wf.setsampwidth(self.pa.get_sample_size(pyaudio.paInt16))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-
-        return filename
+        if not frames:
+            return None
+        return sr.AudioData(b''.join(frames), RATE, SAMPLE_WIDTH)
 
-    def _recognize_and_execute(self, audio_file):
+    def _recognize_and_execute(self, session):
         try:
-            with sr.AudioFile(audio_file) as source:
-                audio_data = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio_data)
-                print(f"You said: {text}")
-
-                if self.on_recognized:
-                    self.on_recognized(text)
-        except sr.UnknownValueError:
-            print("Couldn't understand what you said.")
+            text = session.finish()
+            if not text:
+                print("Couldn't understand what you said.")
+                return
+            print(f"You said: {text}")
+            if self.audio_journal:
+                self.audio_journal.annotate(self.command_id, transcript=text)
+
+            if self.on_recognized:
+                self.on_recognized(text)
         except Exception as e:
             print(f"Recognition error: {e}")
 
-    def _handle_hotword_trigger(self):
-        def inner():
-            with self.listening_lock:
-                self._beep()
-                filename = self._record_audio_dynamic()
-                if filename:
-                    try:
-                        self._recognize_and_execute(filename)
-                    finally:
-                        self.cleanup_old_recordings()
-                print("Ready for next command...")
-
-        threading.Thread(target=inner, daemon=True).start()
-
-    def _restart_stream(self):
-        print("Restarting audio stream...")
+    def _command_loop(self):
+        while True:
+            start_position, detected_position, self.command_id = self._trigger_queue.get()
+            try:
+                with self.listening_lock:
+                    self._beep()
+                    session = self.streaming_backend.start(
+                        self.sample_rate,
+                        SAMPLE_WIDTH,
+                        on_partial=self.on_partial,
+                    )
+                    audio_data = self._record_audio_dynamic(start_position, session, detected_position)
+                    if audio_data:
+                        if self.audio_journal:
+                            self.audio_journal.record(self.command_id, audio_data,
+                                                      end_reason=self.endpointer.end_reason)
+                        self._recognize_and_execute(session)
+                    else:
+                        session.cancel()
+                    print("Ready for next command...")
+            finally:
+                self._trigger_queue.task_done()
+
+    def _handle_hotword_trigger(self, detected_position=None):
+        # Anchor the recording at the moment of detection, reaching back by the
+        # pre-roll so nothing said while the worker wakes up is clipped.
+        if detected_position is None:
+            detected_position = self.audio_buffer.position()
+        preroll_frames = int(self.preroll_seconds * self.sample_rate / self.frame_length)
+        start_position = max(detected_position - preroll_frames, self.audio_buffer.oldest_position())
+        self._trigger_queue.put((start_position, detected_position, uuid.uuid4().hex[:8]))
+        if self.on_wake:
+            self.on_wake()
+
+    def _should_trigger(self, last_trigger_time):
+        current_time = time.time()
+        return current_time - last_trigger_time >= self.cooldown_seconds and not self.listening_lock.locked()
+
+    def _listen_for_wake_events(self):
+        last_trigger_time = 0
         try:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.stream = self.pa.open(
-                rate=self.porcupine.sample_rate,
-                channels=1,
-                format=pyaudio.paInt16,
-                input=True,
-                frames_per_buffer=self.porcupine.frame_length,
-            )
-        except Exception as e:
-            print(f"Failed to restart stream: {e}")
+            while not self._stop_event.is_set():
+                detected_position = self.hotword_process.next_wake(timeout=1.0)
+                if detected_position is None:
+                    if not self.hotword_process.process.is_alive():
+                        print("Hotword process exited.")
+                        break
+                    continue
+
+                if self._should_trigger(last_trigger_time):
+                    print("Hotword detected!")
+                    last_trigger_time = time.time()
+                    self._handle_hotword_trigger(detected_position)
+
+        except KeyboardInterrupt:
+            print("Voice assistant stopped.")
+        finally:
+            self.hotword_process.stop()
 
     def start_hotword_listener(self):
         print("Hotword listener started...")
         last_trigger_time = 0
-        
+
+        if self._command_worker is None:
+            self._command_worker = threading.Thread(target=self._command_loop, daemon=True)
+            self._command_worker.start()
+
+        if self.hotword_process:
+            self._listen_for_wake_events()
+            return
+
         try:
-            while True:
+            while not self._stop_event.is_set():
                 try:
-                    pcm = self.stream.read(self.porcupine.frame_length, exception_on_overflow=False)
-                    pcm = struct.unpack_from("h" * self.porcupine.frame_length, pcm)
-                    result = self.porcupine.process(pcm)
+                    pcm = self.audio_source.read(self.frame_length)
+                    self.audio_buffer.push(pcm)
+                    # Porcupine only needs a sequence of int16 samples; a memoryview
+                    # over the raw bytes avoids building a tuple per frame.
+                    result = self.porcupine.process(memoryview(pcm).cast("h"))
+                except EOFError:
+                    print("Audio source exhausted.")
+                    break
                 except Exception as e:
-                    self._restart_stream()
+                    self.audio_source.restart()
                     continue
 
                 if result >= 0:
-                    current_time = time.time()
-                    if current_time - last_trigger_time >= self.cooldown_seconds and not self.listening_lock.locked():
+                    if self._should_trigger(last_trigger_time):
                         print("Hotword detected!")
-                        last_trigger_time = current_time
+                        last_trigger_time = time.time()
                         self._handle_hotword_trigger()
 
         except KeyboardInterrupt:
             print("Voice assistant stopped.")
         finally:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.pa.terminate()
+            self.audio_source.close()
             self.porcupine.delete()
 
+    def stop(self):
+        """Ask the hotword loop to exit after the current frame."""
+        self._stop_event.set()
+
+    def wait_until_idle(self):
+        """Block until every triggered command has been recorded and recognized."""
+        self._trigger_queue.join()
+
+    @staticmethod
+    def default_partial_handler(text):
+        print(f"Hearing: {text}")
+
     @staticmethod
     def default_command_handler(command):
         if "time" in command:
@@ -0,0 +1,165 @@
+# On-disk cache of synthesized speech. Most replies are canned lines that come
+# back from the response cache ("At once. Opening WhatsApp, sir."), so their
+# audio is kept and played straight from disk instead of being synthesized over
+# the network again.
+#
+# Files are content-addressed: the name is a hash of (text, voice, format), so
+# processes sharing the directory agree on it without an index, and a changed
+# voice or format simply misses. The total size is bounded; when it is exceeded
+# the least recently used files (by mtime, touched on every hit) are deleted.
+#
+#   path = audio_cache.get("At once, sir.", voice)        # None on a miss
+#   path = audio_cache.put("At once, sir.", voice, tmp)   # moves tmp into the cache
+
+import collections
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+from app.paths import REPO_ROOT
+
+MB = 1024 * 1024
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(REPO_ROOT, ".audio_cache"))
+# AUDIO_CACHE_MAX_MB=0 disables the cache
+MAX_BYTES = int(float(os.getenv("AUDIO_CACHE_MAX_MB", "64")) * MB)
+# Eviction stops once the cache is back under this share of MAX_BYTES
+LOW_WATER = 0.9
+# Output format of edge_tts.Communicate; part of the key
+AUDIO_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+
+def normalize_text(text):
+    """Whitespace only; case and punctuation change how the line is spoken."""
+    return " ".join(text.split())
+
+
+class AudioCache:
+    """
+    :param directory: Cache directory, shared by every process.
+    :param max_bytes: Size bound; 0 disables the cache.
+    :param audio_format: Synthesis output format, part of every key.
+    """
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_bytes=MAX_BYTES, audio_format=AUDIO_FORMAT):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.audio_format = audio_format
+        self._lock = threading.Lock()
+        # Bytes on disk; scanned on the first store
+        self._total = None
+        self.counters = collections.Counter()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def key(self, text, voice):
+        raw = f"{voice}\n{self.audio_format}\n{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, text, voice):
+        key = self.key(text, voice)
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def owns(self, filename):
+        """True for cached files (callers must not delete them)."""
+        return bool(filename) and filename.endswith(".mp3") and \
+            os.path.abspath(filename).startswith(self.directory + os.sep)
+
+    def get(self, text, voice):
+        """:return: Path of the cached audio, or None."""
+        if not self.enabled:
+            return None
+        path = self.path_for(text, voice)
+        try:
+            # mtime is the LRU clock
+            os.utime(path)
+        except OSError:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return path
+
+    def put(self, text, voice, filename):
+        """
+        Move a freshly synthesized file into the cache.
+
+        :return: Its path in the cache, or `filename` unchanged if the cache is disabled
+                 or the file could not be stored.
+        """
+        if not self.enabled or not os.path.getsize(filename):
+            return filename
+        path = self.path_for(text, voice)
+        partial = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Renamed into place, so other processes never see a half-written file
+            shutil.move(filename, partial)
+            os.replace(partial, path)
+        except OSError as e:
+            print(f"[AUDIO_CACHE] Could not store audio: {e}")
+            return partial if os.path.exists(partial) else filename
+
+        self.counters["stores"] += 1
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += os.path.getsize(path)
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def _scan(self):
+        """(mtime, size, path) of every cached file."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used files until the cache is under LOW_WATER * max_bytes."""
+        with self._lock:
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * LOW_WATER
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Playing right now (Windows) or removed by another process
+                    continue
+                total -= size
+                self.counters["evictions"] += 1
+            self._total = total
+
+    def stats(self):
+        entries = self._scan() if self.enabled else []
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.counters["hits"],
+            "misses": self.counters["misses"],
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            "stores": self.counters["stores"],
+            "evictions": self.counters["evictions"],
+        }
+
+
+audio_cache = AudioCache()
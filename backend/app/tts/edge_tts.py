@@ -1,15 +1,24 @@
 import os
+import re
 import sys
 import io
 import tempfile
 import asyncio
 import edge_tts
 import pygame
+from app.tts.audio_cache import audio_cache
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
 voice_model = "en-US-AndrewNeural"
 
+# A sentence ends at . ! ? or a line break, followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+# Periods that do not end a sentence
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "u.s.", "no."}
+# Shorter pieces are joined with the next one instead of being spoken on their own
+MIN_SENTENCE_CHARS = 12
+
 def suppress_stdout_stderr():
     sys.stdout = io.StringIO()
     sys.stderr = io.StringIO()
@@ -18,8 +27,20 @@ def restore_stdout_stderr():
     sys.stdout = sys.__stdout__
     sys.stderr = sys.__stderr__
 
-async def speak(text):
+def init_audio():
+    """Open the audio output ahead of the first reply (called by the wake-word warm-up)."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+
+def stop_playback():
+    """Stop whatever is playing right now (barge-in)."""
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()
+
+async def synthesize(text):
+    """Render text to a temporary mp3 and return its path (the caller removes it)."""
     suppress_stdout_stderr()
+    filename = None
 
     try:
         # Create a temp file
@@ -28,26 +49,123 @@ async def speak(text):
 
         communicate = edge_tts.Communicate(text, voice=voice_model)
         await communicate.save(filename)
-
+        return filename
+    except BaseException:
+        if filename and os.path.exists(filename):
+            os.remove(filename)
+        raise
+    finally:
         restore_stdout_stderr()
 
-        # Wait a bit to ensure file system flush (especially on Windows)
-        await asyncio.sleep(0.1)
+async def render(text):
+    """
+    Audio for text: straight from the audio cache when it was spoken before,
+    otherwise synthesized and added to the cache.
+
+    :return: (path, True if it came from the cache)
+    """
+    cached = audio_cache.get(text, voice_model)
+    if cached is not None:
+        return cached, True
+    return audio_cache.put(text, voice_model, await synthesize(text)), False
+
+async def play(filename, settle=0.1):
+    try:
+        # Wait a bit to ensure file system flush (especially on Windows); not needed for cached files
+        if settle:
+            await asyncio.sleep(settle)
 
         # Initialize pygame mixer
-        pygame.mixer.init()
+        init_audio()
         pygame.mixer.music.load(filename)
         pygame.mixer.music.play()
 
+        # Poll without blocking the event loop so the task can be cancelled mid-sentence
         while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+            await asyncio.sleep(0.1)
+    except asyncio.CancelledError:
+        stop_playback()
+        raise
+
+def remove_audio(filename):
+    # Cleanup the temp file; cached files stay for the next time
+    if filename and os.path.exists(filename):
+        try:
+            pygame.mixer.music.unload()
+        except Exception:
+            pass
+        if not audio_cache.owns(filename):
+            os.remove(filename)
+
+async def speak(text):
+    filename = None
 
+    try:
+        filename, cached = await render(text)
+        await play(filename, settle=0 if cached else 0.1)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         print(f"ERROR | Error in speaking text: {e}")
     finally:
-        # Cleanup the temp file
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_audio(filename)
+
+def _ends_sentence(piece):
+    words = piece.split()
+    return not words or words[-1].lower() not in ABBREVIATIONS
+
+async def split_sentences(chunks):
+    """Regroup streamed text chunks into sentences, yielding each one as soon as it is complete."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            sentence = buffer[start:match.start()].strip()
+            if len(sentence) >= MIN_SENTENCE_CHARS and _ends_sentence(sentence):
+                yield sentence
+                start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+async def speak_stream(chunks):
+    """
+    Speak text while it is still being generated: each sentence is synthesized as soon
+    as it is complete, while the previous one plays, so the first words are heard after
+    the first sentence instead of the whole answer.
+
+    :param chunks: Async iterable of text pieces (e.g. GroqClient.stream_chat).
+    """
+    files = asyncio.Queue()
+
+    async def synthesize_all():
+        try:
+            async for sentence in split_sentences(chunks):
+                # (path, cached)
+                files.put_nowait(await render(sentence))
+        except Exception as e:
+            print(f"ERROR | Error in speaking text: {e}")
+        finally:
+            files.put_nowait(None)
+
+    producer = asyncio.create_task(synthesize_all())
+    try:
+        while (rendered := await files.get()) is not None:
+            filename, cached = rendered
+            try:
+                await play(filename, settle=0 if cached else 0.1)
+            except Exception as e:
+                print(f"ERROR | Error in speaking text: {e}")
+            finally:
+                remove_audio(filename)
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        while not files.empty():
+            rendered = files.get_nowait()
+            if rendered is not None:
+                remove_audio(rendered[0])
 
 async def speak_text(text):
     await speak(text)
@@ -0,0 +1,74 @@
+# Fills the audio cache with every reply the response cache can return, plus
+# the fixed lines (empty input, errors, the default acknowledgement), so those
+# are spoken from disk from the first time on.
+#
+# Usage (from backend/):
+#   python -m app.tts.prerender_audio
+#   python -m app.tts.prerender_audio --limit 50 --concurrency 2
+#
+# Replies already in the cache are skipped; run it again after new replies
+# were cached, or after changing the voice.
+
+import argparse
+import asyncio
+import time
+
+from app.models.combined_query import DEFAULT_REPLY
+from app.tts.audio_cache import audio_cache
+from app.tts.edge_tts import synthesize, voice_model
+from app.tts.response_generator import EMPTY_REPLY, ERROR_REPLY, cache as response_cache
+
+FIXED_LINES = [EMPTY_REPLY, ERROR_REPLY, DEFAULT_REPLY]
+
+
+def replies_to_render(limit=None):
+    """Distinct replies, fixed lines first."""
+    seen, replies = set(), []
+    for reply in FIXED_LINES + [reply for _, reply in response_cache.items()]:
+        reply = reply.strip()
+        if reply and reply not in seen:
+            seen.add(reply)
+            replies.append(reply)
+    return replies[:limit] if limit else replies
+
+
+async def prerender(replies, concurrency=4):
+    """:return: counts of rendered, already cached and failed replies"""
+    counts = {"rendered": 0, "cached": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render_one(reply):
+        if audio_cache.get(reply, voice_model) is not None:
+            counts["cached"] += 1
+            return
+        async with semaphore:
+            try:
+                audio_cache.put(reply, voice_model, await synthesize(reply))
+                counts["rendered"] += 1
+            except Exception as e:
+                print(f"[PRERENDER] {reply!r} failed: {e}")
+                counts["failed"] += 1
+
+    await asyncio.gather(*(render_one(reply) for reply in replies))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize cached replies ahead of time into the audio cache.")
+    parser.add_argument("--limit", type=int, default=None, help="render at most N replies")
+    parser.add_argument("--concurrency", type=int, default=4, help="synthesis requests in flight")
+    args = parser.parse_args()
+
+    if not audio_cache.enabled:
+        parser.error("the audio cache is disabled (AUDIO_CACHE_MAX_MB=0)")
+
+    replies = replies_to_render(args.limit)
+    started = time.perf_counter()
+    counts = asyncio.run(prerender(replies, args.concurrency))
+    print(f"{len(replies)} replies in {time.perf_counter() - started:.1f}s: "
+          f"{counts['rendered']} rendered, {counts['cached']} already cached, {counts['failed']} failed")
+    print(audio_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,12 @@
 import os
-import json
 import dotenv
-from functools import lru_cache
-import google.generativeai as genai
+from app.single_flight import SingleFlight
+from app.models.llm_client import gemini_client
+from app.tts.response_store import ResponseStore
+from app.paths import REPO_ROOT
 
 # === Setup === #
 dotenv.load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-_model = genai.GenerativeModel("gemini-2.0-flash")
 
 PROMPT = """
 You are Vision, a poised and exceptionally articulate English butler.
@@ -20,43 +18,76 @@ Maintain a refined, respectful tone at all times. Avoid slang and unnecessary ve
 """.strip()
 
 # === Persistent Cache === #
-CACHE_PATH = "response_cache.json"
-
-if os.path.exists(CACHE_PATH):
-    with open(CACHE_PATH, "r") as f:
-        cache = json.load(f)
-else:
-    cache = {}
+# SQLite (WAL) shared by every process; response_cache.json is imported into it once
+CACHE_PATH = os.path.join(REPO_ROOT, "response_cache.json")
+STORE_PATH = os.getenv("RESPONSE_STORE_PATH", os.path.join(REPO_ROOT, "response_cache.db"))
 
-def save_cache():
-    with open(CACHE_PATH, "w") as f:
-        json.dump(cache, f, indent=2)
+cache = ResponseStore(STORE_PATH, legacy_json=CACHE_PATH)
 
 def normalize(text: str) -> str:
     return " ".join(text.strip().lower().split())
 
-# === Cached Response Function === #
-@lru_cache(maxsize=100)  # Also keep in memory
-def generate_response(text: str) -> str:
-    if not text.strip():
-        return "Pardon, sir? I didn’t quite catch that."
-
-    norm_text = normalize(text)
+EMPTY_REPLY = "Pardon, sir? I didn’t quite catch that."
+ERROR_REPLY = "Apologies, sir. I'm having trouble responding at the moment."
 
-    if norm_text in cache:
+def _cached_reply(norm_text: str):
+    reply = cache.get(norm_text)
+    if reply is not None:
         print("[RESPONSE_CACHE HIT]")
-        return cache[norm_text]
-
+        return reply
     print("[RESPONSE_CACHE MISS]")
+    return None
+
+def _remember(norm_text: str, reply: str) -> str:
+    cache.set(norm_text, reply)
+    print(reply)
+    return reply
+
+def response_cache_stats() -> dict:
+    """Stored replies, hot tier size and hit counters."""
+    return cache.stats()
+
+# Concurrent requests for the same text share one Gemini call
+response_flight = SingleFlight("response")
+
+def _generate(norm_text: str, text: str) -> str:
     prompt = f"{PROMPT}\nUser: {text.strip()}"
 
     try:
-        response = _model.generate_content(prompt)
-        reply = response.text.strip()
-        cache[norm_text] = reply
-        save_cache()
-        print(reply)
-        return reply
+        return _remember(norm_text, gemini_client.generate_sync(prompt).strip())
+    except Exception as e:
+        print(f"[ERROR] Failed to generate response: {e}")
+        return ERROR_REPLY
+
+async def _generate_async(norm_text: str, text: str) -> str:
+    prompt = f"{PROMPT}\nUser: {text.strip()}"
+
+    try:
+        return _remember(norm_text, (await gemini_client.generate(prompt)).strip())
     except Exception as e:
         print(f"[ERROR] Failed to generate response: {e}")
-        return "Apologies, sir. I'm having trouble responding at the moment."
+        return ERROR_REPLY
+
+# === Cached Response Function === #
+def generate_response(text: str) -> str:
+    if not text.strip():
+        return EMPTY_REPLY
+
+    norm_text = normalize(text)
+    cached = _cached_reply(norm_text)
+    if cached is not None:
+        return cached
+
+    return response_flight.do(norm_text, _generate, norm_text, text)
+
+# Cancelling the awaiting task aborts the Gemini request (used for barge-in).
+async def generate_response_async(text: str) -> str:
+    if not text.strip():
+        return EMPTY_REPLY
+
+    norm_text = normalize(text)
+    cached = _cached_reply(norm_text)
+    if cached is not None:
+        return cached
+
+    return await response_flight.do_async(norm_text, _generate_async, norm_text, text)
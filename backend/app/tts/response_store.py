@@ -0,0 +1,151 @@
+# Persistent store for the butler's spoken replies (normalized text -> reply).
+#
+# Replies live in SQLite in WAL mode, so main.py and path.py can read and write
+# the same file at once, and storing a reply is one INSERT instead of rewriting
+# a JSON file. Nothing is read at import: the database is opened on first use
+# and rows are fetched one by one, with the most recently used replies kept in
+# a bounded in-memory hot tier.
+#
+#   store = ResponseStore("response_cache.db", legacy_json="response_cache.json")
+#   store.set("open whatsapp", "At once, sir.")
+#   store.get("open whatsapp")
+#
+# The old response_cache.json is imported once, the first time the database is
+# created; the JSON file is left as it is.
+
+import collections
+import json
+import os
+import sqlite3
+import threading
+
+# Replies kept in memory
+HOT_SIZE = 256
+# Milliseconds a writer waits for another process's write lock
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS replies (
+    text TEXT PRIMARY KEY,
+    reply TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ResponseStore:
+    """
+    :param path: SQLite database file.
+    :param hot_size: Replies kept in memory (least recently used ones are dropped).
+    :param legacy_json: response_cache.json to import once, if it exists.
+    """
+
+    def __init__(self, path, hot_size=HOT_SIZE, legacy_json=None):
+        self.path = path
+        self.hot_size = hot_size
+        self.legacy_json = legacy_json
+        self._hot = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        # sqlite3 connections must stay on the thread that made them
+        self._local = threading.local()
+        self._ready = False
+        self.counters = collections.Counter()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL stays consistent with NORMAL; a crash loses at most the last replies
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    self._migrate_json(conn)
+                    self._ready = True
+        return conn
+
+    def _migrate_json(self, conn):
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        try:
+            with open(self.legacy_json, "r") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[RESPONSE_STORE] Could not read {self.legacy_json}: {e}")
+            legacy = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while this one waited for the lock
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                conn.executemany("INSERT OR IGNORE INTO replies (text, reply) VALUES (?, ?)",
+                                 [(text, reply) for text, reply in legacy.items() if isinstance(reply, str)])
+                conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (self.legacy_json,))
+                print(f"[RESPONSE_STORE] Imported {len(legacy)} replies from {self.legacy_json}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _remember_hot(self, text, reply):
+        with self._lock:
+            self._hot[text] = reply
+            self._hot.move_to_end(text)
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+    def get(self, text):
+        """Reply for a normalized text, or None."""
+        with self._lock:
+            reply = self._hot.get(text)
+            if reply is not None:
+                self._hot.move_to_end(text)
+                self.counters["hot_hits"] += 1
+                return reply
+
+        row = self._connection().execute("SELECT reply FROM replies WHERE text = ?", (text,)).fetchone()
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["disk_hits"] += 1
+        self._remember_hot(text, row[0])
+        return row[0]
+
+    def __contains__(self, text):
+        return self.get(text) is not None
+
+    def set(self, text, reply):
+        self._connection().execute("INSERT OR REPLACE INTO replies (text, reply) VALUES (?, ?)", (text, reply))
+        self.counters["stores"] += 1
+        self._remember_hot(text, reply)
+
+    def items(self):
+        """(text, reply) for every stored reply, in the order they were last written."""
+        yield from self._connection().execute("SELECT text, reply FROM replies ORDER BY rowid")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+
+    def stats(self):
+        lookups = sum(self.counters[key] for key in ("hot_hits", "disk_hits", "misses"))
+        with self._lock:
+            hot_entries = len(self._hot)
+        return {
+            "entries": len(self),
+            "hot_entries": hot_entries,
+            "hot_size": self.hot_size,
+            "lookups": lookups,
+            "hot_hits": self.counters["hot_hits"],
+            "disk_hits": self.counters["disk_hits"],
+            "misses": self.counters["misses"],
+            "stores": self.counters["stores"],
+            "hit_rate": (self.counters["hot_hits"] + self.counters["disk_hits"]) / lookups if lookups else 0.0,
+        }
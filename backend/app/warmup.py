@@ -0,0 +1,80 @@
+# Predictive warm-up, fired on the wake word. The user needs a few seconds to
+# say the command; meanwhile everything a command needs that does not depend on
+# the transcript is prepared in the background: pooled LLM connections, the
+# audio output, the repo list, the query cache index, the learned intent
+# classifier and stale file indexes. Nothing here retrains the classifier; that
+# happens when the cache changes (groq_preprocess) or offline.
+#
+#   warm_up = WarmUp()
+#   assistant = VoiceAssistant(..., on_wake=warm_up.trigger)
+
+import logging
+import threading
+import time
+
+from app.functions.file_handler import refresh_stale_indexes
+from app.models.groq_preprocess import DOCUMENTS_PATH, DOWNLOADS_PATH, get_fuzzy_index
+from app.models.intent_classifier import get_model
+from app.models.intent_rules import known_repos
+from app.models.llm_client import warm_up_connections
+from app.tts.edge_tts import init_audio
+
+logger = logging.getLogger("assistant")
+
+# Wake words closer together than this reuse the previous warm-up
+MIN_INTERVAL = 30.0
+
+
+def default_steps():
+    return {
+        "llm_connections": warm_up_connections,
+        "audio_output": init_audio,
+        "repo_list": known_repos,
+        "query_index": get_fuzzy_index,
+        "intent_model": get_model,
+        "file_indexes": lambda: refresh_stale_indexes([DOCUMENTS_PATH, DOWNLOADS_PATH]),
+    }
+
+
+class WarmUp:
+    """
+    :param steps: name -> callable, run in order on a background thread. A failing step is logged and skipped.
+    :param min_interval: Seconds before another trigger runs the steps again.
+    """
+
+    def __init__(self, steps=None, min_interval=MIN_INTERVAL):
+        self.steps = steps if steps is not None else default_steps()
+        self.min_interval = min_interval
+        self.last_started = None
+        self.timings = {}
+        self._running = threading.Lock()
+
+    def trigger(self):
+        """
+        Start a warm-up unless one is running or finished recently. Never blocks.
+
+        :return: True if a warm-up was started.
+        """
+        if self.last_started is not None and time.monotonic() - self.last_started < self.min_interval:
+            return False
+        if not self._running.acquire(blocking=False):
+            return False
+        self.last_started = time.monotonic()
+        threading.Thread(target=self._run, name="warm-up", daemon=True).start()
+        return True
+
+    def _run(self):
+        try:
+            for name, step in self.steps.items():
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    logger.warning(f"Warm-up step {name} failed: {e}")
+                self.timings[name] = time.perf_counter() - start
+        finally:
+            self._running.release()
+
+    def stats(self):
+        """Seconds taken by each step of the last warm-up."""
+        return dict(self.timings)
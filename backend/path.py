@@ -1,12 +1,17 @@
 import sys
 import os
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from app.command_pipeline import CommandPipeline
+from app.scheduler import BACKGROUND, INTERACTIVE, PriorityScheduler
+from app.warmup import WarmUp
 from app.stt.voice_recognition import VoiceAssistant
-from app.models.groq_preprocess import cached_process_query
+from app.stt.recognizer_registry import default_registry, HedgedRecognizer
+from app.stt.streaming_recognizer import BatchBackend
+from app.models.groq_preprocess import is_general_query, stream_general_answer
+from app.models.multi_intent import cached_process_queries_async, cached_queries_with_reply_async
 from app.query_processor import determine_function
-from app.tts.response_generator import generate_response
-from app.tts.edge_tts import speak_text
+from app.tts.response_generator import generate_response_async
+from app.tts.edge_tts import speak_text, speak_stream
 from app.logger.logger_setup import logger
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
@@ -20,7 +25,28 @@ from shared_todo_queue import enqueue,dequeue
 
 # suppress_stderr()
 
-executor = ThreadPoolExecutor(max_workers=4)
+# One worker is kept for what the user says; shared-queue jobs run one at a time, a second apart
+executor = PriorityScheduler(max_workers=4, reserved=1, background_limit=1, background_interval=1.0, name="command")
+
+# VISION_COMBINED_QUERY=1: one Groq call returns the intent and the spoken reply (no Gemini call)
+COMBINED_QUERY = os.getenv("VISION_COMBINED_QUERY") == "1"
+
+# General questions are streamed from Groq and spoken sentence by sentence
+def speak_general_answer(text):
+    if not is_general_query(text):
+        return None
+    return speak_stream(stream_general_answer(text))
+
+# Every command is a cancellable unit; a new wake word or "stop" aborts the reply and the LLM calls
+pipeline = CommandPipeline(
+    respond=generate_response_async,
+    speak=speak_text,
+    classify=cached_process_queries_async,
+    dispatch=determine_function,
+    executor=executor,
+    combined=cached_queries_with_reply_async if COMBINED_QUERY else None,
+    stream=speak_general_answer,
+)
 
 async def perform_queue_task():
     while True:
@@ -30,33 +56,34 @@ async def perform_queue_task():
             continue
         
         logger.info(f"Executing the shared task {curr_task}")
-        handle_recognized_command(curr_task)
+        handle_recognized_command(curr_task, priority=BACKGROUND)
         # determine_function(cached_process_query(curr_task))
 
 
 
-# Run the speech synthesis in a separate thread
-def run_speak_text(text):
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        asyncio.run(speak_text(generate_response(text)))
-    except Exception as e:
-        logger.error(f"Error in speaking text: {e}")
-
 # Handle recognized text
-def handle_recognized_command(text):
-    if not text:
-        logger.info("Nothing recognized.")
-        return
+def handle_recognized_command(text, command_id=None, priority=INTERACTIVE):
+    return pipeline.submit(text, command_id, priority)
 
-    logger.info(f"Recognized: {text}")
-    
-    executor.submit(run_speak_text, text)
-    executor.submit(lambda: determine_function(cached_process_query(text)))
+# Connections, audio output and indexes are prepared while the user is still speaking
+warm_up = WarmUp()
+
+def handle_wake():
+    warm_up.trigger()
+    pipeline.barge_in()
+
+# Race every command on the registered recognizers; the fastest answer wins
+stt_registry = default_registry()
+stt_recognizer = HedgedRecognizer(stt_registry, max_parallel=2)
 
 # Start voice assistant with hotword "vision"
-assistant = VoiceAssistant(hotword="vision", record_duration=6, on_recognized=handle_recognized_command)
+assistant = VoiceAssistant(
+    hotword="vision",
+    record_duration=6,
+    on_recognized=lambda text: handle_recognized_command(text, assistant.command_id),
+    on_wake=handle_wake,
+    streaming_backend=BatchBackend(stt_recognizer.recognize, name="hedged"),
+)
 
 async def start_voice_assistant():
     logger.info("Starting hotword listener...")
@@ -66,6 +93,8 @@ async def start_voice_assistant():
     # Remove print statement and only use logger
 
 async def main():
+    warm_up.trigger()
+
     # Start the background queue task
     asyncio.create_task(perform_queue_task())
     
@@ -0,0 +1,5 @@
+# Tests import the app the way path.py does, with backend/ as the root
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+
+from app.stt.audio_journal import MANIFEST_NAME, AudioJournal
+
+
+def _audio(seconds=0.1):
+    return sr.AudioData(b"\x00\x01" * int(16000 * seconds), 16000, 2)
+
+
+def _manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def test_manifest_is_written_on_flush_not_per_command(tmp_path):
+    journal = AudioJournal(str(tmp_path), save_interval=3600)
+    journal.record("cmd-1", _audio())
+    journal.annotate("cmd-1", transcript="open whatsapp")
+    journal._queue.join()
+    assert not os.path.exists(tmp_path / MANIFEST_NAME)
+    assert journal.get("cmd-1")["transcript"] == "open whatsapp"
+
+    journal.flush()
+    [entry] = _manifest(tmp_path)
+    assert entry["transcript"] == "open whatsapp"
+    assert journal.total_bytes() == entry["bytes"]
+
+    reopened = AudioJournal(str(tmp_path))
+    assert reopened.load("cmd-1").frame_data == _audio().frame_data
+
+
+def test_annotate_before_any_record_does_not_hang_flush(tmp_path):
+    journal = AudioJournal(str(tmp_path))
+    journal.annotate("cmd-1", transcript="open whatsapp")
+    journal.flush()
+    assert journal.get("cmd-1") is None
@@ -0,0 +1,19 @@
+from app.models import combined_query
+from app.models.groq_preprocess import QUERY_PROFILE
+from app.models.query_types import QueryType, SubTaskType
+
+
+def test_prompt_follows_the_active_profile():
+    system_prompt = combined_query._combined_messages("open whatsapp")[0]["content"]
+    assert system_prompt == combined_query.COMBINED_PROFILES[QUERY_PROFILE][0]
+    compact = combined_query._combined_messages("open whatsapp", "compact")[0]["content"]
+    assert len(compact) < len(combined_query.COMBINED_SYSTEM_PROMPT)
+    assert "spoken_reply" in compact
+
+
+def test_compact_response_without_path():
+    response = {"type": "APP_HANDLING", "subtask": "OPEN_APP", "target": "whatsapp", "spoken_reply": "At once, sir."}
+    result = combined_query._from_response("open whatsapp", response, "compact")
+    assert (result.type, result.subtask, result.target) == (QueryType.APP_HANDLING, SubTaskType.OPEN_APP, "whatsapp")
+    assert result.spoken_reply == "At once, sir."
+    assert result.intent().target == "whatsapp"
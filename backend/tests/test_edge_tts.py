@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("edge_tts")
+
+from app.tts import edge_tts
+
+
+def test_cached_sentences_play_without_settle(monkeypatch):
+    played = []
+
+    async def render(sentence):
+        return f"{sentence}.mp3", sentence.startswith("At once")
+
+    async def play(filename, settle=0.1):
+        played.append((filename, settle))
+
+    async def chunks():
+        for chunk in ["At once, sir. ", "The repository has been cloned. ", "Anything else?"]:
+            yield chunk
+
+    monkeypatch.setattr(edge_tts, "render", render)
+    monkeypatch.setattr(edge_tts, "play", play)
+    monkeypatch.setattr(edge_tts, "remove_audio", lambda filename: None)
+    asyncio.run(edge_tts.speak_stream(chunks()))
+
+    assert [settle for _, settle in played] == [0, 0.1, 0.1]
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.stt.endpointer import AdaptiveEndpointer
+
+FRAME = 512
+
+
+def _frame(amplitude):
+    samples = np.random.default_rng(0).normal(0, amplitude, FRAME)
+    return samples.astype(np.int16).tobytes()
+
+
+def test_reset_forgets_the_noise_floor():
+    endpointer = AdaptiveEndpointer()
+    # A loud room during the last command
+    for _ in range(20):
+        endpointer.process(_frame(2000))
+    assert endpointer.noise_floor > 1000
+
+    endpointer.reset()
+    assert endpointer.noise_floor is None
+    # Quiet now: ordinary speech must count as speech again
+    endpointer.process(_frame(10))
+    for _ in range(5):
+        endpointer.process(_frame(1500))
+    assert endpointer.speech_started
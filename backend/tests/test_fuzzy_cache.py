@@ -0,0 +1,32 @@
+import pytest
+
+from app.models.fuzzy_cache import FuzzyIndex
+
+
+@pytest.fixture
+def index():
+    index = FuzzyIndex()
+    index.add("open whatsapp", "whatsapp")
+    index.add("clone portfolio", "portfolio")
+    index.add("summarize report.pdf", "report.pdf")
+    return index
+
+
+@pytest.mark.parametrize("prompt, cached", [
+    ("please open whatsapp", "open whatsapp"),
+    ("jarvis can you open whatsapp", "open whatsapp"),
+    ("summarise report pdf", "summarize report.pdf"),
+])
+def test_near_duplicate_hits(index, prompt, cached):
+    match = index.find(prompt)
+    assert match is not None
+    assert match[0] == cached
+
+
+@pytest.mark.parametrize("prompt", [
+    "clone portfolio2",
+    "close whatsapp",
+    "summarize invoice.pdf",
+])
+def test_changed_target_or_verb_misses(index, prompt):
+    assert index.find(prompt) is None
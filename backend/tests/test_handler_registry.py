@@ -0,0 +1,70 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.handler_registry import INSTANT, LONG, HandlerBusy, HandlerRegistry
+from app.models.query_types import QueryType, SubTaskType
+
+
+def _query(query_type, subtask, target=""):
+    return SimpleNamespace(type=query_type, subtask=subtask, target=target)
+
+
+OPEN_WHATSAPP = _query(QueryType.APP_HANDLING, SubTaskType.OPEN_APP, "whatsapp")
+SETUP_PORTFOLIO = _query(QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT, "portfolio")
+
+
+@pytest.fixture
+def registry():
+    registry = HandlerRegistry()
+    yield registry
+    registry.shutdown()
+
+
+def test_long_handler_never_blocks_instant_ones(registry):
+    release = threading.Event()
+    registry.register(QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT, lambda q: release.wait(5), kind=LONG)
+    registry.register(QueryType.APP_HANDLING, SubTaskType.OPEN_APP, lambda q: f"opened {q.target}", kind=INSTANT)
+
+    setup = registry.dispatch(SETUP_PORTFOLIO)
+    queued_setup = registry.dispatch(SETUP_PORTFOLIO)
+    try:
+        # The setup pool's only worker is busy; opening an app still runs at once
+        assert registry.dispatch(OPEN_WHATSAPP).result(timeout=1) == "opened whatsapp"
+        assert not setup.done()
+    finally:
+        release.set()
+    assert setup.result(timeout=5) is True
+    assert queued_setup.result(timeout=5) is True
+
+
+def test_future_carries_the_handler_exception(registry):
+    def fail(query):
+        raise FileNotFoundError(query.target)
+
+    registry.register(QueryType.APP_HANDLING, SubTaskType.OPEN_APP, fail, kind=INSTANT)
+    with pytest.raises(FileNotFoundError):
+        registry.dispatch(OPEN_WHATSAPP).result(timeout=1)
+    assert registry.stats()["open_app"]["failed"] == 1
+
+
+def test_full_queue_and_unregistered_queries(registry):
+    started = threading.Event()
+    release = threading.Event()
+
+    def setup(query):
+        started.set()
+        return release.wait(5)
+
+    registry.register(QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT, setup, kind=LONG, max_queue=1)
+    try:
+        running = registry.dispatch(SETUP_PORTFOLIO)
+        assert started.wait(1)
+        queued = registry.dispatch(SETUP_PORTFOLIO)
+        rejected = registry.dispatch(SETUP_PORTFOLIO)
+        assert isinstance(rejected.exception(timeout=1), HandlerBusy)
+    finally:
+        release.set()
+    assert running.result(timeout=5) and queued.result(timeout=5)
+    assert registry.dispatch(_query(QueryType.GENERAL_QUERY, SubTaskType.OPEN_APP)).result(timeout=1) is None
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from app.stt.hotword_process import SharedFrameRing
+
+FRAME_BYTES = 4
+
+
+def _frame(i):
+    return i.to_bytes(FRAME_BYTES, "little")
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(8, FRAME_BYTES, threading.Condition(), create=True)
+    yield ring
+    ring.close(unlink=True)
+
+
+def test_read_in_order(ring):
+    for i in range(5):
+        ring.push(_frame(i))
+    position, frames = 0, []
+    for _ in range(5):
+        frame, position = ring.read(position, timeout=0)
+        frames.append(frame)
+    assert frames == [_frame(i) for i in range(5)]
+    assert ring.read(position, timeout=0) == (None, position)
+
+
+def test_lapped_reader_skips_to_the_oldest_frame(ring):
+    for i in range(20):
+        ring.push(_frame(i))
+    frame, position = ring.read(0, timeout=0)
+    assert position == ring.oldest_position() + 1
+    assert frame == _frame(position - 1)
+
+
+def test_frame_overwritten_during_the_copy_is_not_returned(ring):
+    for i in range(3):
+        ring.push(_frame(i))
+    assert ring._frame(1) == _frame(1)
+    # The writer reached the slot of frame 1 while it was being copied
+    ring._position[0] = 1 + ring.capacity
+    assert ring._frame(1) is None
+    _, position = ring.read(1, timeout=0)
+    assert position - 1 >= ring.oldest_position()
@@ -0,0 +1,17 @@
+import threading
+
+from app.models import groq_preprocess, intent_classifier
+
+
+def test_new_labels_retrain_in_the_background(monkeypatch):
+    retrained = threading.Event()
+    monkeypatch.setattr(intent_classifier, "MIN_NEW_EXAMPLES", 3)
+    monkeypatch.setattr(groq_preprocess, "_labels_since_check", 0)
+    monkeypatch.setattr(groq_preprocess, "refresh_intent_model", retrained.set)
+
+    for _ in range(2):
+        groq_preprocess._note_new_label()
+    assert not retrained.wait(0.1)
+
+    groq_preprocess._note_new_label()
+    assert retrained.wait(2)
@@ -0,0 +1,73 @@
+import pytest
+
+from app.models.intent_rules import match_intent
+from app.models.query_types import SubTaskType
+
+
+@pytest.mark.parametrize("prompt, subtask, target", [
+    ("open whatsapp", SubTaskType.OPEN_APP, "whatsapp"),
+    ("close vs code", SubTaskType.CLOSE_APP, "code"),
+    ("list my repos", SubTaskType.LIST_REPOS, ""),
+    ("open report.pdf", SubTaskType.OPEN_FILE, "report.pdf"),
+    ("open the pdf file report", SubTaskType.OPEN_FILE, "report.pdf"),
+    ("open notes/todo.md", SubTaskType.OPEN_FILE, "notes/todo.md"),
+    ("summarize report.pdf", SubTaskType.SUMMARIZE, "report.pdf"),
+    ("summarise the pdf linux paper from my documents", SubTaskType.SUMMARIZE, "linux paper.pdf"),
+    ("create a new react project", SubTaskType.CREATE_PROJECT, "react"),
+    ("set up portfolio", SubTaskType.SETUP_PROJECT, "portfolio"),
+    ("set up the project portfolio", SubTaskType.SETUP_PROJECT, "portfolio"),
+])
+def test_resolved_locally(prompt, subtask, target):
+    intent = match_intent(prompt)
+    assert intent is not None
+    assert (intent.subtask, intent.target) == (subtask, target)
+
+
+@pytest.mark.parametrize("prompt", [
+    # Bare names that are not in the app tables: websites, settings, missing apps
+    "open spotify",
+    "open youtube",
+    "open settings",
+    "open discord",
+    "open google",
+    # Free text, not a file
+    "summarise linux paper from document",
+    "summarize the meeting we had yesterday",
+    # No project named
+    "set up the project",
+    "set it up",
+    "what is the weather like",
+])
+def test_left_to_the_llm(prompt):
+    assert match_intent(prompt) is None
+
+
+@pytest.fixture
+def projects_dir(tmp_path, monkeypatch):
+    from app.models import intent_rules
+    for name in ("portfolio", "weather-app"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setattr(intent_rules, "PROJECTS_DIR", str(tmp_path))
+    intent_rules.refresh_known_targets()
+    yield tmp_path
+    intent_rules.refresh_known_targets()
+
+
+@pytest.mark.parametrize("prompt, target", [
+    ("push portfolio to github", "portfolio"),
+    ("push the project weather app to github", "weather-app"),
+])
+def test_push_resolves_known_folders(projects_dir, prompt, target):
+    intent = match_intent(prompt)
+    assert intent is not None
+    assert (intent.subtask, intent.target) == (SubTaskType.PUSH_REPO, target)
+
+
+@pytest.mark.parametrize("prompt", [
+    "push project 1 to github",
+    "push project to github",
+    "push my folder to github",
+    "push weather to github",
+])
+def test_push_of_unknown_folder_is_left_to_the_llm(projects_dir, prompt):
+    assert match_intent(prompt) is None
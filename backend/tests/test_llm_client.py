@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.models.llm_client import GroqClient, LLMError, LLMTimeout
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def _completion(content):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _client(handler, **kwargs):
+    kwargs.setdefault("backoff", 0.0)
+    return GroqClient(base_url="http://llm.test", api_key="test", transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_retries_rate_limits_and_server_errors():
+    statuses = [429, 503]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if statuses:
+            return httpx.Response(statuses.pop(0), text="busy")
+        return _completion("hi")
+
+    assert _client(handler).chat_sync(MESSAGES) == "hi"
+    assert len(requests) == 3
+    assert requests[0].headers["Authorization"] == "Bearer test"
+
+
+def test_client_errors_are_not_retried():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(400, text="bad request")
+
+    with pytest.raises(LLMError, match="HTTP 400"):
+        _client(handler).chat_sync(MESSAGES)
+    assert len(requests) == 1
+
+
+def test_gives_up_after_max_attempts():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(500)
+
+    with pytest.raises(LLMError, match="HTTP 500"):
+        _client(handler, max_attempts=2).chat_sync(MESSAGES)
+    assert len(requests) == 2
+
+
+def test_deadline_covers_a_hanging_server():
+    async def handler(request):
+        await asyncio.sleep(5)
+        return _completion("too late")
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        _client(handler).chat_sync(MESSAGES, deadline=0.2)
+    assert time.monotonic() - started < 1.0
+
+
+def test_cancelling_the_caller_closes_the_request():
+    started, closed = threading.Event(), threading.Event()
+
+    async def handler(request):
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            closed.set()
+            raise
+        return _completion("too late")
+
+    client = _client(handler)
+
+    async def caller():
+        task = asyncio.create_task(client.chat(MESSAGES))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(caller())
+    assert closed.wait(timeout=2)
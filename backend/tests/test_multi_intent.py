@@ -0,0 +1,48 @@
+import pytest
+
+from app.models.groq_preprocess import QueryProcessor
+from app.models.multi_intent import _resolve_back_references, split_commands
+from app.models.query_types import QueryType, SubTaskType
+
+
+@pytest.mark.parametrize("prompt, steps", [
+    # The verb carries over to a bare app name
+    ("open chrome and whatsapp", [["open chrome", "open whatsapp"]]),
+    ("open chrome and whatsapp then clone portfolio", [["open chrome", "open whatsapp"], ["clone portfolio"]]),
+    # "it" depends on the clause before, so it waits for it
+    ("create a flask project and set it up", [["create a flask project"], ["set it up"]]),
+    # One command with "and" in it
+    ("create a flask and react project", [["create a flask and react project"]]),
+])
+def test_compound_commands(prompt, steps):
+    assert split_commands(prompt) == steps
+
+
+@pytest.mark.parametrize("prompt", [
+    "what is the difference between python and java",
+    "open whatsapp",
+])
+def test_single_command_or_question_is_not_split(prompt):
+    assert split_commands(prompt) == [[prompt]]
+
+
+def _intent(query_type, subtask, target):
+    return QueryProcessor(type=query_type, subtask=subtask, target=target, path="")
+
+
+def test_back_reference_takes_the_previous_target():
+    create = _intent(QueryType.CREATE_PROJECT, SubTaskType.CREATE_PROJECT, "flask")
+    setup = _intent(QueryType.SETUP_PROJECT, SubTaskType.SETUP_PROJECT, "it")
+    steps = _resolve_back_references([[("create a flask project", create)], [("set it up", setup)]])
+    assert [[intent.target for intent in step] for step in steps] == [["flask"], ["flask"]]
+    assert setup.target == "it"
+
+
+def test_empty_target_is_not_a_back_reference():
+    clone = _intent(QueryType.GITHUB_ACTIONS, SubTaskType.CLONE_REPO, "portfolio")
+    list_repos = _intent(QueryType.GITHUB_ACTIONS, SubTaskType.LIST_REPOS, "")
+    # A target the model filled with "this" although the clause never said it
+    open_this = _intent(QueryType.FILE_HANDLING, SubTaskType.OPEN_FILE, "this")
+    steps = _resolve_back_references([[("clone portfolio", clone), ("list my repos", list_repos)],
+                                      [("open the file", open_this)]])
+    assert [[intent.target for intent in step] for step in steps] == [["portfolio", ""], ["this"]]
@@ -0,0 +1,36 @@
+import diskcache
+from pydantic import BaseModel
+
+from app.models.query_cache import QueryCache
+from app.models.query_types import QueryType, SubTaskType
+
+
+class Intent(BaseModel):
+    type: QueryType
+    subtask: SubTaskType
+    target: str
+
+
+OPEN_WHATSAPP = Intent(type=QueryType.APP_HANDLING, subtask=SubTaskType.OPEN_APP, target="whatsapp")
+
+
+def test_round_trip_under_the_current_version(tmp_path):
+    cache = QueryCache(str(tmp_path), Intent, version="2.compact")
+    cache.set("open whatsapp", OPEN_WHATSAPP)
+    assert cache.get("open whatsapp") == OPEN_WHATSAPP
+    assert QueryCache(str(tmp_path), Intent, version="2.full").get("open whatsapp") is None
+
+
+def test_legacy_entries_are_never_served(tmp_path):
+    legacy = diskcache.Cache(str(tmp_path))
+    legacy.set("open whatsapp", OPEN_WHATSAPP)
+    legacy.close()
+
+    cache = QueryCache(str(tmp_path), Intent, version="2.compact")
+    assert cache.get("open whatsapp") is None
+    assert list(cache.items()) == []
+
+    assert cache.purge_stale() >= 1
+    legacy = diskcache.Cache(str(tmp_path))
+    assert len(legacy) == 0
+    legacy.close()
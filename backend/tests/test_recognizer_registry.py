@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+
+from app.stt.recognizer_registry import HedgedRecognizer, RecognizerRegistry
+
+
+def _backend(result, delay=0.0):
+    def recognize(audio):
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return recognize
+
+
+def _registry(*backends):
+    """Untried backends rank in registration order."""
+    registry = RecognizerRegistry()
+    for name, recognize in backends:
+        registry.register(name, recognize)
+    return registry
+
+
+def test_fast_unsure_backend_does_not_beat_the_top_ranked_one():
+    registry = _registry(("a_cloud", _backend("open whatsapp", delay=0.2)),
+                         ("b_local", _backend(("open what's up", 0.4))))
+    assert HedgedRecognizer(registry).recognize(None) == "open whatsapp"
+    assert registry.stats_for("a_cloud").wins == 1
+
+
+def test_confident_backend_wins_the_race():
+    registry = _registry(("a_cloud", _backend("open whatsapp", delay=0.5)),
+                         ("b_local", _backend(("open whatsapp", 0.95))))
+    hedged = HedgedRecognizer(registry)
+    started = time.perf_counter()
+    assert hedged.recognize(None) == "open whatsapp"
+    assert time.perf_counter() - started < 0.4
+    assert registry.stats_for("b_local").wins == 1
+
+
+def test_unsure_result_is_used_when_the_top_backend_fails():
+    registry = _registry(("a_cloud", _backend(sr.RequestError("offline"), delay=0.2)),
+                         ("b_local", _backend(("open what's up", 0.4))))
+    assert HedgedRecognizer(registry).recognize(None) == "open what's up"
+
+
+def test_wins_are_counted_under_concurrency():
+    registry = _registry(("a_cloud", _backend("hello")))
+    hedged = HedgedRecognizer(registry)
+    threads = [threading.Thread(target=lambda: [hedged.recognize(None) for _ in range(50)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.stats_for("a_cloud").wins == 200
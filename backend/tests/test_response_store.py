@@ -0,0 +1,38 @@
+import json
+import sqlite3
+
+from app.tts.response_store import ResponseStore
+
+
+def test_replies_survive_a_new_store(tmp_path):
+    path = str(tmp_path / "response_cache.db")
+    store = ResponseStore(path, hot_size=1)
+    store.set("open whatsapp", "At once, sir.")
+    store.set("open chrome", "Right away, sir.")
+    # Pushed out of the hot tier, read back from SQLite
+    assert store.get("open whatsapp") == "At once, sir."
+    assert store.stats()["disk_hits"] == 1
+
+    reopened = ResponseStore(path)
+    assert reopened.get("open chrome") == "Right away, sir."
+    assert reopened.get("close chrome") is None
+    assert len(reopened) == 2
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    path = str(tmp_path / "response_cache.db")
+    legacy = tmp_path / "response_cache.json"
+    legacy.write_text(json.dumps({"open whatsapp": "At once, sir.", "broken": 3}))
+
+    store = ResponseStore(path, legacy_json=str(legacy))
+    assert store.get("open whatsapp") == "At once, sir."
+    assert store.get("broken") is None
+    assert legacy.exists()
+    store.set("open whatsapp", "Opening WhatsApp, sir.")
+
+    # A later change to the JSON file is not imported again, nor does it overwrite newer replies
+    legacy.write_text(json.dumps({"open whatsapp": "At once, sir.", "open chrome": "Right away, sir."}))
+    reopened = ResponseStore(path, legacy_json=str(legacy))
+    assert reopened.get("open whatsapp") == "Opening WhatsApp, sir."
+    assert reopened.get("open chrome") is None
@@ -0,0 +1,37 @@
+import threading
+
+from app.scheduler import BACKGROUND, INTERACTIVE, PriorityScheduler
+
+
+def test_background_job_runs_on_idle_scheduler():
+    scheduler = PriorityScheduler(max_workers=4, reserved=1)
+    try:
+        future = scheduler.submit_at(BACKGROUND, lambda: "done")
+        assert future.result(timeout=2) == "done"
+    finally:
+        scheduler.shutdown()
+
+
+def test_background_job_runs_with_only_one_unreserved_worker():
+    scheduler = PriorityScheduler(max_workers=2, reserved=1)
+    try:
+        futures = [scheduler.submit_at(BACKGROUND, lambda i=i: i) for i in range(5)]
+        assert [future.result(timeout=2) for future in futures] == list(range(5))
+    finally:
+        scheduler.shutdown()
+
+
+def test_interactive_job_skips_running_background_work():
+    scheduler = PriorityScheduler(max_workers=2, reserved=1)
+    release = threading.Event()
+    try:
+        blocker = scheduler.submit_at(BACKGROUND, release.wait)
+        queued = scheduler.submit_at(BACKGROUND, lambda: "background")
+        assert scheduler.submit_at(INTERACTIVE, lambda: "interactive").result(timeout=2) == "interactive"
+        assert not queued.done()
+        release.set()
+        assert blocker.result(timeout=2)
+        assert queued.result(timeout=2) == "background"
+    finally:
+        release.set()
+        scheduler.shutdown()
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+from app.single_flight import SingleFlight
+
+
+def _concurrent(flight, fn, callers=4):
+    """Run `callers` threads through flight.do while the leader is held; return results or exceptions."""
+    outcomes = [None] * callers
+
+    def call(i):
+        try:
+            outcomes[i] = flight.do("open whatsapp", fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flight, followers=3):
+    deadline = time.monotonic() + 2
+    while flight.stats()["coalesced"] < followers and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("query")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "APP_HANDLING"
+
+    threads, outcomes = _concurrent(flight, fn)
+    _wait_for_followers(flight)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert outcomes == ["APP_HANDLING"] * 4
+    assert flight.in_flight() == []
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight("query")
+    release = threading.Event()
+
+    def fn():
+        release.wait(2)
+        raise RuntimeError("groq down")
+
+    threads, outcomes = _concurrent(flight, fn)
+    _wait_for_followers(flight)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert flight.stats()["calls"] == 1
+
+
+def test_async_callers_share_one_call():
+    flight = SingleFlight("query")
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "APP_HANDLING"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("open whatsapp", fn) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["APP_HANDLING"] * 3
+    assert len(calls) == 1
+
+
+def test_async_exception_reaches_every_caller():
+    flight = SingleFlight("query")
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("groq down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("open whatsapp", fn) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in asyncio.run(main()))
+    assert flight.stats()["calls"] == 1
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from app.stt.streaming_recognizer import BufferedSession
+
+RATE = 16000
+WIDTH = 2
+# 32 ms frames, as captured for Porcupine
+FRAME = b"\0" * 512 * WIDTH
+
+
+class Recognizer:
+    """Counts calls; each call blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, audio):
+        self.calls.append(len(audio.frame_data))
+        self.started.set()
+        self.release.wait(timeout=2)
+        return f"text {len(self.calls)}"
+
+
+def _push(session, seconds):
+    for _ in range(int(seconds * RATE / 512)):
+        session.push(FRAME)
+
+
+def test_short_pause_is_not_recognized():
+    recognize = Recognizer()
+    recognize.release.set()
+    session = BufferedSession(recognize, RATE, WIDTH)
+    _push(session, 0.5)
+    session.set_speaking(False)
+    _push(session, 0.1)
+    session.set_speaking(True)
+    _push(session, 0.5)
+    assert recognize.calls == []
+
+
+def test_pause_result_becomes_the_transcript():
+    recognize = Recognizer()
+    recognize.release.set()
+    session = BufferedSession(recognize, RATE, WIDTH)
+    _push(session, 0.5)
+    session.set_speaking(False)
+    _push(session, 0.7)
+    assert session.finish(timeout=2) == "text 1"
+    assert len(recognize.calls) == 1
+
+
+def test_one_call_in_flight_per_session():
+    recognize = Recognizer()
+    session = BufferedSession(recognize, RATE, WIDTH)
+    _push(session, 0.5)
+    session.set_speaking(False)
+    _push(session, 0.3)
+    assert recognize.started.wait(timeout=2)
+    # Speech resumes and pauses again while the first call is still running
+    session.set_speaking(True)
+    _push(session, 0.5)
+    session.set_speaking(False)
+    _push(session, 0.5)
+    assert len(recognize.calls) == 1
+
+    recognize.release.set()
+    assert session.finish(timeout=2) == "text 2"
+    assert len(recognize.calls) == 2
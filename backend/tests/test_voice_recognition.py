@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from app.stt.audio_source import GeneratorSource, ScheduledWakeDetector
+from app.stt.streaming_recognizer import ScriptedStreamingBackend
+from app.stt.voice_recognition import VoiceAssistant
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude, rng):
+    t = np.arange(int(seconds * RATE)) / RATE
+    samples = amplitude * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 20, len(t))
+    return samples.astype(np.int16).tobytes()
+
+
+def _replay(segments, wake_at):
+    """Run one wake word + command through the assistant; return the captured PCM."""
+    rng = np.random.default_rng(0)
+    captured = []
+
+    def transcript(pcm):
+        captured.append(pcm)
+        return "open whatsapp"
+
+    recognized = []
+    assistant = VoiceAssistant(
+        cooldown_seconds=0,
+        on_recognized=recognized.append,
+        on_partial=lambda text: None,
+        audio_source=GeneratorSource([_tone(seconds, amplitude, rng) for seconds, amplitude in segments], speed=0),
+        hotword_detector=ScheduledWakeDetector([wake_at]),
+        streaming_backend=ScriptedStreamingBackend(transcript),
+    )
+    assistant.start_hotword_listener()
+    assistant.wait_until_idle()
+    assert recognized == ["open whatsapp"]
+    return captured[0]
+
+
+def test_pause_after_wake_word_keeps_the_command():
+    # quiet, "vision", a 1 s pause, the command, then silence
+    segments = [(1.0, 0), (0.5, 3000), (1.0, 0), (1.0, 3000), (2.0, 0)]
+    pcm = _replay(segments, wake_at=1.5)
+
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    # Pre-roll + pause + command, then the trailing silence
+    assert len(samples) / RATE >= 0.3 + 1.0 + 1.0
+    loud = np.flatnonzero(np.abs(samples) > 1000)
+    assert loud[-1] / RATE > 1.0 + 0.3
+
+
+def test_command_right_after_wake_word():
+    segments = [(1.0, 0), (0.5, 3000), (1.0, 3000), (2.0, 0)]
+    pcm = _replay(segments, wake_at=1.5)
+
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    assert len(samples) / RATE >= 0.3 + 1.0
@@ -48,7 +48,7 @@ class MainScreen(Screen):
 
     async def monitor_log_file(self) -> None:
         """Monitor the log file for changes and update log widget."""
-        LOG_FILE = "backend/ui/logs/assistant.log"
+        LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "logs", "assistant.log")
         
         if not os.path.exists(LOG_FILE):
             self.log_widget.write_line("Waiting for log file to be created...")